@@ -1,10 +1,15 @@
 from flask import Flask, send_from_directory, request, jsonify, abort
-from flask_cors import CORS
 from flask_migrate import Migrate
 from database import init_app
 from database.db import db
-from utils.rate_limiter import apply_global_rate_limiting
-from utils.loop_detector import apply_loop_detection
+from utils.rate_limiter import format_window
+from utils.cors import init_cors
+from utils.proxy import init_proxy_fix
+from utils.request_guard import init_request_guard, request_guard, LOOP_DETECTION_ENABLED
+from utils.query_profiler import init_query_profiler
+from utils.metrics import init_metrics
+from utils.profiler import init_profiler
+from utils.logging_config import configure_logging
 import os
 import logging
 from werkzeug.exceptions import NotFound
@@ -27,51 +32,36 @@ app.config['STATIC_FOLDER'] = STATIC_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(STATIC_FOLDER, exist_ok=True)
 
-# Configuration CORS
-CORS(app, 
-     supports_credentials=True, 
-     resources={
-         r"/api/*": {
-             "origins": ["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"], 
-             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-             "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"]
-         },
-         r"/static/*": {
-             "origins": ["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"], 
-             "methods": ["GET", "OPTIONS"]
-         }
-     },
-     expose_headers=["Content-Type", "Authorization"])
-
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
+# Adresse du client depuis les proxys de confiance seulement (TRUSTED_PROXY_HOPS)
+init_proxy_fix(app)
+
+# CORS au niveau WSGI : les preflights sont servis avant le routage et les protections
+init_cors(app)
+
+# Configuration du logging (JSON, écriture dans un thread dédié, niveaux par module)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Protections anti-abus, enregistrées avant tout autre hook : un client bloqué ne touche pas la base
+logger.info("🛡️  Applying rate limiting and loop detection...")
+init_request_guard(app, max_requests_per_minute=25)
+
 # Route PRINCIPALE pour servir les fichiers uploadés
 @app.route('/static/uploads/<path:filename>')
 def uploaded_file(filename):
     """Sert les fichiers uploadés depuis le dossier uploads"""
     try:
-        logger.info(f"🔍 Demande de fichier: {filename}")
-        logger.info(f"📁 Dossier uploads: {UPLOAD_FOLDER}")
-        
         file_path = os.path.join(UPLOAD_FOLDER, filename)
-        logger.info(f"📄 Chemin complet: {file_path}")
-        logger.info(f"✅ Fichier existe: {os.path.exists(file_path)}")
-        
         if not os.path.exists(file_path):
-            logger.error(f"❌ Fichier non trouvé: {file_path}")
-            # Lister les fichiers disponibles pour debug
-            if os.path.exists(UPLOAD_FOLDER):
-                available_files = os.listdir(UPLOAD_FOLDER)
-                logger.info(f"📋 Fichiers disponibles: {available_files}")
+            logger.warning("❌ Fichier non trouvé: %s", file_path)
             abort(404)
             
-        logger.info(f"✅ Envoi du fichier: {filename}")
         return send_from_directory(UPLOAD_FOLDER, filename)
         
+    except NotFound:
+        raise
     except Exception as e:
-        logger.error(f"❌ Erreur lors de l'envoi du fichier {filename}: {str(e)}")
+        logger.error("❌ Erreur lors de l'envoi du fichier %s: %s", filename, e)
         abort(500)
 
 # Route de fallback pour tous les fichiers statiques
@@ -79,10 +69,10 @@ def uploaded_file(filename):
 def serve_static(path):
     """Sert tous les autres fichiers statiques"""
     try:
-        logger.info(f"🔍 Demande de fichier statique: {path}")
+        logger.debug("🔍 Demande de fichier statique: %s", path)
         return send_from_directory(STATIC_FOLDER, path)
     except Exception as e:
-        logger.error(f"❌ Erreur fichier statique {path}: {str(e)}")
+        logger.error("❌ Erreur fichier statique %s: %s", path, e)
         abort(404)
 
 # Route de test pour vérifier les uploads
@@ -129,15 +119,19 @@ def test_file(filename):
 @app.before_request
 def log_request_info():
     if request.path.startswith('/static/'):
-        logger.info(f"🌐 Requête statique: {request.method} {request.path}")
+        logger.debug("🌐 Requête statique: %s %s", request.method, request.path)
 
 # Configuration de la base de données
 migrate = Migrate(app, db)
 
-# Appliquer les protections
-print("🛡️  Applying rate limiting and loop detection...")
-apply_global_rate_limiting(app, max_requests_per_minute=25)
-apply_loop_detection(app)
+# Profilage à la demande (en-tête X-Profile signé) ou d'une requête sur N
+init_profiler(app)
+
+# Compteur de requêtes SQL par requête HTTP (en-tête Server-Timing, log des requêtes lentes)
+init_query_profiler(app)
+
+# Métriques Prometheus (latence par route, pool, caches, recommandations) sur /metrics
+init_metrics(app)
 
 # CORRECTION: Enregistrer les routes CORRECTEMENT
 from routes import register_routes
@@ -146,12 +140,23 @@ register_routes(app)
 # Créer les tables
 with app.app_context():
     db.create_all()
-    print("📊 Tables de base de données créées")
+    logger.info("📊 Tables de base de données créées")
+
+# Écriture par lots des clics mis en tampon par les routes /api/movies/.../click (un thread par processus)
+from services.click_ingest_service import click_ingestor
+click_ingestor.start(app)
+
+# Rafraîchissement des métadonnées TMDB en arrière-plan (stale-while-revalidate)
+if os.getenv('MOVIE_REFRESH_ENABLED', '0') == '1':
+    from services.movie_refresh_service import movie_refresher
+    movie_refresher.start(app)
+    logger.info("🔄 Rafraîchissement TMDB en arrière-plan: Actif")
 
-# Route OPTIONS pour CORS
-@app.route('/api/<path:path>', methods=['OPTIONS'])
-def options_handler(path):
-    return '', 200
+# Cumul périodique des clics pour le modèle collaboratif
+if os.getenv('CLICK_ROLLUP_ENABLED', '0') == '1':
+    from services.click_rollup_service import click_rollup_job
+    click_rollup_job.start(app)
+    logger.info("🖱️ Cumul des clics en arrière-plan: Actif")
 
 # Route racine
 @app.route('/')
@@ -223,32 +228,37 @@ def test_create_notification():
 @app.errorhandler(404)
 def not_found_error(error):
     if request.path.startswith('/static/uploads/'):
-        logger.error(f"❌ 404 - Fichier non trouvé: {request.path}")
+        logger.error("❌ 404 - Fichier non trouvé: %s", request.path)
         return jsonify({'error': 'Fichier non trouvé'}), 404
     return jsonify({'error': 'Page non trouvée'}), 404
 
 if __name__ == '__main__':
-    print("🚀 Démarrage du serveur Flask...")
-    print(f"📁 Dossier base: {BASE_DIR}")
-    print(f"📁 Dossier static: {STATIC_FOLDER}")
-    print(f"📁 Dossier uploads: {UPLOAD_FOLDER}")
-    print(f"📁 Uploads existe: {os.path.exists(UPLOAD_FOLDER)}")
-    print(f"📁 Static existe: {os.path.exists(STATIC_FOLDER)}")
+    logger.info("🚀 Démarrage du serveur Flask...")
+    logger.info("📁 Dossier base: %s", BASE_DIR)
+    logger.info("📁 Dossier static: %s", STATIC_FOLDER)
+    logger.info("📁 Dossier uploads: %s", UPLOAD_FOLDER)
+    logger.info("📁 Uploads existe: %s", os.path.exists(UPLOAD_FOLDER))
+    logger.info("📁 Static existe: %s", os.path.exists(STATIC_FOLDER))
     
     if os.path.exists(UPLOAD_FOLDER):
         files = os.listdir(UPLOAD_FOLDER)
-        print(f"📋 Fichiers dans uploads: {len(files)}")
+        logger.info("📋 Fichiers dans uploads: %s", len(files))
         for f in files[:3]:  # Afficher les 3 premiers fichiers
-            print(f"   - {f}")
+            logger.info("   - %s", f)
     
-    print("🛡️  Rate limits appliqués:")
-    print("   - Endpoints API généraux: 25 requêtes/minute")
-    print("   - Endpoints données utilisateur: 15 requêtes/minute") 
-    print("   - Recommandations: 5 requêtes/minute")
-    print("🔍 Détection de boucles infinies: Active")
-    print("🌐 Serveur démarré sur http://localhost:5000")
-    print("🧪 Test des uploads: http://localhost:5000/api/test-uploads")
-    print("🔔 Test des notifications: http://localhost:5000/api/test-notifications")
-    print("🔔 Créer notification test: http://localhost:5000/api/test-create-notification")
+    logger.info("🛡️  Rate limits appliqués:")
+    for policy in app.extensions['rate_limit_policies'].describe():
+        logger.info("   - %s: %s requêtes/%s", policy.description, policy.limit, format_window(policy.window))
+    if LOOP_DETECTION_ENABLED and request_guard.block_seconds:
+        logger.info("🔍 Détection de boucles infinies: Active (blocage %ss au-delà de %s requêtes en %ss, %s)",
+                    request_guard.block_seconds, request_guard.block_threshold, request_guard.window,
+                    'clients anonymes compris' if request_guard.block_ips else 'utilisateurs authentifiés seulement')
+    else:
+        logger.info("🔍 Détection de boucles infinies: %s",
+                    'Active (alerte seulement)' if LOOP_DETECTION_ENABLED else 'Inactive')
+    logger.info("🌐 Serveur démarré sur http://localhost:5000")
+    logger.info("🧪 Test des uploads: http://localhost:5000/api/test-uploads")
+    logger.info("🔔 Test des notifications: http://localhost:5000/api/test-notifications")
+    logger.info("🔔 Créer notification test: http://localhost:5000/api/test-create-notification")
     
     app.run(debug=True, port=5000, host='0.0.0.0')
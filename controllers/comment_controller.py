@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_cors import cross_origin
+from sqlalchemy.orm import selectinload
 from models.comment import Comment
 from models.user import User
 from models.comment_like import CommentLike
 from database.db import db
+from repositories.user_repository import bump_interaction_version
+from services.trending_service import record_interaction, forget_interaction
 import logging
 
 # Import des services de notification
@@ -12,58 +14,32 @@ from services.notification_service import NotificationService
 comment_bp = Blueprint('comment', __name__)
 logger = logging.getLogger(__name__)
 
-@comment_bp.route('/<path:path>', methods=['OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
-def options_handler(path):
-    return '', 200
-
-@comment_bp.route('/<int:movie_id>/comments/', methods=['GET', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@comment_bp.route('/<int:movie_id>/comments/', methods=['GET'])
 def get_comments(movie_id):
     """Récupérer tous les commentaires d'un film"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        user_id = request.args.get('user_id')
-        
-        # Récupérer tous les commentaires du film
-        comments = Comment.query.filter_by(movie_id=movie_id, parent_id=None).order_by(Comment.created_at.desc()).all()
+        user_id = request.args.get('user_id', type=int)
+        
+        # Récupérer tous les commentaires du film, avec auteurs, likes et réponses
+        # chargés par lots (un SELECT ... IN par relation, pas une requête par commentaire)
+        replies = selectinload(Comment.replies)
+        nested_replies = replies.selectinload(Comment.replies)
+        comments = Comment.query.options(
+            selectinload(Comment.user), selectinload(Comment.likes),
+            replies.selectinload(Comment.user), replies.selectinload(Comment.likes),
+            nested_replies.selectinload(Comment.user), nested_replies.selectinload(Comment.likes)
+        ).filter_by(movie_id=movie_id, parent_id=None).order_by(Comment.created_at.desc()).all()
         
         comments_data = []
         for comment in comments:
-            comment_dict = comment.to_dict()
-            
-            # Ajouter les informations de like si l'utilisateur est connecté
-            if user_id:
-                like = CommentLike.query.filter_by(comment_id=comment.id, user_id=user_id).first()
-                comment_dict['is_liked_by_user'] = like is not None
-            else:
-                comment_dict['is_liked_by_user'] = False
-            
-            # Compter les likes
-            likes_count = CommentLike.query.filter_by(comment_id=comment.id).count()
-            comment_dict['likes_count'] = likes_count
+            # to_dict calcule likes et like de l'utilisateur depuis les relations déjà chargées
+            comment_dict = comment.to_dict(user_id=user_id)
             
-            # Récupérer les réponses
-            replies = Comment.query.filter_by(parent_id=comment.id).order_by(Comment.created_at.asc()).all()
-            replies_data = []
-            
-            for reply in replies:
-                reply_dict = reply.to_dict()
-                
-                # Ajouter les informations de like pour les réponses
-                if user_id:
-                    reply_like = CommentLike.query.filter_by(comment_id=reply.id, user_id=user_id).first()
-                    reply_dict['is_liked_by_user'] = reply_like is not None
-                else:
-                    reply_dict['is_liked_by_user'] = False
-                
-                # Compter les likes des réponses
-                reply_likes_count = CommentLike.query.filter_by(comment_id=reply.id).count()
-                reply_dict['likes_count'] = reply_likes_count
-                
-                replies_data.append(reply_dict)
+            # Réponses, de la plus ancienne à la plus récente
+            replies_data = [
+                reply.to_dict(user_id=user_id)
+                for reply in sorted(comment.replies, key=lambda reply: reply.created_at)
+            ]
             
             comment_dict['replies'] = replies_data
             comments_data.append(comment_dict)
@@ -74,13 +50,9 @@ def get_comments(movie_id):
         logger.error(f"Erreur lors de la récupération des commentaires: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
 
-@comment_bp.route('/<int:movie_id>/comments/', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@comment_bp.route('/<int:movie_id>/comments/', methods=['POST'])
 def add_comment(movie_id):
     """Ajouter un nouveau commentaire"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     data = request.get_json()
     user_id = data.get('user_id')
     content = data.get('content')
@@ -99,7 +71,9 @@ def add_comment(movie_id):
         )
         
         db.session.add(new_comment)
+        bump_interaction_version(user_id)
         db.session.commit()
+        record_interaction(movie_id, 'comment')
         
         # NOUVEAU: Créer une notification pour les réponses
         if parent_id:
@@ -107,7 +81,7 @@ def add_comment(movie_id):
             replier_user = User.query.get(user_id)
             
             if parent_comment and replier_user:
-                logger.info(f"🔔 Création d'une notification de réponse: {replier_user.fullname} a répondu à {parent_comment.user.fullname}")
+                logger.info("🔔 Création d'une notification de réponse: %s a répondu à %s", replier_user.fullname, parent_comment.user.fullname)
                 NotificationService.create_comment_reply_notification(parent_comment, new_comment, replier_user)
         
         return jsonify({
@@ -120,13 +94,9 @@ def add_comment(movie_id):
         logger.error(f"Erreur lors de l'ajout du commentaire: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
 
-@comment_bp.route('/<int:movie_id>/comments/<int:comment_id>/like', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@comment_bp.route('/<int:movie_id>/comments/<int:comment_id>/like', methods=['POST'])
 def like_comment(movie_id, comment_id):
     """Liker/unliker un commentaire"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     data = request.get_json()
     user_id = data.get('user_id')
     
@@ -147,7 +117,7 @@ def like_comment(movie_id, comment_id):
             # Unlike
             db.session.delete(existing_like)
             is_liked = False
-            logger.info(f"👎 {liker_user.fullname} a retiré son like du commentaire {comment_id}")
+            logger.info("👎 %s a retiré son like du commentaire %s", liker_user.fullname, comment_id)
         else:
             # Like
             new_like = CommentLike(comment_id=comment_id, user_id=user_id)
@@ -156,7 +126,7 @@ def like_comment(movie_id, comment_id):
             
             # NOUVEAU: Créer une notification de like
             if comment and liker_user:
-                logger.info(f"🔔 Création d'une notification de like: {liker_user.fullname} a aimé le commentaire de {comment.user.fullname}")
+                logger.info("🔔 Création d'une notification de like: %s a aimé le commentaire de %s", liker_user.fullname, comment.user.fullname)
                 NotificationService.create_comment_like_notification(comment, liker_user)
         
         db.session.commit()
@@ -174,13 +144,9 @@ def like_comment(movie_id, comment_id):
         logger.error(f"Erreur lors du like du commentaire: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
 
-@comment_bp.route('/<int:movie_id>/comments/<int:comment_id>', methods=['PUT', 'DELETE', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@comment_bp.route('/<int:movie_id>/comments/<int:comment_id>', methods=['PUT', 'DELETE'])
 def manage_comment(movie_id, comment_id):
     """Modifier ou supprimer un commentaire"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     comment = Comment.query.get_or_404(comment_id)
     
     if request.method == 'PUT':
@@ -224,12 +190,20 @@ def manage_comment(movie_id, comment_id):
             # Supprimer d'abord les likes associés
             CommentLike.query.filter_by(comment_id=comment_id).delete()
             
+            # Les auteurs des réponses supprimées perdent aussi une interaction
+            replies = db.session.query(Comment.user_id, Comment.created_at).filter_by(parent_id=comment_id).all()
+            reply_authors = [author_id for author_id, _ in replies]
+            
             # Supprimer les réponses
             Comment.query.filter_by(parent_id=comment_id).delete()
             
             # Supprimer le commentaire
+            commented_at = comment.created_at
             db.session.delete(comment)
+            bump_interaction_version(user_id, *reply_authors)
             db.session.commit()
+            for created_at in [commented_at] + [created_at for _, created_at in replies]:
+                forget_interaction(movie_id, 'comment', created_at)
             
             return jsonify({'message': 'Commentaire supprimé avec succès'}), 200
             
@@ -1,20 +1,18 @@
 from flask import Blueprint, request, jsonify, session
-from flask_cors import cross_origin
 from models.like import Like
 from models.movie import Movie
 from models.user import User
 from database.db import db
+from repositories.movie_repository import insert_movie_if_absent
+from repositories.user_repository import bump_interaction_version
+from services.trending_service import record_interaction, forget_interaction
 import logging
 
 like_bp = Blueprint('like', __name__)
 logger = logging.getLogger(__name__)
 
-@like_bp.route('/<int:movie_id>/likes', methods=['POST', 'DELETE', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@like_bp.route('/<int:movie_id>/likes', methods=['POST', 'DELETE'])
 def handle_movie_likes(movie_id):
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     data = request.get_json() if request.method == 'POST' else request.get_json()
     user_id = data.get('user_id') if data else None
     
@@ -28,15 +26,15 @@ def handle_movie_likes(movie_id):
             if existing_like:
                 return jsonify({'message': 'Film déjà aimé'}), 200
             
-            # Créer le film s'il n'existe pas
-            movie = Movie.query.get(movie_id)
-            if not movie:
-                movie = Movie(id=movie_id, title="Film inconnu")
-                db.session.add(movie)
+            # Créer le film s'il n'existe pas (ON CONFLICT : sûr face aux likes simultanés)
+            if not Movie.query.get(movie_id):
+                insert_movie_if_absent(id=movie_id, title="Film inconnu")
             
             new_like = Like(user_id=user_id, movie_id=movie_id)
             db.session.add(new_like)
+            bump_interaction_version(user_id)
             db.session.commit()
+            record_interaction(movie_id, 'like')
             
             return jsonify({'message': 'Film aimé avec succès'}), 201
             
@@ -46,8 +44,11 @@ def handle_movie_likes(movie_id):
             if not like:
                 return jsonify({'error': 'Like non trouvé'}), 404
             
+            liked_at = like.created_at
             db.session.delete(like)
+            bump_interaction_version(user_id)
             db.session.commit()
+            forget_interaction(movie_id, 'like', liked_at)
             
             return jsonify({'message': 'Like supprimé avec succès'}), 200
             
@@ -57,21 +58,17 @@ def handle_movie_likes(movie_id):
         return jsonify({'error': f'Erreur interne: {str(e)}'}), 500
 
 # NOUVEAU: Endpoint spécifique pour récupérer les likes d'un utilisateur
-@like_bp.route('/<int:user_id>/likes', methods=['GET', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@like_bp.route('/<int:user_id>/likes', methods=['GET'])
 def get_user_likes(user_id):
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        logger.info(f"🔍 Récupération des likes pour l'utilisateur {user_id}")
+        logger.info("🔍 Récupération des likes pour l'utilisateur %s", user_id)
         
         # Récupérer tous les likes de l'utilisateur avec les détails du film
         likes = db.session.query(Like, Movie).join(
             Movie, Like.movie_id == Movie.id, isouter=True
         ).filter(Like.user_id == user_id).all()
         
-        logger.info(f"📊 Nombre de likes trouvés: {len(likes)}")
+        logger.debug("📊 Nombre de likes trouvés: %s", len(likes))
         
         likes_data = []
         for like, movie in likes:
@@ -87,19 +84,15 @@ def get_user_likes(user_id):
             
             likes_data.append(like_dict)
         
-        logger.info(f"✅ Likes récupérés avec succès pour l'utilisateur {user_id}")
+        logger.debug("✅ Likes récupérés avec succès pour l'utilisateur %s", user_id)
         return jsonify(likes_data), 200
         
     except Exception as e:
         logger.error(f"❌ Erreur lors de la récupération des likes: {str(e)}")
         return jsonify({'error': f'Erreur interne: {str(e)}'}), 500
 
-@like_bp.route('/<int:movie_id>/likes/count', methods=['GET', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@like_bp.route('/<int:movie_id>/likes/count', methods=['GET'])
 def get_movie_likes_count(movie_id):
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         count = Like.query.filter_by(movie_id=movie_id).count()
         return jsonify({'count': count}), 200
@@ -1,33 +1,46 @@
 from flask import Blueprint, request, jsonify
-from flask_cors import cross_origin
 from services.movie_service import get_movies, get_movie, add_movie, edit_movie, remove_movie, get_or_create_movie
+from services.search_service import search_movies, suggest_movies
+from services.click_ingest_service import click_ingestor, parse_click_events, ClickBufferFull, CLICK_BATCH_MAX_EVENTS
 from database.db import db
 
 movie_bp = Blueprint('movie', __name__)
 
-@movie_bp.route('/', methods=['GET', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@movie_bp.route('/', methods=['GET'])
 def get_all_movies():
-    if request.method == 'OPTIONS':
-        return '', 200
     movies = get_movies()
     return jsonify([movie.to_dict() for movie in movies])
 
-@movie_bp.route('/<int:id>', methods=['GET', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@movie_bp.route('/search', methods=['GET'])
+def search_movies_route():
+    """Recherche plein texte paginée sur le titre et le résumé des films."""
+    query = request.args.get('q', '')
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    try:
+        return jsonify(search_movies(query, page=page, per_page=per_page)), 200
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de la recherche: {str(e)}'}), 500
+
+@movie_bp.route('/search/suggest', methods=['GET'])
+def suggest_movies_route():
+    """Autocomplétion des titres de films par préfixe."""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 8, type=int)
+    try:
+        return jsonify(suggest_movies(query, limit=limit)), 200
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de l\'autocomplétion: {str(e)}'}), 500
+
+@movie_bp.route('/<int:id>', methods=['GET'])
 def get_single_movie(id):
-    if request.method == 'OPTIONS':
-        return '', 200
     movie = get_movie(id)
     if movie:
         return jsonify(movie.to_dict())
     return jsonify({'error': 'Film non trouvé'}), 404
 
-@movie_bp.route('/', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@movie_bp.route('/', methods=['POST'])
 def create_movie():
-    if request.method == 'OPTIONS':
-        return '', 200
     data = request.get_json()
     movie = add_movie(
         title=data.get('title'),
@@ -41,11 +54,8 @@ def create_movie():
         return jsonify(movie.to_dict()), 201
     return jsonify({'error': 'Erreur lors de la création'}), 400
 
-@movie_bp.route('/check-or-create', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@movie_bp.route('/check-or-create', methods=['POST'])
 def check_or_create_movie():
-    if request.method == 'OPTIONS':
-        return '', 200
     """
     Vérifie si un film existe, ou le crée s'il n'existe pas.
     """
@@ -53,16 +63,18 @@ def check_or_create_movie():
     if not data:
         return jsonify({'error': 'Données manquantes'}), 400
         
-    movie = get_or_create_movie(data['id'])
+    try:
+        movie_id = int(data['id'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'ID de film invalide'}), 400
+    
+    movie, _ = get_or_create_movie(movie_id)
     if movie:
         return jsonify(movie.to_dict()), 200
     return jsonify({'error': 'Erreur lors de la vérification ou création du film'}), 500
 
-@movie_bp.route('/<int:id>', methods=['PUT', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@movie_bp.route('/<int:id>', methods=['PUT'])
 def update_movie(id):
-    if request.method == 'OPTIONS':
-        return '', 200
     data = request.get_json()
     movie = edit_movie(
         movie_id=id,
@@ -77,38 +89,54 @@ def update_movie(id):
         return jsonify(movie.to_dict())
     return jsonify({'error': 'Film non trouvé'}), 404
 
-@movie_bp.route('/<int:id>', methods=['DELETE', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@movie_bp.route('/<int:id>', methods=['DELETE'])
 def delete_movie(id):
-    if request.method == 'OPTIONS':
-        return '', 200
     movie = remove_movie(id)
     if movie:
         return jsonify({'message': 'Film supprimé'})
     return jsonify({'error': 'Film non trouvé'}), 404
 
 # Ajout de la route pour enregistrer les clics
-@movie_bp.route('/<int:movie_id>/clicks', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@movie_bp.route('/<int:movie_id>/clicks', methods=['POST'])
 def record_click(movie_id):
-    if request.method == 'OPTIONS':
-        return '', 200
-        
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     user_id = data.get('user_id')
     
     if not user_id:
         return jsonify({'error': 'ID utilisateur manquant'}), 400
         
     try:
-        # Ici, vous pouvez implémenter la logique pour enregistrer le clic
-        # Par exemple, créer une entrée dans une table de clics
-        # Pour l'instant, nous retournons simplement un succès
-        
-        return jsonify({
-            'message': 'Clic enregistré avec succès',
-            'movie_id': movie_id,
-            'user_id': user_id
-        }), 200
-    except Exception as e:
-        return jsonify({'error': f'Erreur lors de l\'enregistrement du clic: {str(e)}'}), 500
+        events = parse_click_events([{'movie_id': movie_id, 'clicked_at': data.get('clicked_at')}], default_user_id=user_id)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Clic invalide: {str(e)}'}), 400
+    
+    return _enqueue_clicks(events, {'movie_id': movie_id, 'user_id': user_id})
+
+@movie_bp.route('/clicks/batch', methods=['POST'])
+def record_clicks_batch():
+    """Enregistre jusqu'à CLICK_BATCH_MAX_EVENTS clics en un seul appel."""
+    data = request.get_json(silent=True) or {}
+    items = data.get('clicks')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Liste de clics manquante'}), 400
+    if len(items) > CLICK_BATCH_MAX_EVENTS:
+        return jsonify({'error': f'Maximum {CLICK_BATCH_MAX_EVENTS} clics par lot'}), 413
+    
+    try:
+        events = parse_click_events(items, default_user_id=data.get('user_id'))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Clic invalide: {str(e)}'}), 400
+    
+    return _enqueue_clicks(events, {'accepted': len(events)})
+
+def _enqueue_clicks(events, payload):
+    """Met les clics en tampon ; ils sont écrits par lots en arrière-plan (202)."""
+    try:
+        click_ingestor.submit(events)
+    except ClickBufferFull:
+        response = jsonify({'error': 'Trop de clics en attente, réessayez plus tard'})
+        response.headers['Retry-After'] = '1'
+        return response, 429
+    
+    payload['message'] = 'Clic enregistré avec succès'
+    return jsonify(payload), 202
@@ -1,8 +1,7 @@
-from flask_cors import cross_origin 
 from flask import Blueprint, request, jsonify, session, current_app
 from models.user import User
 from database.db import db
-import jwt
+from utils.auth_middleware import generate_token, current_user_id, current_user, token_required, principal_cache
 import os
 import datetime
 import firebase_admin
@@ -17,13 +16,18 @@ import json
 
 user_bp = Blueprint('user', __name__)
 
-SECRET_KEY = os.environ.get('SECRET_KEY', 'votre_clef_secrete_par_defaut')
 logger = logging.getLogger(__name__)
 
 # Extensions d'images autorisées
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
+def load_profile(user_id):
+    """Profil public : l'utilisateur authentifié en cache s'il s'agit de lui, sinon la base."""
+    if current_user_id() == user_id:
+        return current_user()
+    return db.session.get(User, user_id)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -50,25 +54,8 @@ def optimize_image(image_file, max_size=(800, 800), quality=85):
         logger.error(f"Erreur lors de l'optimisation de l'image: {str(e)}")
         return None
 
-def generate_token(user_id):
-    payload = {
-        'exp': datetime.datetime.utcnow() + datetime.timedelta(days=1),
-        'iat': datetime.datetime.utcnow(),
-        'sub': user_id
-    }
-    return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
-
-@user_bp.route('/<path:path>', methods=['OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
-def options_handler(path):
-    return '', 200
-
-@user_bp.route('/upload-image/<int:id>', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@user_bp.route('/upload-image/<int:id>', methods=['POST'])
 def upload_image(id):
-    if request.method == 'OPTIONS':
-        return '', 200
-        
     user = User.query.get(id)
     if not user:
         return jsonify({'error': 'Utilisateur non trouvé'}), 404
@@ -103,9 +90,9 @@ def upload_image(id):
         # Créer le dossier s'il n'existe pas
         os.makedirs(upload_folder, exist_ok=True)
         
-        logger.info(f"📁 Dossier upload: {upload_folder}")
-        logger.info(f"📁 Dossier existe: {os.path.exists(upload_folder)}")
-        logger.info(f"📄 Fichier reçu: {file.filename}, Taille: {file_size} bytes")
+        logger.info("📁 Dossier upload: %s", upload_folder)
+        logger.info("📁 Dossier existe: %s", os.path.exists(upload_folder))
+        logger.info("📄 Fichier reçu: %s, Taille: %s bytes", file.filename, file_size)
         
         # Supprimer l'ancienne image si elle existe
         if user.image and user.image.startswith('http://localhost:5000/static/uploads/'):
@@ -114,7 +101,7 @@ def upload_image(id):
             if os.path.exists(old_file_path):
                 try:
                     os.remove(old_file_path)
-                    logger.info(f"🗑️ Ancienne image supprimée: {old_file_path}")
+                    logger.info("🗑️ Ancienne image supprimée: %s", old_file_path)
                 except Exception as e:
                     logger.warning(f"⚠️ Impossible de supprimer l'ancienne image: {str(e)}")
         
@@ -131,11 +118,11 @@ def upload_image(id):
         if optimized_image:
             with open(file_path, 'wb') as f:
                 f.write(optimized_image.getvalue())
-            logger.info(f"✅ Image optimisée et sauvegardée: {file_path}")
+            logger.info("✅ Image optimisée et sauvegardée: %s", file_path)
         else:
             # Fallback: sauvegarder l'image originale
             file.save(file_path)
-            logger.info(f"✅ Image originale sauvegardée: {file_path}")
+            logger.info("✅ Image originale sauvegardée: %s", file_path)
         
         # Vérifier que le fichier a bien été sauvegardé
         if not os.path.exists(file_path):
@@ -143,7 +130,7 @@ def upload_image(id):
         
         # Vérifier la taille du fichier sauvegardé
         saved_size = os.path.getsize(file_path)
-        logger.info(f"📊 Taille du fichier sauvegardé: {saved_size} bytes")
+        logger.info("📊 Taille du fichier sauvegardé: %s bytes", saved_size)
         
         # Mettre à jour l'URL de l'image dans la base de données
         server_url = request.host_url.rstrip('/')
@@ -151,8 +138,9 @@ def upload_image(id):
         
         user.image = image_url
         db.session.commit()
+        principal_cache.invalidate(user.id)
         
-        logger.info(f"✅ URL de l'image sauvegardée: {image_url}")
+        logger.info("✅ URL de l'image sauvegardée: %s", image_url)
         
         return jsonify({
             'message': 'Image enregistrée avec succès',
@@ -168,12 +156,8 @@ def upload_image(id):
         logger.error(f"❌ Erreur lors de l'upload de l'image: {str(e)}")
         return jsonify({'error': f'Erreur lors de l\'enregistrement de l\'image: {str(e)}'}), 500
 
-@user_bp.route('/<int:id>', methods=['PUT', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@user_bp.route('/<int:id>', methods=['PUT'])
 def update_user(id):
-    if request.method == 'OPTIONS':
-        return '', 200
-        
     user = User.query.get(id)
     if not user:
         return jsonify({'error': 'Utilisateur non trouvé'}), 404
@@ -185,6 +169,7 @@ def update_user(id):
     
     try:
         db.session.commit()
+        principal_cache.invalidate(user.id)
         return jsonify({
             'message': 'Profil mis à jour avec succès',
             'user': user.to_dict()
@@ -193,12 +178,8 @@ def update_user(id):
         db.session.rollback()
         return jsonify({'error': f'Erreur lors de la mise à jour: {str(e)}'}), 500
 
-@user_bp.route('/signup', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@user_bp.route('/signup', methods=['POST'])
 def signup():
-    if request.method == 'OPTIONS':
-        return '', 200
-        
     data = request.get_json()
     
     if not data:
@@ -243,12 +224,8 @@ def signup():
         db.session.rollback()
         return jsonify({'error': f'Erreur lors de l\'inscription: {str(e)}'}), 500
 
-@user_bp.route('/signin', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@user_bp.route('/signin', methods=['POST'])
 def signin():
-    if request.method == 'OPTIONS':
-        return '', 200
-        
     data = request.get_json()
     
     if 'email' in data and 'password' in data:
@@ -347,12 +324,8 @@ def signin():
     else:
         return jsonify({'error': 'Format de données invalide'}), 400
 
-@user_bp.route('/signout', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@user_bp.route('/signout', methods=['POST'])
 def signout():
-    if request.method == 'OPTIONS':
-        return '', 200
-        
     try:
         # Déconnexion Firebase si utilisé
         id_token = request.json.get('idToken') if request.json else None
@@ -371,44 +344,16 @@ def signout():
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la déconnexion: {str(e)}'}), 500
 
-@user_bp.route('/me', methods=['GET', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
-def get_current_user():
-    if request.method == 'OPTIONS':
-        return '', 200
-        
-    token = request.headers.get('Authorization')
-    if not token or not token.startswith('Bearer '):
-        if 'id' not in session:
-            return jsonify({'error': 'Non authentifié'}), 401
-        user_id = session['id']
-    else:
-        token = token.split(' ')[1]
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            user_id = payload['sub']
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token expiré'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Token invalide'}), 401
-    
-    user = User.query.get(user_id)
-    
-    if not user:
-        if 'id' in session:
-            session.pop('id')
-        return jsonify({'error': 'Utilisateur non trouvé'}), 404
-        
+@user_bp.route('/me', methods=['GET'])
+@token_required
+def get_current_user(user):
+    # Utilisateur authentifié en cache (utils/auth_middleware) : pas de requête tant qu'il y est
     return jsonify({
         'user': user.to_dict()
     }), 200
 
-@user_bp.route('/verify', methods=['POST', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@user_bp.route('/verify', methods=['POST'])
 def verify_token():
-    if request.method == 'OPTIONS':
-        return '', 200
-        
     data = request.get_json()
     
     if 'idToken' not in data:
@@ -462,12 +407,8 @@ def verify_token():
         print(f"Error verifying token: {str(e)}")
         return jsonify({'error': f'Erreur interne du serveur: {str(e)}'}), 500
 
-@user_bp.route('/<int:id>', methods=['GET', 'PUT', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@user_bp.route('/<int:id>', methods=['GET', 'PUT'])
 def get_user(id):
-    if request.method == 'OPTIONS':
-        return '', 200
-        
     if request.method == 'PUT':
         user = User.query.get(id)
         if not user:
@@ -480,6 +421,7 @@ def get_user(id):
         
         try:
             db.session.commit()
+            principal_cache.invalidate(user.id)
             return jsonify({
                 'message': 'Profil mis à jour avec succès',
                 'user': user.to_dict()
@@ -489,29 +431,25 @@ def get_user(id):
             return jsonify({'error': f'Erreur lors de la mise à jour: {str(e)}'}), 500
     
     elif request.method == 'GET':
-        user = User.query.get(id)
+        user = load_profile(id)
         if not user:
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
             
         return jsonify(user.to_dict()), 200
 
 # ENDPOINT POUR LES LIKES D'UN UTILISATEUR
-@user_bp.route('/<int:user_id>/likes', methods=['GET', 'OPTIONS'])
-@cross_origin(supports_credentials=True, origins=["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"])
+@user_bp.route('/<int:user_id>/likes', methods=['GET'])
 def get_user_likes(user_id):
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         from models.like import Like
         from models.movie import Movie
         
-        logger.info(f"🔍 Récupération des likes pour l'utilisateur {user_id}")
+        logger.info("🔍 Récupération des likes pour l'utilisateur %s", user_id)
         
         # Récupérer tous les likes de l'utilisateur
         likes = db.session.query(Like).filter_by(user_id=user_id).all()
         
-        logger.info(f"📊 Nombre de likes trouvés: {len(likes)}")
+        logger.debug("📊 Nombre de likes trouvés: %s", len(likes))
         
         likes_data = []
         for like in likes:
@@ -523,34 +461,21 @@ def get_user_likes(user_id):
             }
             likes_data.append(like_dict)
         
-        logger.info(f"✅ Likes récupérés avec succès pour l'utilisateur {user_id}")
+        logger.debug("✅ Likes récupérés avec succès pour l'utilisateur %s", user_id)
         return jsonify(likes_data), 200
         
     except Exception as e:
         logger.error(f"❌ Erreur lors de la récupération des likes: {str(e)}")
         return jsonify({'error': f'Erreur interne: {str(e)}'}), 500
 
-# CORRECTION: Endpoint stats avec configuration CORS simplifiée
-@user_bp.route('/<int:id>/stats', methods=['GET', 'OPTIONS'])
+@user_bp.route('/<int:id>/stats', methods=['GET'])
 def get_user_stats(id):
-    # CORRECTION: Gestion manuelle des CORS pour éviter les doublons
-    if request.method == 'OPTIONS':
-        response = jsonify({})
-        response.headers['Access-Control-Allow-Origin'] = 'https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app'
-        response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        return response, 200
-        
-    user = User.query.get(id)
+    user = load_profile(id)
     if not user:
-        response = jsonify({'error': 'Utilisateur non trouvé'})
-        response.headers['Access-Control-Allow-Origin'] = 'https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app'
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        return response, 404
+        return jsonify({'error': 'Utilisateur non trouvé'}), 404
     
     try:
-        logger.info(f"🔍 Récupération des statistiques pour l'utilisateur {id}")
+        logger.info("🔍 Récupération des statistiques pour l'utilisateur %s", id)
         
         # Importer les modèles nécessaires
         from models.movie import Movie
@@ -560,19 +485,19 @@ def get_user_stats(id):
         from sqlalchemy import func, desc, text
         
         # STATISTIQUES DE BASE
-        logger.info("📊 Calcul des statistiques de base...")
+        logger.debug("📊 Calcul des statistiques de base...")
         
         # Nombre de films aimés
         liked_movies_count = db.session.query(func.count(Like.id)).filter(Like.user_id == id).scalar() or 0
-        logger.info(f"❤️ Films aimés: {liked_movies_count}")
+        logger.debug("❤️ Films aimés: %s", liked_movies_count)
         
         # Nombre de films dans la watchlist
         watchlist_count = db.session.query(func.count(Watchlist.id)).filter(Watchlist.user_id == id).scalar() or 0
-        logger.info(f"📋 Watchlist: {watchlist_count}")
+        logger.debug("📋 Watchlist: %s", watchlist_count)
         
         # Nombre de commentaires
         comments_count = db.session.query(func.count(Comment.id)).filter(Comment.user_id == id).scalar() or 0
-        logger.info(f"💬 Commentaires: {comments_count}")
+        logger.debug("💬 Commentaires: %s", comments_count)
         
         # DATE D'INSCRIPTION
         if hasattr(user, 'created_at') and user.created_at:
@@ -589,10 +514,10 @@ def get_user_stats(id):
         else:
             member_since = "Juin 2025"
         
-        logger.info(f"📅 Membre depuis: {member_since}")
+        logger.debug("📅 Membre depuis: %s", member_since)
         
         # ACTIVITÉS RÉCENTES
-        logger.info("🔄 Récupération des activités récentes...")
+        logger.debug("🔄 Récupération des activités récentes...")
         recent_activities = []
         
         # Récupérer les likes récents avec gestion d'erreur
@@ -605,7 +530,7 @@ def get_user_stats(id):
                 desc(Like.created_at)
             ).limit(3).all()
             
-            logger.info(f"👍 Likes récents trouvés: {len(recent_likes)}")
+            logger.debug("👍 Likes récents trouvés: %s", len(recent_likes))
             
             for like, movie_title in recent_likes:
                 if like.created_at:  # Vérifier que la date existe
@@ -629,7 +554,7 @@ def get_user_stats(id):
                 desc(Watchlist.added_at)
             ).limit(3).all()
             
-            logger.info(f"📋 Watchlist récente trouvée: {len(recent_watchlist)}")
+            logger.debug("📋 Watchlist récente trouvée: %s", len(recent_watchlist))
             
             for watchlist_item, movie_title in recent_watchlist:
                 if watchlist_item.added_at:  # Vérifier que la date existe
@@ -653,7 +578,7 @@ def get_user_stats(id):
                 desc(Comment.created_at)
             ).limit(3).all()
             
-            logger.info(f"💬 Commentaires récents trouvés: {len(recent_comments)}")
+            logger.debug("💬 Commentaires récents trouvés: %s", len(recent_comments))
             
             for comment, movie_title in recent_comments:
                 if comment.created_at:  # Vérifier que la date existe
@@ -671,12 +596,12 @@ def get_user_stats(id):
         recent_activities.sort(key=lambda x: x['date'], reverse=True)
         recent_activities = recent_activities[:5]  # Limiter à 5 activités
         
-        logger.info(f"🔄 Total activités récentes: {len(recent_activities)}")
+        logger.debug("🔄 Total activités récentes: %s", len(recent_activities))
         
         # GENRES PRÉFÉRÉS
-        logger.info("🎭 Calcul des genres préférés...")
+        logger.debug("🎭 Calcul des genres préférés...")
         favorite_genres = get_favorite_genres_from_movie_json(id)
-        logger.info(f"🎭 Genres préférés: {favorite_genres}")
+        logger.debug("🎭 Genres préférés: %s", favorite_genres)
         
         # RÉPONSE FINALE
         stats_data = {
@@ -688,25 +613,16 @@ def get_user_stats(id):
             'favoriteGenres': favorite_genres
         }
         
-        logger.info(f"✅ Statistiques calculées avec succès pour l'utilisateur {id}")
-        logger.info(f"📊 Données finales: {stats_data}")
+        logger.debug("✅ Statistiques calculées avec succès pour l'utilisateur %s", id)
         
-        # CORRECTION: Réponse avec en-têtes CORS manuels
-        response = jsonify(stats_data)
-        response.headers['Access-Control-Allow-Origin'] = 'https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app'
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        response.headers['Content-Type'] = 'application/json'
-        return response, 200
+        return jsonify(stats_data), 200
         
     except Exception as e:
         logger.error(f"❌ Erreur lors de la récupération des statistiques: {str(e)}")
         import traceback
         logger.error(f"📋 Traceback: {traceback.format_exc()}")
         
-        response = jsonify({'error': f'Erreur interne du serveur: {str(e)}'})
-        response.headers['Access-Control-Allow-Origin'] = 'https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app'
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        return response, 500
+        return jsonify({'error': f'Erreur interne du serveur: {str(e)}'}), 500
 
 def get_time_ago(date):
     """Calcule le temps écoulé depuis une date"""
@@ -753,7 +669,7 @@ def get_favorite_genres_from_movie_json(user_id):
         from models.watchlist import Watchlist
         from collections import Counter
         
-        logger.info(f"🎭 Calcul des genres préférés pour l'utilisateur {user_id}")
+        logger.debug("🎭 Calcul des genres préférés pour l'utilisateur %s", user_id)
         
         # Récupérer les genres des films aimés
         liked_movies = db.session.query(Movie.genres).join(
@@ -762,7 +678,7 @@ def get_favorite_genres_from_movie_json(user_id):
             Like.user_id == user_id
         ).all()
         
-        logger.info(f"❤️ Films aimés avec genres: {len(liked_movies)}")
+        logger.debug("❤️ Films aimés avec genres: %s", len(liked_movies))
         
         # Récupérer les genres des films dans la watchlist
         watchlist_movies = db.session.query(Movie.genres).join(
@@ -771,7 +687,7 @@ def get_favorite_genres_from_movie_json(user_id):
             Watchlist.user_id == user_id
         ).all()
         
-        logger.info(f"📋 Films watchlist avec genres: {len(watchlist_movies)}")
+        logger.debug("📋 Films watchlist avec genres: %s", len(watchlist_movies))
         
         # Compter les genres
         genre_counter = Counter()
@@ -818,12 +734,12 @@ def get_favorite_genres_from_movie_json(user_id):
         most_common_genres = genre_counter.most_common(4)
         favorite_genres = [genre for genre, count in most_common_genres]
         
-        logger.info(f"🎭 Genres calculés: {favorite_genres}")
+        logger.debug("🎭 Genres calculés: %s", favorite_genres)
         
         # Si aucun genre trouvé, retourner des genres par défaut
         if not favorite_genres:
             favorite_genres = ["Action", "Aventure", "Science-Fiction", "Thriller"]
-            logger.info("🎭 Utilisation des genres par défaut")
+            logger.debug("🎭 Utilisation des genres par défaut")
         
         return favorite_genres
         
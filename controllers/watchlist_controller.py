@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_cors import cross_origin
 from models.watchlist import Watchlist
 from models.movie import Movie
 from models.user import User
 from database.db import db
+from repositories.movie_repository import insert_movie_if_absent
+from repositories.user_repository import bump_interaction_version
+from services.trending_service import record_interaction, forget_interaction
 import logging
 from datetime import datetime
 import json
@@ -20,7 +22,7 @@ def get_cached_watchlist(user_id):
     if user_id in watchlist_cache:
         cached_data, timestamp = watchlist_cache[user_id]
         if (datetime.now() - timestamp).seconds < cache_timeout:
-            logger.info(f"📋 Returning cached watchlist for user {user_id}")
+            logger.debug("📋 Returning cached watchlist for user %s", user_id)
             return cached_data
     return None
 
@@ -42,7 +44,7 @@ def manage_watchlist(user_id):
             if cached_data is not None:
                 return jsonify(cached_data), 200
                 
-            logger.info(f"🔍 Récupération de la watchlist pour l'utilisateur {user_id}")
+            logger.info("🔍 Récupération de la watchlist pour l'utilisateur %s", user_id)
             
             # Récupérer la watchlist avec les détails des films
             watchlist_items = db.session.query(Watchlist, Movie).join(
@@ -51,7 +53,7 @@ def manage_watchlist(user_id):
                 Watchlist.added_at.desc()
             ).all()
             
-            logger.info(f"📋 Nombre d'éléments dans la watchlist: {len(watchlist_items)}")
+            logger.debug("📋 Nombre d'éléments dans la watchlist: %s", len(watchlist_items))
             
             watchlist_data = []
             for watchlist_item, movie in watchlist_items:
@@ -74,7 +76,7 @@ def manage_watchlist(user_id):
             # CORRECTION: Mettre en cache le résultat
             cache_watchlist(user_id, watchlist_data)
             
-            logger.info(f"✅ Watchlist récupérée avec succès pour l'utilisateur {user_id}")
+            logger.debug("✅ Watchlist récupérée avec succès pour l'utilisateur %s", user_id)
             return jsonify(watchlist_data), 200
             
         except Exception as e:
@@ -91,7 +93,7 @@ def manage_watchlist(user_id):
             
             movie_id = data['movie_id']
             
-            logger.info(f"➕ Ajout du film {movie_id} à la watchlist de l'utilisateur {user_id}")
+            logger.info("➕ Ajout du film %s à la watchlist de l'utilisateur %s", movie_id, user_id)
             
             # Vérifier si le film est déjà dans la watchlist
             existing_item = Watchlist.query.filter_by(
@@ -100,13 +102,13 @@ def manage_watchlist(user_id):
             ).first()
             
             if existing_item:
-                logger.info(f"⚠️ Film {movie_id} déjà dans la watchlist")
+                logger.info("⚠️ Film %s déjà dans la watchlist", movie_id)
                 return jsonify({'message': 'Film déjà dans la liste', 'success': True}), 200
             
             # Créer le film s'il n'existe pas
             movie = Movie.query.get(movie_id)
             if not movie:
-                logger.info(f"🎬 Création du film {movie_id}")
+                logger.info("🎬 Création du film %s", movie_id)
                 
                 # Extraire les données du film depuis la requête
                 genres_data = data.get('genres', [])
@@ -125,8 +127,9 @@ def manage_watchlist(user_id):
                     'genres': genres_json
                 }
                 
-                movie = Movie(**movie_data)
-                db.session.add(movie)
+                # ON CONFLICT : une autre requête a pu créer le film entre-temps
+                insert_movie_if_absent(**movie_data)
+                movie = Movie.query.get(movie_id)
             
             # Ajouter à la watchlist
             new_watchlist_item = Watchlist(
@@ -136,13 +139,15 @@ def manage_watchlist(user_id):
             )
             
             db.session.add(new_watchlist_item)
+            bump_interaction_version(user_id)
             db.session.commit()
+            record_interaction(movie_id, 'watchlist')
             
             # CORRECTION: Invalider le cache après ajout
             if user_id in watchlist_cache:
                 del watchlist_cache[user_id]
             
-            logger.info(f"✅ Film {movie_id} ajouté à la watchlist avec succès")
+            logger.info("✅ Film %s ajouté à la watchlist avec succès", movie_id)
             
             # Retourner les données du film ajouté
             movie_dict = movie.to_dict()
@@ -169,7 +174,7 @@ def remove_from_watchlist(user_id, movie_id):
         return jsonify({'error': 'Utilisateur non trouvé'}), 404
     
     try:
-        logger.info(f"🗑️ Suppression du film {movie_id} de la watchlist de l'utilisateur {user_id}")
+        logger.info("🗑️ Suppression du film %s de la watchlist de l'utilisateur %s", movie_id, user_id)
         
         # Trouver l'élément dans la watchlist
         watchlist_item = Watchlist.query.filter_by(
@@ -182,14 +187,17 @@ def remove_from_watchlist(user_id, movie_id):
             return jsonify({'error': 'Film non trouvé dans la liste'}), 404
         
         # Supprimer de la watchlist
+        added_at = watchlist_item.added_at
         db.session.delete(watchlist_item)
+        bump_interaction_version(user_id)
         db.session.commit()
+        forget_interaction(movie_id, 'watchlist', added_at)
         
         # CORRECTION: Invalider le cache après suppression
         if user_id in watchlist_cache:
             del watchlist_cache[user_id]
         
-        logger.info(f"✅ Film {movie_id} supprimé de la watchlist avec succès")
+        logger.info("✅ Film %s supprimé de la watchlist avec succès", movie_id)
         return jsonify({'message': 'Film supprimé de la liste avec succès', 'success': True}), 200
         
     except Exception as e:
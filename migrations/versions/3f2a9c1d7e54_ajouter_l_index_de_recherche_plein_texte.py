@@ -0,0 +1,40 @@
+"""ajouter l'index de recherche plein texte sur les films
+
+Revision ID: 3f2a9c1d7e54
+Revises: fd9c5cacb3a2
+Create Date: 2026-10-19 09:12:30.114205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e54'
+down_revision = 'fd9c5cacb3a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # tsvector + GIN uniquement sur PostgreSQL ; les autres bases utilisent
+    # l'index inversé en mémoire de services/search_service.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        ALTER TABLE movies ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(overview, '')), 'B')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX ix_movies_search_vector ON movies USING GIN (search_vector)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_movies_search_vector")
+    op.execute("ALTER TABLE movies DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,40 @@
+"""ajouter la table click_rollups
+
+Revision ID: 7d3e91f4a6b2
+Revises: e4a7b2c9d310
+Create Date: 2026-10-19 12:14:09.531872
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3e91f4a6b2'
+down_revision = 'e4a7b2c9d310'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('click_rollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('movie_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('click_count', sa.Integer(), nullable=False),
+        sa.Column('last_clicked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_click_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'movie_id')
+    )
+    with op.batch_alter_table('click_rollups', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_click_rollups_last_click_id'), ['last_click_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('click_rollups', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_click_rollups_last_click_id'))
+
+    op.drop_table('click_rollups')
@@ -0,0 +1,28 @@
+"""ajouter fetched_at aux films
+
+Revision ID: 9b41d0e6c2a8
+Revises: 3f2a9c1d7e54
+Create Date: 2026-10-19 10:02:47.531986
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b41d0e6c2a8'
+down_revision = '3f2a9c1d7e54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fetched_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_movies_fetched_at'), ['fetched_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_movies_fetched_at'))
+        batch_op.drop_column('fetched_at')
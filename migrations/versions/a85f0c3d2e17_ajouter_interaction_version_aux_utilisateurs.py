@@ -0,0 +1,26 @@
+"""ajouter interaction_version aux utilisateurs
+
+Revision ID: a85f0c3d2e17
+Revises: 7d3e91f4a6b2
+Create Date: 2026-10-19 13:02:51.118640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a85f0c3d2e17'
+down_revision = '7d3e91f4a6b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('interaction_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('interaction_version')
@@ -0,0 +1,35 @@
+"""marquer les clics cumulés au lieu d'un point de reprise sur l'ID
+
+Revision ID: b6d48e1f3a27
+Revises: a85f0c3d2e17
+Create Date: 2026-10-19 16:41:08.527193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d48e1f3a27'
+down_revision = 'a85f0c3d2e17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clicks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rolled_up', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    # Les clics sous l'ancien point de reprise sont déjà dans click_rollups
+    op.execute(
+        "UPDATE clicks SET rolled_up = TRUE "
+        "WHERE id <= (SELECT COALESCE(MAX(last_click_id), 0) FROM click_rollups)"
+    )
+    op.create_index('ix_clicks_pending_rollup', 'clicks', ['id'], unique=False,
+                    postgresql_where=sa.text('NOT rolled_up'))
+
+
+def downgrade():
+    op.drop_index('ix_clicks_pending_rollup', table_name='clicks')
+    with op.batch_alter_table('clicks', schema=None) as batch_op:
+        batch_op.drop_column('rolled_up')
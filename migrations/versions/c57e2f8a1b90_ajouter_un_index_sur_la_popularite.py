@@ -0,0 +1,26 @@
+"""ajouter un index sur la popularité des films
+
+Revision ID: c57e2f8a1b90
+Revises: 9b41d0e6c2a8
+Create Date: 2026-10-19 10:48:05.220417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c57e2f8a1b90'
+down_revision = '9b41d0e6c2a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_movies_popularity'), ['popularity'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_movies_popularity'))
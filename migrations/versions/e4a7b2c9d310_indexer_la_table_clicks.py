@@ -0,0 +1,40 @@
+"""indexer la table clicks pour l'ingestion par lots
+
+Revision ID: e4a7b2c9d310
+Revises: c57e2f8a1b90
+Create Date: 2026-10-19 11:32:47.904315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7b2c9d310'
+down_revision = 'c57e2f8a1b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # La table clicks n'a jamais été créée par une migration (seulement par db.create_all)
+    if not sa.inspect(op.get_bind()).has_table('clicks'):
+        op.create_table('clicks',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('movie_id', sa.Integer(), nullable=False),
+            sa.Column('clicked_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+            sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    with op.batch_alter_table('clicks', schema=None) as batch_op:
+        batch_op.create_index('ix_clicks_user_id_clicked_at', ['user_id', 'clicked_at'], unique=False)
+        batch_op.create_index('ix_clicks_movie_id_clicked_at', ['movie_id', 'clicked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clicks', schema=None) as batch_op:
+        batch_op.drop_index('ix_clicks_movie_id_clicked_at')
+        batch_op.drop_index('ix_clicks_user_id_clicked_at')
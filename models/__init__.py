@@ -4,6 +4,7 @@ from .user import User
 from .comment import Comment
 from .watchlist import Watchlist
 from .click import Click
+from .click_rollup import ClickRollup
 from .recommendation import Recommendation
 from .comment_like import CommentLike
 from .notification import Notification
@@ -10,6 +10,15 @@ class Click(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     movie_id = db.Column(db.Integer, db.ForeignKey('movies.id', ondelete='CASCADE'), nullable=False)
     clicked_at = db.Column(db.DateTime, default=func.now(), nullable=False)
+    # Déjà cumulé dans click_rollups (marqué dans la même transaction que l'agrégat)
+    rolled_up = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    
+    # Historique par utilisateur, agrégats par film sur une période, clics restant à cumuler
+    __table_args__ = (
+        db.Index('ix_clicks_user_id_clicked_at', 'user_id', 'clicked_at'),
+        db.Index('ix_clicks_movie_id_clicked_at', 'movie_id', 'clicked_at'),
+        db.Index('ix_clicks_pending_rollup', 'id', postgresql_where=db.text('NOT rolled_up')),
+    )
     
     # Relations
     user = relationship("User", backref="clicks")
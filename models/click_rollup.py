@@ -0,0 +1,25 @@
+from sqlalchemy import func
+from database.db import db
+
+class ClickRollup(db.Model):
+    """Agrégat des clics par (utilisateur, film), avec décroissance temporelle"""
+    __tablename__ = 'click_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False, default=0.0)  # Score décroissant, valable à updated_at
+    click_count = db.Column(db.Integer, nullable=False, default=0)
+    last_clicked_at = db.Column(db.DateTime, nullable=True)
+    last_click_id = db.Column(db.Integer, nullable=False, index=True)  # Dernier clic agrégé (information seulement)
+    updated_at = db.Column(db.DateTime, default=func.now(), nullable=False)
+    
+    def to_dict(self):
+        """Convertir un objet ClickRollup en dictionnaire."""
+        return {
+            'user_id': self.user_id,
+            'movie_id': self.movie_id,
+            'score': self.score,
+            'click_count': self.click_count,
+            'last_clicked_at': self.last_clicked_at,
+            'updated_at': self.updated_at,
+        }
@@ -11,8 +11,9 @@ class Movie(db.Model):
     overview = db.Column(db.Text, nullable=True)
     poster_path = db.Column(db.String(255), nullable=True)
     genres = db.Column(db.JSON, nullable=True)  # Stocké en JSON string
-    popularity = db.Column(db.Float, nullable=True)
+    popularity = db.Column(db.Float, nullable=True, index=True)
     release_date = db.Column(db.String(20), nullable=True)
+    fetched_at = db.Column(db.DateTime, nullable=True, index=True)  # Dernière synchronisation TMDB
 
     # Relations
     comments = db.relationship(
@@ -50,7 +51,7 @@ class Movie(db.Model):
             'title': self.title,
             'overview': self.overview,
             'poster_path': self.poster_path,
-            'genres': self.genres if isinstance(self.genres, list) else json.loads(self.genres),
+            'genres': genres,
             'popularity': self.popularity,
             'release_date': self.release_date,
 
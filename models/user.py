@@ -11,6 +11,8 @@ class User(db.Model):
     image = db.Column(db.String(255), nullable=True)
     firebase_uid = db.Column(db.String(128), unique=True, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Ajout du champ created_at
+    # Incrémenté à chaque like, ajout à la watchlist ou commentaire : invalide le cache de recommandations
+    interaction_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     def to_dict(self):
         """Convertir un objet User en dictionnaire."""
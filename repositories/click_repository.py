@@ -1,5 +1,13 @@
 from models.click import Click
+from models.click_rollup import ClickRollup
+from models.user import User
+from models.movie import Movie
 from database.db import db
+from sqlalchemy import false, text, tuple_
+from repositories.movie_repository import dialect_insert
+
+# Espace de noms des verrous consultatifs PostgreSQL du cumul des clics ('CL')
+CLICK_LOCK_NAMESPACE = 0x434C
 
 def add_click(user_id, movie_id):
     """
@@ -26,3 +34,124 @@ def get_clicks_by_movie(movie_id):
     Récupère tous les clics pour un film
     """
     return Click.query.filter_by(movie_id=movie_id).all()
+
+def bulk_insert_clicks(events):
+    """
+    Insère un lot de clics en une requête multi-lignes, puis commit.
+    
+    Les clics d'utilisateurs ou de films inconnus sont ignorés : un client ne
+    peut pas créer de films dans le catalogue en envoyant des clics.
+    
+    Args:
+        events: Liste de tuples (user_id, movie_id, clicked_at)
+        
+    Returns:
+        Nombre de clics écrits
+    """
+    if not events:
+        return 0
+    user_ids = {user_id for user_id, _, _ in events}
+    movie_ids = {movie_id for _, movie_id, _ in events}
+    known_users = {
+        user_id for (user_id,) in db.session.query(User.id).filter(User.id.in_(user_ids)).all()
+    }
+    known_movies = {
+        movie_id for (movie_id,) in db.session.query(Movie.id).filter(Movie.id.in_(movie_ids)).all()
+    }
+    rows = [
+        {'user_id': user_id, 'movie_id': movie_id, 'clicked_at': clicked_at}
+        for user_id, movie_id, clicked_at in events if user_id in known_users and movie_id in known_movies
+    ]
+    if rows:
+        # executemany : SQLAlchemy regroupe les lignes en INSERT ... VALUES multi-lignes
+        db.session.execute(Click.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+def get_pending_clicks(limit):
+    """
+    Clics pas encore cumulés, par ordre d'insertion.
+    
+    Un drapeau plutôt qu'un point de reprise sur l'ID : un clic validé en
+    retard par un autre worker, avec un ID inférieur aux clics déjà cumulés,
+    est repris au passage suivant au lieu d'être perdu.
+    
+    Returns:
+        Liste de tuples (id, user_id, movie_id, clicked_at)
+    """
+    return db.session.query(Click.id, Click.user_id, Click.movie_id, Click.clicked_at).filter(
+        Click.rolled_up == false()
+    ).order_by(Click.id).limit(limit).all()
+
+def mark_clicks_rolled_up(click_ids):
+    """Marque des clics comme cumulés, sans commit (même transaction que l'agrégat)."""
+    if not click_ids:
+        return 0
+    return db.session.query(Click).filter(Click.id.in_(click_ids)).update(
+        {Click.rolled_up: True}, synchronize_session=False
+    )
+
+def get_click_rollups(pairs):
+    """
+    Agrégats existants pour une liste de couples (user_id, movie_id).
+    
+    Returns:
+        Dictionnaire {(user_id, movie_id): ClickRollup}
+    """
+    if not pairs:
+        return {}
+    rows = ClickRollup.query.filter(
+        tuple_(ClickRollup.user_id, ClickRollup.movie_id).in_(list(pairs))
+    ).all()
+    return {(row.user_id, row.movie_id): row for row in rows}
+
+def upsert_click_rollups(rows):
+    """
+    Écrit un lot d'agrégats avec INSERT ... ON CONFLICT DO UPDATE, puis commit.
+    
+    Args:
+        rows: Liste de dictionnaires avec toutes les colonnes de click_rollups
+    """
+    if not rows:
+        db.session.commit()
+        return 0
+    insert = dialect_insert()
+    if insert is None:
+        for row in rows:
+            db.session.merge(ClickRollup(**row))
+        db.session.commit()
+        return len(rows)
+    
+    statement = insert(ClickRollup.__table__).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'movie_id'],
+        set_={column: statement.excluded[column] for column in rows[0] if column not in ('user_id', 'movie_id')}
+    )
+    db.session.execute(statement)
+    db.session.commit()
+    return len(rows)
+
+def get_all_click_rollups():
+    """
+    Tous les agrégats, pour l'entraînement du modèle collaboratif.
+    
+    Returns:
+        Liste de tuples (user_id, movie_id, score, updated_at)
+    """
+    return db.session.query(
+        ClickRollup.user_id, ClickRollup.movie_id, ClickRollup.score, ClickRollup.updated_at
+    ).all()
+
+def try_lock_click_rollup():
+    """
+    Verrou consultatif PostgreSQL non bloquant pour le cumul des clics, libéré au commit.
+    
+    Returns:
+        True si ce worker peut traiter le lot (toujours True hors PostgreSQL)
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return True
+    return bool(db.session.execute(
+        text("SELECT pg_try_advisory_xact_lock(:namespace, 0)"),
+        {'namespace': CLICK_LOCK_NAMESPACE}
+    ).scalar())
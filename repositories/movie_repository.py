@@ -1,6 +1,10 @@
 from models.movie import Movie
 from database.db import db
 from datetime import datetime
+from sqlalchemy import text
+
+# Espace de noms des verrous consultatifs PostgreSQL posés sur les films ('MO' en ASCII)
+MOVIE_LOCK_NAMESPACE = 0x4D4F
 
 def get_all_movies():
     """
@@ -54,6 +58,160 @@ def create_movie(id, title, overview, poster_path, genres, popularity, release_d
         db.session.rollback()
         return None
 
+def insert_movie_if_absent(id, title, overview=None, poster_path=None, genres=None, popularity=None, release_date=None, fetched_at=None):
+    """
+    Insère un film avec INSERT ... ON CONFLICT (id) DO NOTHING, sans commit.
+    
+    Sûr face aux insertions concurrentes d'autres requêtes ou workers : le
+    perdant ne lève pas d'IntegrityError et la transaction reste utilisable.
+    
+    Returns:
+        True si la ligne a été insérée, False si elle existait déjà
+    """
+    values = {
+        'id': id,
+        'title': title,
+        'overview': overview,
+        'poster_path': poster_path,
+        'genres': genres,
+        'popularity': popularity,
+        'release_date': release_date,
+        'fetched_at': fetched_at
+    }
+    insert = dialect_insert()
+    if insert is None:
+        # Dialecte sans ON CONFLICT : vérification préalable (non atomique)
+        if Movie.query.get(id):
+            return False
+        db.session.add(Movie(**values))
+        db.session.flush()
+        return True
+    
+    statement = insert(Movie.__table__).values(**values).on_conflict_do_nothing(index_elements=['id'])
+    result = db.session.execute(statement)
+    if result.rowcount == 1:
+        track_written_movies([id])
+        return True
+    return False
+
+def bulk_upsert_movies(records):
+    """
+    Insère ou met à jour un lot de films en une requête multi-lignes, puis commit.
+    
+    Utilise INSERT ... ON CONFLICT (id) DO UPDATE sur PostgreSQL et SQLite.
+    
+    Args:
+        records: Liste de dictionnaires contenant au moins 'id' et 'title'
+        
+    Returns:
+        Nombre de films écrits
+    """
+    if not records:
+        return 0
+    insert = dialect_insert()
+    if insert is None:
+        for record in records:
+            db.session.merge(Movie(**record))
+        db.session.commit()
+        return len(records)
+    
+    statement = insert(Movie.__table__).values(records)
+    updated_columns = {
+        column: statement.excluded[column]
+        for column in records[0] if column != 'id'
+    }
+    statement = statement.on_conflict_do_update(index_elements=['id'], set_=updated_columns)
+    db.session.execute(statement)
+    track_written_movies([record['id'] for record in records])
+    db.session.commit()
+    return len(records)
+
+def track_written_movies(movie_ids):
+    """
+    Note les films écrits par une requête Core (hors événements ORM) dans la
+    session : services/search_service les réindexe après le commit.
+    """
+    db.session.info.setdefault('written_movie_ids', set()).update(movie_ids)
+
+def get_stale_movie_ids(stale_before, limit, exclude_ids=()):
+    """
+    Films à resynchroniser avec TMDB, par priorité.
+    
+    D'abord ceux jamais synchronisés (fetched_at NULL, ex. les films créés
+    par un like), puis les plus populaires, puis les plus anciens.
+    
+    Returns:
+        Liste d'IDs de films
+    """
+    query = db.session.query(Movie.id).filter(
+        (Movie.fetched_at.is_(None)) | (Movie.fetched_at < stale_before)
+    )
+    if exclude_ids:
+        query = query.filter(~Movie.id.in_(list(exclude_ids)))
+    rows = query.order_by(
+        Movie.fetched_at.is_(None).desc(),
+        Movie.popularity.desc(),
+        Movie.fetched_at.asc()
+    ).limit(limit).all()
+    return [movie_id for (movie_id,) in rows]
+
+def mark_movies_fetched(movie_ids, fetched_at):
+    """Met à jour fetched_at sans toucher aux autres colonnes, sans commit."""
+    if movie_ids:
+        Movie.query.filter(Movie.id.in_(list(movie_ids))).update(
+            {'fetched_at': fetched_at}, synchronize_session=False
+        )
+
+def try_lock_movie_refresh():
+    """
+    Verrou consultatif PostgreSQL non bloquant pour le rafraîchissement, libéré au commit.
+    
+    Returns:
+        True si ce worker peut traiter le lot (toujours True hors PostgreSQL)
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return True
+    return bool(db.session.execute(
+        text("SELECT pg_try_advisory_xact_lock(:namespace, 0)"),
+        {'namespace': MOVIE_LOCK_NAMESPACE}
+    ).scalar())
+
+def get_existing_movie_ids(movie_ids):
+    """
+    Filtre une liste d'IDs en ne gardant que ceux présents en base.
+    
+    Returns:
+        Ensemble des IDs existants
+    """
+    if not movie_ids:
+        return set()
+    rows = db.session.query(Movie.id).filter(Movie.id.in_(list(movie_ids))).all()
+    return {movie_id for (movie_id,) in rows}
+
+def lock_movie_id(movie_id):
+    """
+    Verrou consultatif PostgreSQL sur un ID de film, libéré au commit/rollback.
+    
+    Sérialise la création d'un même film entre les workers gunicorn ; sans
+    effet sur les autres bases.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :movie_id)"),
+            {'namespace': MOVIE_LOCK_NAMESPACE, 'movie_id': movie_id}
+        )
+
+def dialect_insert():
+    """Retourne la construction insert du dialecte courant supportant ON CONFLICT, ou None."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
 def update_movie(movie_id, title, overview, poster_path, genres, popularity, release_date):
 
     movie = Movie.query.get(movie_id)
@@ -72,4 +230,74 @@ def delete_movie(movie_id):
     if movie:
         db.session.delete(movie)
         db.session.commit()
-    return movie
\ No newline at end of file
+    return movie
+
+def search_movies_fulltext(terms, limit=20, offset=0):
+    """
+    Recherche plein texte PostgreSQL sur le titre et le résumé des films.
+    
+    S'appuie sur la colonne générée movies.search_vector et son index GIN
+    (voir la migration 3f2a9c1d7e54). Le dernier terme est recherché en
+    préfixe pour permettre la saisie incrémentale.
+    
+    Args:
+        terms: Liste de termes déjà normalisés
+        limit: Nombre maximum de résultats
+        offset: Décalage pour la pagination
+        
+    Returns:
+        Tuple (liste de (movie_id, rang), nombre total de résultats)
+    """
+    tsquery = _build_tsquery(terms)
+    rows = db.session.execute(text("""
+        SELECT id, ts_rank_cd(search_vector, query) AS rank, count(*) OVER () AS total
+        FROM movies, to_tsquery('simple', :tsquery) AS query
+        WHERE search_vector @@ query
+        ORDER BY rank DESC, popularity DESC NULLS LAST, id
+        LIMIT :limit OFFSET :offset
+    """), {'tsquery': tsquery, 'limit': limit, 'offset': offset}).fetchall()
+    
+    total = rows[0].total if rows else 0
+    return [(row.id, float(row.rank)) for row in rows], total
+
+def suggest_movie_titles(terms, limit=8):
+    """
+    Autocomplétion PostgreSQL : films dont le titre contient tous les termes en préfixe.
+    
+    Args:
+        terms: Liste de termes déjà normalisés
+        limit: Nombre maximum de suggestions
+        
+    Returns:
+        Liste de tuples (movie_id, title)
+    """
+    # Le label :*A restreint la correspondance aux lexèmes du titre (poids A)
+    tsquery = ' & '.join(f"{term}:*A" for term in terms)
+    rows = db.session.execute(text("""
+        SELECT id, title
+        FROM movies
+        WHERE search_vector @@ to_tsquery('simple', :tsquery)
+        ORDER BY popularity DESC NULLS LAST, id
+        LIMIT :limit
+    """), {'tsquery': tsquery, 'limit': limit}).fetchall()
+    return [(row.id, row.title) for row in rows]
+
+def get_movies_by_ids(movie_ids):
+    """
+    Récupère plusieurs films en une seule requête en conservant l'ordre demandé.
+    
+    Args:
+        movie_ids: Liste d'IDs de films
+        
+    Returns:
+        Liste des objets Movie trouvés, dans l'ordre de movie_ids
+    """
+    if not movie_ids:
+        return []
+    movies_by_id = {movie.id: movie for movie in Movie.query.filter(Movie.id.in_(movie_ids)).all()}
+    return [movies_by_id[movie_id] for movie_id in movie_ids if movie_id in movies_by_id]
+
+def _build_tsquery(terms):
+    """Construit une tsquery ET où seul le dernier terme est un préfixe."""
+    parts = list(terms[:-1]) + [f"{terms[-1]}:*"]
+    return ' & '.join(parts)
@@ -8,3 +8,20 @@ def get_or_create_user(email):
         db.session.add(user)
         db.session.commit()
     return user
+
+def bump_interaction_version(*user_ids):
+    """
+    Incrémente interaction_version des utilisateurs, sans commit.
+    
+    À appeler dans la transaction de l'écriture (like, watchlist, commentaire)
+    pour que la nouvelle version soit visible en même temps que l'interaction.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        User.query.filter(User.id.in_(user_ids)).update(
+            {User.interaction_version: User.interaction_version + 1}, synchronize_session=False
+        )
+
+def get_interaction_version(user_id):
+    """Version courante des interactions d'un utilisateur (None si l'utilisateur n'existe pas)."""
+    return db.session.query(User.interaction_version).filter(User.id == user_id).scalar()
@@ -0,0 +1,90 @@
+"""
+Mesure du rappel@K et de la latence des index ANN contre la recherche exacte
+
+Exemples :
+    python scripts/benchmark_ann_index.py --random 20000 --dim 64
+    python scripts/benchmark_ann_index.py --backends hnsw hnswlib -k 20
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+import numpy as np
+
+# Ajouter le répertoire parent au path pour pouvoir importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare les index ANN à la recherche exacte")
+    parser.add_argument('--random', type=int, default=0,
+                        help="Utiliser N vecteurs aléatoires groupés au lieu des films en base")
+    parser.add_argument('--dim', type=int, default=64, help="Dimension des vecteurs aléatoires")
+    parser.add_argument('--backends', nargs='*', default=['hnsw', 'hnswlib'],
+                        choices=['hnsw', 'hnswlib'], help="Index approchés à évaluer")
+    parser.add_argument('-k', type=int, default=10, help="Nombre de voisins")
+    parser.add_argument('--queries', type=int, default=200, help="Nombre de requêtes")
+    return parser.parse_args()
+
+
+def random_vectors(count, dim, seed=42):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(count // 100, 1), dim))
+    return centers[rng.integers(0, len(centers), count)] + 0.3 * rng.normal(size=(count, dim))
+
+
+def content_vectors():
+    """Embeddings de contenu des films, construits comme par RecommendationService."""
+    from app import app
+    from services.recommendation_service import recommendation_service
+
+    with app.app_context():
+        recommendation_service.train_content_based_model()
+    index = recommendation_service.content_based_model
+    ids = recommendation_service.movie_ids
+    return ids, np.vstack([index.vector(movie_id) for movie_id in ids])
+
+
+def measure_latency(index, queries, k):
+    started = time.perf_counter()
+    for query in queries:
+        index.search(query, k)
+    return (time.perf_counter() - started) * 1000 / len(queries)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    from services.ann_index import build_index, recall_at_k, hnswlib
+
+    if args.random:
+        vectors = random_vectors(args.random, args.dim)
+        ids = list(range(len(vectors)))
+    else:
+        ids, vectors = content_vectors()
+
+    rng = np.random.default_rng(7)
+    queries = vectors[rng.integers(0, len(vectors), min(args.queries, len(vectors)))]
+    queries = queries + 0.05 * rng.normal(size=queries.shape)
+
+    print("🧭 ÉVALUATION DES INDEX ANN")
+    print("=" * 40)
+
+    exact = build_index(ids, vectors, backend='exact')
+    report = {'vectors': len(ids), 'k': args.k, 'exact_ms_per_query': round(measure_latency(exact, queries, args.k), 3)}
+
+    for backend in args.backends:
+        if backend == 'hnswlib' and hnswlib is None:
+            print(f"⚠️ {backend} non installé, ignoré")
+            continue
+        started = time.perf_counter()
+        index = build_index(ids, vectors, backend=backend)
+        report[backend] = {
+            'build_seconds': round(time.perf_counter() - started, 2),
+            'recall_at_k': round(recall_at_k(index, exact, queries, args.k), 4),
+            'ms_per_query': round(measure_latency(index, queries, args.k), 3)
+        }
+
+    print(json.dumps(report, indent=2))
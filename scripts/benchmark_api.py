@@ -0,0 +1,262 @@
+"""
+Banc de charge HTTP des endpoints chauds de l'API (débit et latence de queue)
+
+L'application est démarrée dans un serveur werkzeug multithreadé, contre
+la base indiquée (typiquement celle de scripts/generate_synthetic_data.py),
+puis des clients concurrents interrogent chaque endpoint pendant une durée
+fixe. Pour chaque endpoint : requêtes/s, p50 / p95 / p99, taux d'erreur,
+nombre moyen de requêtes SQL et temps en base par requête HTTP (lus dans
+l'en-tête Server-Timing posé par utils/query_profiler).
+
+Le rapport JSON peut servir de référence : avec --baseline, chaque mesure
+est comparée à la référence et le script sort en erreur au-delà de la
+tolérance (--tolerance), ce qui fait apparaître les régressions (N+1, cache
+cassé...) avant la production.
+
+Exemples :
+    python scripts/benchmark_api.py --database sqlite:///synthetic.db --output baseline.json
+    python scripts/benchmark_api.py --database sqlite:///synthetic.db --baseline baseline.json
+    python scripts/benchmark_api.py --url http://localhost:8000 --database $DATABASE_URL --endpoints comments stats
+"""
+
+import sys
+import os
+import argparse
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajouter le répertoire parent au path pour pouvoir importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Endpoints mesurés : les IDs sont tirés à tour de rôle parmi les utilisateurs / films les plus actifs
+ENDPOINTS = {
+    'comments': '/api/movies/{movie_id}/comments/',
+    'stats': '/api/users/{user_id}/stats',
+    'watchlist': '/api/users/{user_id}/watchlist/',
+    'notifications': '/api/notifications/user/{user_id}',
+    'recommendations': '/api/recommendations/user/{user_id}',
+    'movies': '/api/movies/'
+}
+# Métrique db de l'en-tête Server-Timing : db;dur=12.3;desc="7 queries"
+SERVER_TIMING_DB = re.compile(r'db;dur=(?P<dur>[\d.]+);desc="(?P<queries>\d+) queries"')
+# Mesures comparées à la référence : (clé, une hausse est-elle une régression ?)
+COMPARED_METRICS = (('rps', False), ('p50_ms', True), ('p95_ms', True), ('p99_ms', True),
+                    ('queries_per_request', True), ('db_ms_per_request', True))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mesure le débit et la latence des endpoints chauds")
+    parser.add_argument('--database', default=os.getenv('DATABASE_URL'),
+                        help="URL SQLAlchemy de la base (DATABASE_URL par défaut)")
+    parser.add_argument('--url', default=None,
+                        help="Serveur déjà démarré (gunicorn...) au lieu du serveur embarqué")
+    parser.add_argument('--endpoints', nargs='*', default=list(ENDPOINTS), choices=list(ENDPOINTS),
+                        help="Endpoints à mesurer")
+    parser.add_argument('--concurrency', type=int, default=8, help="Clients simultanés")
+    parser.add_argument('--duration', type=float, default=10, help="Durée de mesure par endpoint (secondes)")
+    parser.add_argument('--warmup', type=int, default=20, help="Requêtes de chauffe par endpoint (non mesurées)")
+    parser.add_argument('--sample-ids', type=int, default=50, help="Nombre d'utilisateurs / films interrogés")
+    parser.add_argument('--baseline', default=None, help="Rapport JSON de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Écart relatif toléré avant de signaler une régression")
+    parser.add_argument('--output', default=None, help="Écrire le rapport JSON dans ce fichier")
+    return parser.parse_args()
+
+
+def sample_ids(database_url, count):
+    """Utilisateurs et films les plus actifs : ce sont eux qui chargent la production."""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        user_ids = [row[0] for row in conn.execute(text(
+            "SELECT user_id FROM likes GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT :limit"
+        ), {'limit': count})]
+        movie_ids = [row[0] for row in conn.execute(text(
+            "SELECT movie_id FROM comments GROUP BY movie_id ORDER BY COUNT(*) DESC LIMIT :limit"
+        ), {'limit': count})]
+        if not user_ids:
+            user_ids = [row[0] for row in conn.execute(text("SELECT id FROM users LIMIT :limit"), {'limit': count})]
+        if not movie_ids:
+            movie_ids = [row[0] for row in conn.execute(text("SELECT id FROM movies LIMIT :limit"), {'limit': count})]
+    engine.dispose()
+    if not user_ids or not movie_ids:
+        raise SystemExit("❌ Base vide : lancer d'abord scripts/generate_synthetic_data.py")
+    return user_ids, movie_ids
+
+
+def parse_server_timing(header):
+    """Nombre de requêtes SQL et temps en base depuis l'en-tête Server-Timing de utils/query_profiler."""
+    match = SERVER_TIMING_DB.search(header or '')
+    if not match:
+        return None, None
+    return int(match.group('queries')), float(match.group('dur'))
+
+
+def start_server(database_url):
+    """Démarre l'application sur un port libre dans un thread ; retourne son URL."""
+    os.environ['DATABASE_URL'] = database_url
+    # Le banc mesure le service, pas les protections anti-abus
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    os.environ.setdefault('LOOP_DETECTION_ENABLED', '0')
+
+    import logging
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='benchmark-server', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(round(q / 100 * (len(values) - 1))), len(values) - 1)]
+
+
+def run_endpoint(base_url, template, user_ids, movie_ids, concurrency, duration, warmup):
+    """Lance `concurrency` clients pendant `duration` secondes sur un endpoint."""
+    import requests
+
+    counter = iter(range(10 ** 12))
+    counter_lock = threading.Lock()
+
+    def next_url():
+        with counter_lock:
+            n = next(counter)
+        return base_url + template.format(user_id=user_ids[n % len(user_ids)], movie_id=movie_ids[n % len(movie_ids)])
+
+    with requests.Session() as session:
+        for _ in range(warmup):
+            session.get(next_url(), timeout=30)
+
+    def client(deadline):
+        latencies, queries, db_times, statuses = [], [], [], defaultdict(int)
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                url = next_url()
+                started = time.perf_counter()
+                try:
+                    response = session.get(url, timeout=30)
+                    status = response.status_code
+                    count, db_ms = parse_server_timing(response.headers.get('Server-Timing'))
+                    if count is not None:
+                        queries.append(count)
+                        db_times.append(db_ms)
+                except requests.RequestException:
+                    status = 'exception'
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] += 1
+        return latencies, queries, db_times, statuses
+
+    started = time.perf_counter()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(client, [deadline] * concurrency))
+    elapsed = time.perf_counter() - started
+
+    latencies = [value for result in results for value in result[0]]
+    queries = [value for result in results for value in result[1]]
+    db_times = [value for result in results for value in result[2]]
+    statuses = defaultdict(int)
+    for result in results:
+        for status, count in result[3].items():
+            statuses[str(status)] += count
+    errors = sum(count for status, count in statuses.items() if not status.startswith('2'))
+
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'error_rate': round(errors / max(len(latencies), 1), 4),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies, default=0.0), 2),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'db_ms_per_request': round(sum(db_times) / len(db_times), 2) if db_times else None,
+        'statuses': dict(statuses)
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Écarts relatifs par rapport à la référence ; retourne la liste des régressions."""
+    regressions = []
+    print(f"\n📊 Comparaison avec la référence (tolérance {tolerance:.0%})")
+    for name, metrics in report['endpoints'].items():
+        reference = baseline.get('endpoints', {}).get(name)
+        if not reference:
+            print(f"   {name}: absent de la référence")
+            continue
+        deltas = []
+        for key, higher_is_worse in COMPARED_METRICS:
+            current, previous = metrics.get(key), reference.get(key)
+            if current is None or not previous:
+                continue
+            delta = (current - previous) / previous
+            worse = delta > tolerance if higher_is_worse else delta < -tolerance
+            deltas.append(f"{key} {previous} → {current} ({delta:+.0%}){' ❌' if worse else ''}")
+            if worse:
+                regressions.append(f"{name}.{key}")
+        print(f"   {name}: " + ', '.join(deltas))
+    return regressions
+
+
+def print_report(report):
+    columns = ['rps', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate', 'queries_per_request', 'db_ms_per_request']
+    print(f"{'endpoint':<17}" + ''.join(f"{column:>21}" for column in columns))
+    for name, metrics in report['endpoints'].items():
+        print(f"{name:<17}" + ''.join(f"{str(metrics[column]):>21}" for column in columns))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not args.database:
+        raise SystemExit("❌ Base manquante (--database ou DATABASE_URL)")
+
+    print("🏋️ BANC DE CHARGE DE L'API")
+    print("=" * 40)
+
+    user_ids, movie_ids = sample_ids(args.database, args.sample_ids)
+    server = None
+    base_url = args.url
+    if not base_url:
+        base_url, server = start_server(args.database)
+    print(f"🌐 Serveur: {base_url}, {args.concurrency} clients, {args.duration:.0f}s par endpoint")
+
+    report = {
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'database': args.database.split('://')[0],
+        'endpoints': {}
+    }
+    for name in args.endpoints:
+        print(f"⏱️ {name}...")
+        report['endpoints'][name] = run_endpoint(
+            base_url, ENDPOINTS[name], user_ids, movie_ids, args.concurrency, args.duration, args.warmup
+        )
+
+    if server:
+        server.shutdown()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Rapport écrit dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ Régressions: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ Aucune régression")
@@ -0,0 +1,248 @@
+"""
+Évaluation hors ligne des modèles de recommandation (qualité et performance)
+
+Les interactions de la base source sont rejouées dans une base SQLite de
+substitution avec un découpage temporel : tout ce qui précède la date de
+coupure sert à l'entraînement, les likes / ajouts à la watchlist /
+commentaires postérieurs servent de vérité terrain.
+
+Pour chaque modèle (contenu, collaboratif, hybride, popularité) :
+precision@K, recall@K, NDCG@K, temps d'entraînement, pic mémoire
+(tracemalloc) et latence p50 / p99 par requête.
+
+Exemples :
+    python scripts/evaluate_recommenders.py
+    python scripts/evaluate_recommenders.py --source sqlite:///synthetic.db -k 20 --test-fraction 0.1
+    python scripts/evaluate_recommenders.py --models hybrid collaborative --output eval.json
+"""
+
+import sys
+import os
+import argparse
+import json
+import math
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+# Ajouter le répertoire parent au path pour pouvoir importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODELS = ('content', 'collaborative', 'hybrid', 'popularity')
+
+# Tables copiées telles quelles, puis tables d'interactions découpées sur leur colonne de date
+STATIC_TABLES = ('users', 'movies')
+INTERACTION_TABLES = {
+    'likes': 'created_at',
+    'watchlists': 'added_at',
+    'comments': 'created_at',
+    'clicks': 'clicked_at'
+}
+# Interactions qui comptent comme pertinentes dans la période de test
+RELEVANT_TABLES = ('likes', 'watchlists', 'comments')
+COPY_BATCH_SIZE = 5000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Évalue les modèles de recommandation hors ligne")
+    parser.add_argument('--source', default=os.getenv('DATABASE_URL'),
+                        help="URL SQLAlchemy de la base à rejouer (DATABASE_URL par défaut)")
+    parser.add_argument('--models', nargs='*', default=list(MODELS), choices=MODELS, help="Modèles à évaluer")
+    parser.add_argument('-k', type=int, default=10, help="Taille des listes évaluées")
+    parser.add_argument('--test-fraction', type=float, default=0.2,
+                        help="Part la plus récente des interactions réservée au test")
+    parser.add_argument('--max-users', type=int, default=500, help="Nombre maximum d'utilisateurs évalués")
+    parser.add_argument('--standin', default=None,
+                        help="Fichier SQLite de substitution (temporaire par défaut)")
+    parser.add_argument('--output', default=None, help="Écrire le rapport JSON dans ce fichier")
+    return parser.parse_args()
+
+
+def create_standin_app(path):
+    """Application Flask minimale liée à la base SQLite de substitution."""
+    from flask import Flask
+    from database.db import db
+    import models  # noqa: F401  (enregistre toutes les tables dans les métadonnées)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def compute_cutoff(source, tables, test_fraction):
+    """Date de coupure : quantile (1 - test_fraction) des dates d'interactions explicites."""
+    from sqlalchemy import select
+
+    timestamps = []
+    with source.connect() as conn:
+        for name in RELEVANT_TABLES:
+            column = tables[name].c[INTERACTION_TABLES[name]]
+            timestamps.extend(value for (value,) in conn.execute(select(column)) if value is not None)
+    if not timestamps:
+        raise SystemExit("❌ Aucune interaction datée dans la base source")
+    timestamps.sort()
+    return timestamps[min(int(len(timestamps) * (1 - test_fraction)), len(timestamps) - 1)]
+
+
+def replay(source, target, tables, cutoff):
+    """
+    Copie la base source dans la base de substitution, interactions antérieures à la coupure uniquement.
+
+    Returns:
+        Vérité terrain {user_id: ensemble de films} de la période de test
+    """
+    from sqlalchemy import select
+
+    ground_truth = defaultdict(set)
+    with source.connect() as reader, target.begin() as writer:
+        for name in STATIC_TABLES + tuple(INTERACTION_TABLES):
+            table = tables[name]
+            column = INTERACTION_TABLES.get(name)
+            batch = []
+            for row in reader.execution_options(stream_results=True).execute(select(table)):
+                row = dict(row._mapping)
+                if column and row[column] is not None and row[column] >= cutoff:
+                    if name in RELEVANT_TABLES:
+                        ground_truth[row['user_id']].add(row['movie_id'])
+                    continue
+                batch.append(row)
+                if len(batch) >= COPY_BATCH_SIZE:
+                    writer.execute(table.insert(), batch)
+                    batch = []
+            if batch:
+                writer.execute(table.insert(), batch)
+    return ground_truth
+
+
+def precision_recall_ndcg(recommended, relevant, k):
+    hits = [1.0 if movie_id in relevant else 0.0 for movie_id in recommended[:k]]
+    dcg = sum(hit / math.log2(rank + 2) for rank, hit in enumerate(hits))
+    ideal = sum(1.0 / math.log2(rank + 2) for rank in range(min(len(relevant), k)))
+    return sum(hits) / k, sum(hits) / len(relevant), dcg / ideal if ideal else 0.0
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(round(q / 100 * (len(values) - 1))), len(values) - 1)]
+
+
+def measure(fn):
+    """Exécute fn en mesurant la durée et le pic d'allocations Python/NumPy."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def evaluate_model(name, service, users, ground_truth, histories, k):
+    recommenders = {
+        'content': lambda user_id: service.get_content_based_recommendations(list(histories[user_id]), k)
+        if histories[user_id] else [],
+        'collaborative': lambda user_id: service.get_collaborative_recommendations(user_id, k),
+        'hybrid': lambda user_id: service.get_hybrid_recommendations(user_id, k),
+        'popularity': lambda user_id: [
+            movie_id for movie_id in service.get_popularity_recommendations(k + len(histories[user_id]))
+            if movie_id not in histories[user_id]
+        ][:k]
+    }
+    trainers = {
+        'content': service.train_content_based_model,
+        'collaborative': service.train_collaborative_model,
+        'hybrid': lambda: service.train_content_based_model() and service.train_collaborative_model(),
+        'popularity': lambda: True
+    }
+
+    _, train_seconds, train_peak = measure(trainers[name])
+
+    latencies = []
+    totals = defaultdict(float)
+    covered = 0
+    for user_id in users:
+        started = time.perf_counter()
+        recommended = recommenders[name](user_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if recommended:
+            covered += 1
+        precision, recall, ndcg = precision_recall_ndcg(recommended, ground_truth[user_id], k)
+        totals['precision'] += precision
+        totals['recall'] += recall
+        totals['ndcg'] += ndcg
+
+    count = max(len(users), 1)
+    return {
+        f'precision@{k}': round(totals['precision'] / count, 4),
+        f'recall@{k}': round(totals['recall'] / count, 4),
+        f'ndcg@{k}': round(totals['ndcg'] / count, 4),
+        'coverage': round(covered / count, 4),
+        'train_seconds': round(train_seconds, 3),
+        'train_peak_mb': round(train_peak / 1024 / 1024, 2),
+        'latency_p50_ms': round(percentile(latencies, 50), 3),
+        'latency_p99_ms': round(percentile(latencies, 99), 3)
+    }
+
+
+def print_report(report, k):
+    columns = [f'precision@{k}', f'recall@{k}', f'ndcg@{k}', 'coverage',
+               'train_seconds', 'train_peak_mb', 'latency_p50_ms', 'latency_p99_ms']
+    print(f"{'modèle':<15}" + ''.join(f"{column:>16}" for column in columns))
+    for name, metrics in report['models'].items():
+        print(f"{name:<15}" + ''.join(f"{metrics[column]:>16}" for column in columns))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not args.source:
+        raise SystemExit("❌ Base source manquante (--source ou DATABASE_URL)")
+
+    from sqlalchemy import create_engine
+    from database.db import db
+
+    standin_path = args.standin or os.path.join(tempfile.mkdtemp(), 'evaluation.db')
+    app = create_standin_app(standin_path)
+
+    print("📏 ÉVALUATION DES MODÈLES DE RECOMMANDATION")
+    print("=" * 40)
+
+    source = create_engine(args.source)
+    tables = db.metadata.tables
+    cutoff = compute_cutoff(source, tables, args.test_fraction)
+    print(f"✂️ Coupure temporelle: {cutoff}")
+
+    with app.app_context():
+        ground_truth = replay(source, db.engine, tables, cutoff)
+
+        from services.recommendation_service import RecommendationService
+        from services.click_rollup_service import click_rollup_job
+
+        click_rollup_job.run_once()
+        service = RecommendationService(index_dir=None)
+        users = sorted(ground_truth)[:args.max_users]
+        histories = {user_id: service.get_user_history(user_id) for user_id in users}
+        # Seuls les films inédits pour l'utilisateur comptent comme pertinents
+        for user_id in users:
+            ground_truth[user_id] -= histories[user_id]
+        users = [user_id for user_id in users if ground_truth[user_id]]
+        print(f"👥 {len(users)} utilisateurs évalués (base de substitution: {standin_path})")
+
+        report = {'cutoff': str(cutoff), 'k': args.k, 'users': len(users), 'models': {}}
+        for name in args.models:
+            report['models'][name] = evaluate_model(name, service, users, ground_truth, histories, args.k)
+        db.session.remove()
+
+    print_report(report, args.k)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Rapport écrit dans {args.output}")
@@ -0,0 +1,399 @@
+"""
+Générateur de données synthétiques pour les tests de charge et de passage à l'échelle
+
+Crée N utilisateurs, M films (genres TMDB, titres et synopsis par genre) et
+des interactions à distribution en loi de puissance : quelques films
+concentrent l'essentiel des likes / watchlists / clics, et quelques
+utilisateurs très actifs côtoient une longue traîne de comptes peu actifs.
+Les réponses, likes de commentaires et notifications suivent les
+commentaires générés.
+
+Le chargement passe par COPY sur PostgreSQL et par executemany ailleurs
+(SQLite) ; les IDs reprennent après le maximum existant, on peut donc
+relancer le script pour ajouter un lot.
+
+Exemples :
+    python scripts/generate_synthetic_data.py --users 10000 --movies 5000
+    python scripts/generate_synthetic_data.py --database sqlite:///synthetic.db --create-tables --users 100000
+    python scripts/generate_synthetic_data.py --users 1000000 --movies 50000 --likes-per-user 30
+"""
+
+import sys
+import os
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime
+import numpy as np
+
+# Ajouter le répertoire parent au path pour pouvoir importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Vocabulaire par genre (noms TMDB en fr-FR) : les synopsis d'un même genre se ressemblent,
+# ce qui donne du signal au modèle de contenu
+GENRES = {
+    'Action': ['poursuite', 'explosion', 'mercenaire', 'commando', 'vengeance', 'otage'],
+    'Aventure': ['expédition', 'trésor', 'jungle', 'carte', 'île', 'quête'],
+    'Animation': ['dragon', 'royaume', 'magie', 'jouet', 'forêt', 'amitié'],
+    'Comédie': ['quiproquo', 'mariage', 'colocation', 'vacances', 'famille', 'gaffe'],
+    'Crime': ['braquage', 'enquête', 'mafia', 'inspecteur', 'trafic', 'témoin'],
+    'Documentaire': ['histoire', 'nature', 'archives', 'témoignage', 'planète', 'société'],
+    'Drame': ['deuil', 'secret', 'exil', 'réconciliation', 'maladie', 'héritage'],
+    'Fantastique': ['sorcier', 'malédiction', 'prophétie', 'portail', 'créature', 'élu'],
+    'Horreur': ['possession', 'manoir', 'démon', 'cri', 'sang', 'rituel'],
+    'Romance': ['coup de foudre', 'lettre', 'rencontre', 'passion', 'séparation', 'promesse'],
+    'Science-Fiction': ['vaisseau', 'planète', 'androïde', 'futur', 'voyage temporel', 'colonie'],
+    'Thriller': ['complot', 'traque', 'disparition', 'espion', 'chantage', 'suspect'],
+    'Guerre': ['front', 'résistance', 'soldat', 'tranchée', 'libération', 'bataillon'],
+    'Western': ['shérif', 'ranch', 'diligence', 'duel', 'frontière', 'chercheur d\'or']
+}
+TITLE_WORDS = ['Dernier', 'Secret', 'Ombre', 'Nuit', 'Retour', 'Royaume', 'Silence', 'Horizon',
+               'Cœur', 'Mémoire', 'Tempête', 'Promesse', 'Frontière', 'Lumière', 'Piège', 'Voyage']
+FIRST_NAMES = ['Camille', 'Lucas', 'Emma', 'Hugo', 'Léa', 'Louis', 'Chloé', 'Nathan', 'Inès', 'Jules',
+               'Manon', 'Adam', 'Sarah', 'Yanis', 'Jade', 'Amine', 'Lina', 'Théo', 'Zoé', 'Karim']
+LAST_NAMES = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy',
+              'Moreau', 'Simon', 'Laurent', 'Lefebvre', 'Michel', 'Garcia', 'Benali', 'Nguyen', 'Diallo']
+COMMENT_TEMPLATES = ['Un {} inoubliable.', 'Trop de {} à mon goût.', 'Le {} m\'a scotché.',
+                     'Scénario prévisible mais le {} fonctionne.', 'Ce {} méritait mieux.', 'Du grand {} !']
+REPLY_TEMPLATES = ['Tout à fait d\'accord.', 'Pas du tout mon avis.', 'Tu l\'as vu en VO ?',
+                   'La fin m\'a surpris aussi.', 'Je le reverrai volontiers.']
+
+# Tables dans l'ordre de chargement (clés étrangères)
+LOAD_ORDER = ('users', 'movies', 'likes', 'watchlists', 'clicks', 'comments', 'comment_likes', 'notifications')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Génère un jeu de données synthétique en loi de puissance")
+    parser.add_argument('--database', default=os.getenv('DATABASE_URL'),
+                        help="URL SQLAlchemy de la base cible (DATABASE_URL par défaut)")
+    parser.add_argument('--create-tables', action='store_true',
+                        help="Créer les tables manquantes (base vierge, hors migrations Alembic)")
+    parser.add_argument('--users', type=int, default=10000, help="Nombre d'utilisateurs")
+    parser.add_argument('--movies', type=int, default=5000, help="Nombre de films")
+    parser.add_argument('--likes-per-user', type=float, default=20, help="Likes moyens par utilisateur")
+    parser.add_argument('--watchlist-per-user', type=float, default=8, help="Ajouts moyens à la watchlist")
+    parser.add_argument('--clicks-per-user', type=float, default=40, help="Clics moyens par utilisateur")
+    parser.add_argument('--comments-per-user', type=float, default=1.5, help="Commentaires moyens par utilisateur")
+    parser.add_argument('--reply-fraction', type=float, default=0.3, help="Part des commentaires qui sont des réponses")
+    parser.add_argument('--comment-likes-per-user', type=float, default=3, help="Likes de commentaires moyens")
+    parser.add_argument('--alpha', type=float, default=1.1,
+                        help="Exposant de Zipf de la popularité des films (plus grand = plus concentré)")
+    parser.add_argument('--days', type=int, default=180, help="Étalement des interactions dans le passé (jours)")
+    parser.add_argument('--chunk-users', type=int, default=50000,
+                        help="Utilisateurs générés par lot (borne la mémoire)")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Lignes par COPY / executemany")
+    parser.add_argument('--seed', type=int, default=42, help="Graine aléatoire")
+    return parser.parse_args()
+
+
+class BulkLoader:
+    """Chargement en masse : COPY ... FROM STDIN sur PostgreSQL, executemany sinon."""
+
+    def __init__(self, engine, tables, batch_size):
+        self.engine = engine
+        self.tables = tables
+        self.batch_size = batch_size
+        self.use_copy = engine.dialect.name == 'postgresql'
+        self.counts = dict.fromkeys(LOAD_ORDER, 0)
+
+    def load(self, name, columns):
+        """columns : {nom de colonne: liste de valeurs}, toutes de même longueur."""
+        names = list(columns)
+        rows = list(zip(*columns.values()))
+        if not rows:
+            return
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            if self.use_copy:
+                self._copy(name, names, batch)
+            else:
+                with self.engine.begin() as conn:
+                    conn.execute(self.tables[name].insert(), [dict(zip(names, row)) for row in batch])
+        self.counts[name] += len(rows)
+
+    def _copy(self, name, names, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                json.dumps(value) if isinstance(value, (list, dict))
+                else value.isoformat(sep=' ') if isinstance(value, datetime)
+                else value
+                for value in row
+            ])
+        buffer.seek(0)
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(f"COPY {name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def reset_sequences(self):
+        """Les IDs sont fournis explicitement : recaler les séquences PostgreSQL."""
+        if not self.use_copy:
+            return
+        from sqlalchemy import text
+
+        with self.engine.begin() as conn:
+            for name in LOAD_ORDER:
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE(MAX(id), 1)) FROM {name}"
+                ))
+
+
+class SyntheticDataGenerator:
+    """Tire les lignes de chaque table ; les tableaux NumPy évitent les boucles Python sur les interactions."""
+
+    def __init__(self, args, first_ids, now):
+        self.args = args
+        self.rng = np.random.default_rng(args.seed)
+        self.first_ids = first_ids
+        self.now = np.datetime64(now.replace(microsecond=0), 's')
+        self.user_ids = np.arange(first_ids['users'], first_ids['users'] + args.users)
+        self.movie_ids = np.arange(first_ids['movies'], first_ids['movies'] + args.movies)
+        self.movie_genres = {}
+
+        # Popularité de Zipf sur un ordre aléatoire des films : rang r -> poids r^-alpha
+        ranks = self.rng.permutation(args.movies) + 1
+        weights = ranks.astype(np.float64) ** -args.alpha
+        self.movie_weights = weights / weights.sum()
+        # Activité des utilisateurs en loi de Pareto, normalisée à une moyenne de 1
+        activity = self.rng.pareto(2.0, args.users) + 1
+        self.user_activity = activity / activity.mean()
+
+    def users(self):
+        count = self.args.users
+        first = self.rng.integers(0, len(FIRST_NAMES), count)
+        last = self.rng.integers(0, len(LAST_NAMES), count)
+        return {
+            'id': self.user_ids.tolist(),
+            'fullname': [f"{FIRST_NAMES[f]} {LAST_NAMES[l]}" for f, l in zip(first.tolist(), last.tolist())],
+            'email': [f"synthetic{user_id}@example.com" for user_id in self.user_ids.tolist()],
+            'created_at': self._timestamps(count, self.args.days * 2)
+        }
+
+    def movies(self):
+        genre_names = list(GENRES)
+        primary = self.rng.integers(0, len(genre_names), self.args.movies)
+        secondary = self.rng.integers(0, len(genre_names), self.args.movies)
+        years = self.rng.integers(1960, 2026, self.args.movies)
+        titles, overviews, genres = [], [], []
+        for movie_id, g1, g2 in zip(self.movie_ids.tolist(), primary.tolist(), secondary.tolist()):
+            names = [genre_names[g1]] if g1 == g2 else [genre_names[g1], genre_names[g2]]
+            words = [word for name in names for word in GENRES[name]]
+            picked = self.rng.choice(words, size=min(5, len(words)), replace=False).tolist()
+            titles.append(f"{TITLE_WORDS[movie_id % len(TITLE_WORDS)]} {picked[0]} {movie_id}")
+            overviews.append(f"Un film {names[0].lower()} : {', '.join(picked)}.")
+            genres.append(names)
+            self.movie_genres[movie_id] = names
+        return {
+            'id': self.movie_ids.tolist(),
+            'title': titles,
+            'overview': overviews,
+            'genres': genres,
+            'popularity': np.round(self.movie_weights * self.args.movies * 10, 3).tolist(),
+            'release_date': [f"{year}-01-01" for year in years.tolist()]
+        }
+
+    def pairs(self, user_ids, per_user):
+        """Couples (utilisateur, film) distincts : nombre par utilisateur selon l'activité, films selon Zipf."""
+        activity = self.user_activity[user_ids - self.first_ids['users']]
+        counts = np.minimum(self.rng.poisson(activity * per_user), self.args.movies)
+        users = np.repeat(user_ids, counts)
+        movies = self.rng.choice(self.movie_ids, size=len(users), p=self.movie_weights)
+        # Dédoublonnage vectorisé sur une clé composite
+        keys = np.unique(users.astype(np.int64) * (self.movie_ids[-1] + 1) + movies)
+        return keys // (self.movie_ids[-1] + 1), keys % (self.movie_ids[-1] + 1)
+
+    def interactions(self, user_ids, per_user, time_column):
+        users, movies = self.pairs(user_ids, per_user)
+        return {
+            'user_id': users.tolist(),
+            'movie_id': movies.tolist(),
+            time_column: self._timestamps(len(users), self.args.days)
+        }
+
+    def clicks(self, user_ids):
+        # Les clics se répètent : pas de dédoublonnage
+        activity = self.user_activity[user_ids - self.first_ids['users']]
+        users = np.repeat(user_ids, self.rng.poisson(activity * self.args.clicks_per_user))
+        movies = self.rng.choice(self.movie_ids, size=len(users), p=self.movie_weights)
+        return {
+            'user_id': users.tolist(),
+            'movie_id': movies.tolist(),
+            'clicked_at': self._timestamps(len(users), self.args.days)
+        }
+
+    def comments(self):
+        """Commentaires racines puis réponses ; retourne aussi les colonnes utiles aux notifications."""
+        args = self.args
+        total = int(args.users * args.comments_per_user)
+        replies = int(total * args.reply_fraction)
+        roots = total - replies
+        user_p = self.user_activity / self.user_activity.sum()
+
+        root_users = self.rng.choice(self.user_ids, size=roots, p=user_p)
+        root_movies = self.rng.choice(self.movie_ids, size=roots, p=self.movie_weights)
+        root_offsets = self.rng.integers(3600, args.days * 86400, roots)
+
+        # Parent tiré uniformément parmi les racines : les films populaires concentrent donc aussi les réponses
+        parents = self.rng.integers(0, max(roots, 1), replies) if roots else np.empty(0, dtype=np.int64)
+        reply_users = self.rng.choice(self.user_ids, size=replies, p=user_p)
+        reply_offsets = np.maximum(root_offsets[parents] - self.rng.integers(60, 3 * 86400, replies), 0)
+
+        first_id = self.first_ids['comments']
+        ids = np.arange(first_id, first_id + total)
+        users = np.concatenate([root_users, reply_users])
+        movies = np.concatenate([root_movies, root_movies[parents]])
+        offsets = np.concatenate([root_offsets, reply_offsets])
+        parent_ids = [None] * roots + (ids[parents]).tolist()
+        created = (self.now - offsets.astype('timedelta64[s]')).astype('datetime64[us]').tolist()
+
+        contents = []
+        for index, movie_id in enumerate(movies.tolist()):
+            if index < roots:
+                word = self.rng.choice(GENRES[self.movie_genres[movie_id][0]])
+                contents.append(COMMENT_TEMPLATES[index % len(COMMENT_TEMPLATES)].format(word))
+            else:
+                contents.append(REPLY_TEMPLATES[index % len(REPLY_TEMPLATES)])
+
+        columns = {
+            'id': ids.tolist(),
+            'user_id': users.tolist(),
+            'movie_id': movies.tolist(),
+            'parent_id': parent_ids,
+            'content': contents,
+            'created_at': created,
+            'updated_at': created
+        }
+        return columns, users, movies, offsets, parents, roots
+
+    def comment_likes(self, comment_ids, comment_offsets):
+        """Likes de commentaires, après la publication du commentaire liké."""
+        if not len(comment_ids):
+            return {'user_id': [], 'comment_id': [], 'created_at': []}, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        total = int(self.args.users * self.args.comment_likes_per_user)
+        user_p = self.user_activity / self.user_activity.sum()
+        users = self.rng.choice(self.user_ids, size=total, p=user_p)
+        # Zipf aussi sur les commentaires : quelques fils très aimés
+        ranks = self.rng.permutation(len(comment_ids)) + 1
+        weights = ranks.astype(np.float64) ** -self.args.alpha
+        comments = self.rng.choice(len(comment_ids), size=total, p=weights / weights.sum())
+        keys = np.unique(users.astype(np.int64) * len(comment_ids) + comments)
+        users, comments = keys // len(comment_ids), keys % len(comment_ids)
+        offsets = (comment_offsets[comments] * self.rng.random(len(comments))).astype(np.int64)
+        return {
+            'user_id': users.tolist(),
+            'comment_id': comment_ids[comments].tolist(),
+            'created_at': (self.now - offsets.astype('timedelta64[s]')).astype('datetime64[us]').tolist()
+        }, comments, offsets
+
+    def notifications(self, recipients, senders, kind, comment_ids, movie_ids, parent_ids, offsets):
+        """Notifications au format de NotificationService (pas d'auto-notification)."""
+        keep = recipients != senders
+        recipients, senders, comment_ids, movie_ids, offsets = (
+            recipients[keep], senders[keep], comment_ids[keep], movie_ids[keep], offsets[keep]
+        )
+        parent_ids = parent_ids[keep] if parent_ids is not None else None
+        title, message = {
+            'comment_reply': ('Nouvelle réponse à votre commentaire', 'a répondu à votre commentaire'),
+            'comment_like': ('Nouveau like sur votre commentaire', 'a aimé votre commentaire')
+        }[kind]
+        data = []
+        for index, (comment_id, movie_id) in enumerate(zip(comment_ids.tolist(), movie_ids.tolist())):
+            payload = {'comment_id': comment_id, 'movie_id': movie_id, 'movie_title': f"Film #{movie_id}"}
+            if parent_ids is not None:
+                payload['parent_comment_id'] = int(parent_ids[index])
+            data.append(json.dumps(payload))
+        count = len(recipients)
+        return {
+            'user_id': recipients.tolist(),
+            'sender_id': senders.tolist(),
+            'type': [kind] * count,
+            'title': [title] * count,
+            'message': [f"Utilisateur #{sender} {message}" for sender in senders.tolist()],
+            'data': data,
+            'read_status': (self.rng.random(count) < 0.6).tolist(),
+            'created_at': (self.now - offsets.astype('timedelta64[s]')).astype('datetime64[us]').tolist()
+        }
+
+    def _timestamps(self, count, days):
+        offsets = self.rng.integers(0, days * 86400, count).astype('timedelta64[s]')
+        return (self.now - offsets).astype('datetime64[us]').tolist()
+
+
+def next_ids(engine, tables):
+    """Premier ID libre de chaque table, pour ajouter un lot sans collision."""
+    from sqlalchemy import select, func
+
+    with engine.connect() as conn:
+        return {
+            name: (conn.execute(select(func.max(tables[name].c.id))).scalar() or 0) + 1
+            for name in ('users', 'movies', 'comments')
+        }
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not args.database:
+        raise SystemExit("❌ Base cible manquante (--database ou DATABASE_URL)")
+
+    from sqlalchemy import create_engine
+    from database.db import db
+    import models  # noqa: F401  (enregistre toutes les tables dans les métadonnées)
+
+    engine = create_engine(args.database)
+    tables = db.metadata.tables
+    if args.create_tables:
+        db.metadata.create_all(engine)
+
+    print("🧪 GÉNÉRATION DE DONNÉES SYNTHÉTIQUES")
+    print("=" * 40)
+    print(f"👥 {args.users} utilisateurs, 🎬 {args.movies} films, loi de Zipf alpha={args.alpha}")
+
+    started = time.perf_counter()
+    first_ids = next_ids(engine, tables)
+    generator = SyntheticDataGenerator(args, first_ids, datetime.utcnow())
+    loader = BulkLoader(engine, tables, args.batch_size)
+
+    loader.load('users', generator.users())
+    loader.load('movies', generator.movies())
+
+    # Interactions par lots d'utilisateurs : la mémoire reste bornée à 1M d'utilisateurs
+    for start in range(0, args.users, args.chunk_users):
+        chunk = generator.user_ids[start:start + args.chunk_users]
+        loader.load('likes', generator.interactions(chunk, args.likes_per_user, 'created_at'))
+        loader.load('watchlists', generator.interactions(chunk, args.watchlist_per_user, 'added_at'))
+        loader.load('clicks', generator.clicks(chunk))
+        print(f"   ... {min(start + args.chunk_users, args.users)}/{args.users} utilisateurs")
+
+    comment_columns, comment_users, comment_movies, comment_offsets, parents, roots = generator.comments()
+    loader.load('comments', comment_columns)
+    comment_ids = np.asarray(comment_columns['id'], dtype=np.int64)
+
+    like_columns, liked, like_offsets = generator.comment_likes(comment_ids, comment_offsets)
+    loader.load('comment_likes', like_columns)
+
+    # Notifications des réponses (auteur du parent) et des likes de commentaires (auteur du commentaire)
+    reply_slice = slice(roots, None)
+    loader.load('notifications', generator.notifications(
+        comment_users[parents], comment_users[reply_slice], 'comment_reply',
+        comment_ids[reply_slice], comment_movies[reply_slice], comment_ids[parents], comment_offsets[reply_slice]
+    ))
+    loader.load('notifications', generator.notifications(
+        comment_users[liked], np.asarray(like_columns['user_id'], dtype=np.int64), 'comment_like',
+        comment_ids[liked], comment_movies[liked], None, like_offsets
+    ))
+
+    loader.reset_sequences()
+
+    elapsed = time.perf_counter() - started
+    total = sum(loader.counts.values())
+    print(f"✅ {total} lignes chargées en {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} lignes/s, "
+          f"{'COPY' if loader.use_copy else 'executemany'})")
+    for name, count in loader.counts.items():
+        print(f"   - {name}: {count}")
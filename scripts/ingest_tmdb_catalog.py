@@ -0,0 +1,56 @@
+"""
+Script d'import en masse du catalogue TMDB (popular, discover, changes)
+
+Exemples :
+    python scripts/ingest_tmdb_catalog.py --pages 50
+    python scripts/ingest_tmdb_catalog.py --sources popular --changes-days 1 --checkpoint ingest.json
+"""
+
+import sys
+import os
+import argparse
+import json
+
+# Ajouter le répertoire parent au path pour pouvoir importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Importe le catalogue TMDB dans la table movies")
+    parser.add_argument('--sources', nargs='*', default=['popular', 'discover'],
+                        choices=['popular', 'discover'], help="Listes TMDB à parcourir")
+    parser.add_argument('--pages', type=int, default=20, help="Nombre de pages par liste (500 max)")
+    parser.add_argument('--changes-days', type=int, default=0,
+                        help="Rafraîchir aussi les films modifiés sur TMDB depuis N jours")
+    parser.add_argument('--workers', type=int, default=4, help="Taille du pool de threads TMDB")
+    parser.add_argument('--batch-size', type=int, default=500, help="Films par INSERT ... ON CONFLICT")
+    parser.add_argument('--checkpoint', default=None,
+                        help="Fichier JSON de reprise (les pages déjà importées sont ignorées)")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    # Application nue (base seulement) : importer app démarrerait les threads d'arrière-plan du serveur
+    from database import init_app
+    from services.catalog_ingest import ingest_catalog
+    from utils.logging_config import configure_logging
+
+    configure_logging(log_format='text')
+    app = init_app()
+
+    print("🎬 IMPORT DU CATALOGUE TMDB")
+    print("=" * 40)
+
+    with app.app_context():
+        stats = ingest_catalog(
+            sources=args.sources,
+            max_pages=args.pages,
+            changes_days=args.changes_days,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            checkpoint_path=args.checkpoint
+        )
+
+    print(json.dumps(stats, indent=2))
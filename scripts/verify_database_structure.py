@@ -1,11 +1,9 @@
-```typescriptreact file="app.py"
-[v0-no-op-code-block-prefix]from flask import Flask, send_from_directory, request, jsonify, abort
-from flask_cors import CORS
+from flask import Flask, send_from_directory, request, jsonify, abort
 from flask_migrate import Migrate
 from database import init_app
 from database.db import db
-from utils.rate_limiter import apply_global_rate_limiting
-from utils.loop_detector import apply_loop_detection
+from utils.cors import init_cors
+from utils.request_guard import init_request_guard
 import os
 import logging
 from werkzeug.exceptions import NotFound
@@ -28,21 +26,8 @@ app.config['STATIC_FOLDER'] = STATIC_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(STATIC_FOLDER, exist_ok=True)
 
-# Configuration CORS
-CORS(app, 
-     supports_credentials=True, 
-     resources={
-         r"/api/*": {
-             "origins": ["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"], 
-             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-             "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
-             "expose_headers": ["Content-Type", "Authorization"]
-         },
-         r"/static/*": {
-             "origins": ["https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app"], 
-             "methods": ["GET", "OPTIONS"]
-         }
-     })
+# Configuration CORS (middleware WSGI, preflights servis avant le routage)
+init_cors(app)
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -137,8 +122,7 @@ migrate = Migrate(app, db)
 
 # Appliquer les protections
 print("🛡️  Applying rate limiting and loop detection...")
-apply_global_rate_limiting(app, max_requests_per_minute=100)  # Augmenter de 25 à 100
-apply_loop_detection(app)
+init_request_guard(app, max_requests_per_minute=100)  # Augmenter de 25 à 100
 
 # Enregistrer les routes
 from routes import register_routes
@@ -148,11 +132,6 @@ register_routes(app)
 with app.app_context():
     db.create_all()
 
-# Route OPTIONS pour CORS
-@app.route('/api/<path:path>', methods=['OPTIONS'])
-def options_handler(path):
-    return '', 200
-
 # Route racine
 @app.route('/')
 def index():
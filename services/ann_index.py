@@ -0,0 +1,391 @@
+import os
+import json
+import heapq
+import math
+import time
+import numpy as np
+import logging
+
+try:
+    import hnswlib
+except ImportError:  # Dépendance optionnelle : repli sur l'implémentation NumPy
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+# 'auto' : recherche exacte sous ANN_EXACT_THRESHOLD vecteurs, sinon hnswlib s'il est installé, sinon HNSW NumPy
+ANN_BACKEND = os.getenv('ANN_BACKEND', 'auto')
+ANN_EXACT_THRESHOLD = int(os.getenv('ANN_EXACT_THRESHOLD', 5000))
+
+METRICS = ('cosine', 'ip')
+
+
+class ExactIndex:
+    """
+    Recherche exacte par produit scalaire sur une matrice NumPy.
+
+    Sert de référence pour mesurer le rappel des index approchés, et reste le
+    meilleur choix pour les petits catalogues (une multiplication matricielle).
+    """
+
+    backend = 'exact'
+
+    def __init__(self, dim, metric='cosine'):
+        if metric not in METRICS:
+            raise ValueError(f"Métrique inconnue: {metric}")
+        self.dim = dim
+        self.metric = metric
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._rows
+
+    def add(self, ids, vectors):
+        vectors = _prepare(vectors, self.metric)
+        start = len(self._ids)
+        self._vectors = np.vstack([self._vectors, vectors])
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+        self._rows.update((int(item_id), start + offset) for offset, item_id in enumerate(ids))
+
+    def vector(self, item_id):
+        """Vecteur (normalisé en métrique cosinus) d'un élément indexé."""
+        return np.asarray(self._vectors[self._rows[item_id]])
+
+    def search(self, query, k=10):
+        """
+        Les k éléments les plus proches de la requête.
+
+        Returns:
+            Tuple (liste d'IDs, liste de scores) par score décroissant
+        """
+        if not len(self._ids):
+            return [], []
+        query = _prepare(query, self.metric)[0]
+        scores = self._vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return self._ids[top].tolist(), scores[top].tolist()
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'vectors.npy'), np.asarray(self._vectors))
+        np.save(os.path.join(directory, 'ids.npy'), np.asarray(self._ids))
+        _write_meta(directory, {'backend': self.backend, 'dim': self.dim, 'metric': self.metric})
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        meta = _read_meta(directory)
+        index = cls(meta['dim'], meta['metric'])
+        index._load_arrays(directory, mmap)
+        return index
+
+    def _load_arrays(self, directory, mmap):
+        mode = 'r' if mmap else None
+        self._vectors = np.load(os.path.join(directory, 'vectors.npy'), mmap_mode=mode)
+        self._ids = np.load(os.path.join(directory, 'ids.npy'))
+        self._rows = {int(item_id): row for row, item_id in enumerate(self._ids.tolist())}
+
+
+class HNSWIndex(ExactIndex):
+    """
+    Graphe HNSW (Hierarchical Navigable Small World) en Python/NumPy.
+
+    Chaque vecteur est inséré à un niveau tiré au hasard ; la recherche
+    descend gloutonnement les niveaux supérieurs puis explore le niveau 0
+    avec une liste de `ef_search` candidats. Le niveau 0, qui porte
+    l'essentiel des liens, est un tableau (n, 2M) sauvegardé en .npy et
+    rechargeable en mmap avec les vecteurs, comme l'index exact. La
+    construction en Python est lente : au-delà de quelques dizaines de
+    milliers de vecteurs, installer hnswlib.
+    """
+
+    backend = 'hnsw'
+
+    def __init__(self, dim, metric='cosine', M=16, ef_construction=100, ef_search=64, seed=42):
+        super().__init__(dim, metric)
+        self.M = M
+        self.M0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1 / math.log(M)
+        self._random = np.random.default_rng(seed)
+        self._graph0 = np.full((0, self.M0), -1, dtype=np.int32)
+        self._upper = []  # niveau - 1 -> {noeud: [voisins]}
+        self._entry_point = None
+        self._max_level = -1
+
+    def add(self, ids, vectors):
+        vectors = _prepare(vectors, self.metric)
+        start = len(self._ids)
+        # Copie explicite : un index chargé en mmap est en lecture seule
+        self._vectors = np.vstack([self._vectors, vectors])
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+        self._graph0 = np.vstack([self._graph0, np.full((len(vectors), self.M0), -1, dtype=np.int32)])
+        for offset, item_id in enumerate(ids):
+            self._rows[int(item_id)] = start + offset
+            self._insert(start + offset)
+
+    def search(self, query, k=10, ef=None):
+        if self._entry_point is None:
+            return [], []
+        query = _prepare(query, self.metric)[0]
+        entry = self._entry_point
+        for level in range(self._max_level, 0, -1):
+            entry = self._search_layer(query, [entry], 1, level)[0][1]
+        results = self._search_layer(query, [entry], max(ef or self.ef_search, k), 0)[:k]
+        return [int(self._ids[node]) for _, node in results], [float(score) for score, _ in results]
+
+    def save(self, directory):
+        super().save(directory)
+        np.save(os.path.join(directory, 'graph0.npy'), np.asarray(self._graph0))
+        _write_meta(directory, {
+            'backend': self.backend, 'dim': self.dim, 'metric': self.metric,
+            'M': self.M, 'ef_construction': self.ef_construction, 'ef_search': self.ef_search,
+            'entry_point': self._entry_point, 'max_level': self._max_level,
+            # Les niveaux supérieurs ne contiennent qu'environ 1/M des noeuds
+            'upper': [{str(node): neighbors for node, neighbors in layer.items()} for layer in self._upper]
+        })
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        meta = _read_meta(directory)
+        index = cls(meta['dim'], meta['metric'], M=meta['M'],
+                    ef_construction=meta['ef_construction'], ef_search=meta['ef_search'])
+        index._load_arrays(directory, mmap)
+        index._graph0 = np.load(os.path.join(directory, 'graph0.npy'), mmap_mode='r' if mmap else None)
+        index._upper = [{int(node): neighbors for node, neighbors in layer.items()} for layer in meta['upper']]
+        index._entry_point = meta['entry_point']
+        index._max_level = meta['max_level']
+        return index
+
+    def _insert(self, node):
+        query = self._vectors[node]
+        level = int(-math.log(1.0 - self._random.random()) * self._level_mult)
+        while len(self._upper) < level:
+            self._upper.append({})
+        for layer in range(1, level + 1):
+            self._upper[layer - 1][node] = []
+
+        if self._entry_point is None:
+            self._entry_point, self._max_level = node, level
+            return
+
+        entry = self._entry_point
+        for layer in range(self._max_level, level, -1):
+            entry = self._search_layer(query, [entry], 1, layer)[0][1]
+
+        entries = [entry]
+        for layer in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, entries, self.ef_construction, layer)
+            neighbors = self._select_neighbors(candidates, self.M)
+            self._set_neighbors(node, layer, neighbors)
+            limit = self.M0 if layer == 0 else self.M
+            for neighbor in neighbors:
+                links = self._neighbors(neighbor, layer) + [node]
+                if len(links) > limit:
+                    scores = self._vectors[links] @ self._vectors[neighbor]
+                    links = self._select_neighbors(sorted(zip(scores.tolist(), links), reverse=True), limit)
+                self._set_neighbors(neighbor, layer, links)
+            entries = [candidate for _, candidate in candidates]
+
+        if level > self._max_level:
+            self._entry_point, self._max_level = node, level
+
+    def _search_layer(self, query, entries, ef, layer):
+        """Recherche best-first sur un niveau ; retourne [(score, noeud)] par score décroissant."""
+        visited = set(entries)
+        scores = self._vectors[entries] @ query
+        candidates = [(-score, node) for score, node in zip(scores.tolist(), entries)]
+        heapq.heapify(candidates)
+        results = [(score, node) for score, node in zip(scores.tolist(), entries)]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            negative_score, node = heapq.heappop(candidates)
+            if -negative_score < results[0][0] and len(results) >= ef:
+                break
+            fresh = [neighbor for neighbor in self._neighbors(node, layer) if neighbor not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for score, neighbor in zip((self._vectors[fresh] @ query).tolist(), fresh):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    heapq.heappush(results, (score, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted(results, reverse=True)
+
+    def _select_neighbors(self, candidates, limit):
+        """
+        Heuristique HNSW : un candidat n'est gardé que s'il est plus proche de la
+        requête que de tout voisin déjà retenu, ce qui diversifie les directions.
+        Les places restantes sont complétées par les meilleurs candidats écartés.
+        """
+        selected, pruned = [], []
+        for score, node in candidates:
+            if len(selected) >= limit:
+                break
+            if selected and np.max(self._vectors[selected] @ self._vectors[node]) > score:
+                pruned.append(node)
+            else:
+                selected.append(node)
+        return selected + pruned[:limit - len(selected)]
+
+    def _neighbors(self, node, layer):
+        if layer == 0:
+            links = self._graph0[node]
+            return links[links >= 0].tolist()
+        return list(self._upper[layer - 1].get(node, []))
+
+    def _set_neighbors(self, node, layer, neighbors):
+        if layer == 0:
+            self._graph0[node] = -1
+            self._graph0[node, :len(neighbors)] = neighbors
+        else:
+            self._upper[layer - 1][node] = list(neighbors)
+
+
+class HnswlibIndex(ExactIndex):
+    """
+    Adaptateur hnswlib (implémentation C++), si le paquet est installé.
+
+    hnswlib recharge son graphe en mémoire (pas de mmap) ; les vecteurs,
+    utilisés pour construire les requêtes, restent mappés depuis vectors.npy.
+    """
+
+    backend = 'hnswlib'
+
+    def __init__(self, dim, metric='cosine', M=16, ef_construction=200, ef_search=64):
+        if hnswlib is None:
+            raise ImportError("hnswlib n'est pas installé")
+        super().__init__(dim, metric)
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = hnswlib.Index(space='ip', dim=dim)
+        self._index.init_index(max_elements=1, M=M, ef_construction=ef_construction)
+
+    def add(self, ids, vectors):
+        super().add(ids, vectors)
+        self._index.resize_index(len(self._ids))
+        self._index.add_items(self._vectors[-len(ids):], np.asarray(ids, dtype=np.int64))
+
+    def search(self, query, k=10, ef=None):
+        if not len(self._ids):
+            return [], []
+        query = _prepare(query, self.metric)
+        k = min(k, len(self._ids))
+        self._index.set_ef(max(ef or self.ef_search, k))
+        labels, distances = self._index.knn_query(query, k=k)
+        # Espace 'ip' de hnswlib : distance = 1 - produit scalaire
+        return labels[0].astype(np.int64).tolist(), (1.0 - distances[0]).tolist()
+
+    def save(self, directory):
+        super().save(directory)
+        self._index.save_index(os.path.join(directory, 'hnswlib.bin'))
+        _write_meta(directory, {
+            'backend': self.backend, 'dim': self.dim, 'metric': self.metric,
+            'M': self.M, 'ef_construction': self.ef_construction, 'ef_search': self.ef_search
+        })
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        meta = _read_meta(directory)
+        index = cls(meta['dim'], meta['metric'], M=meta['M'],
+                    ef_construction=meta['ef_construction'], ef_search=meta['ef_search'])
+        index._load_arrays(directory, mmap)
+        index._index.load_index(os.path.join(directory, 'hnswlib.bin'), max_elements=len(index._ids))
+        return index
+
+
+BACKENDS = {
+    ExactIndex.backend: ExactIndex,
+    HNSWIndex.backend: HNSWIndex,
+    HnswlibIndex.backend: HnswlibIndex
+}
+
+
+def create_index(dim, size, metric='cosine', backend=None):
+    """
+    Crée un index vide adapté à la taille du catalogue.
+
+    Args:
+        dim: Dimension des vecteurs
+        size: Nombre de vecteurs prévus (pour le choix 'auto')
+        backend: 'exact', 'hnsw', 'hnswlib' ou 'auto' (ANN_BACKEND par défaut)
+    """
+    backend = backend or ANN_BACKEND
+    if backend == 'auto':
+        if size < ANN_EXACT_THRESHOLD:
+            backend = 'exact'
+        else:
+            backend = 'hnswlib' if hnswlib is not None else 'hnsw'
+    if backend == 'hnswlib' and hnswlib is None:
+        logger.warning("⚠️ hnswlib non installé, utilisation de l'index HNSW NumPy")
+        backend = 'hnsw'
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend ANN inconnu: {backend}")
+    return BACKENDS[backend](dim, metric)
+
+
+def build_index(ids, vectors, metric='cosine', backend=None):
+    """Crée et remplit un index ; journalise la durée de construction."""
+    started = time.perf_counter()
+    vectors = np.asarray(vectors, dtype=np.float32)
+    index = create_index(vectors.shape[1], len(ids), metric, backend)
+    index.add(list(ids), vectors)
+    logger.info(f"🧭 Index {index.backend} construit: {len(ids)} vecteurs en {time.perf_counter() - started:.2f}s")
+    return index
+
+
+def load_index(directory, mmap=True):
+    """Recharge un index sauvegardé par `save`, vecteurs en mmap par défaut."""
+    return BACKENDS[_read_meta(directory)['backend']].load(directory, mmap=mmap)
+
+
+def recall_at_k(index, reference, queries, k=10):
+    """
+    Rappel@K d'un index approché mesuré contre une recherche exacte.
+
+    Args:
+        index: Index à évaluer
+        reference: Index exact construit sur les mêmes vecteurs
+        queries: Matrice de vecteurs requêtes
+
+    Returns:
+        Proportion moyenne des k vrais voisins retrouvés
+    """
+    found = 0
+    total = 0
+    for query in np.asarray(queries, dtype=np.float32):
+        expected = set(reference.search(query, k)[0])
+        found += len(expected & set(index.search(query, k)[0]))
+        total += len(expected)
+    return found / total if total else 1.0
+
+
+def _prepare(vectors, metric):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if metric == 'cosine':
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+    return vectors
+
+
+def _write_meta(directory, meta):
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+
+def _read_meta(directory):
+    with open(os.path.join(directory, 'meta.json')) as f:
+        return json.load(f)
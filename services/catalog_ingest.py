@@ -0,0 +1,230 @@
+import json
+import os
+import time
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from repositories.movie_repository import bulk_upsert_movies, get_existing_movie_ids
+from services.tmdb_client import tmdb_client
+from services.tmdb_service import normalize_movie
+import logging
+
+logger = logging.getLogger(__name__)
+
+# TMDB ne sert pas au-delà de la page 500 pour les listes
+TMDB_MAX_PAGE = 500
+# /movie/changes accepte au plus 14 jours par appel
+TMDB_CHANGES_MAX_DAYS = 14
+
+LIST_SOURCES = ('popular', 'discover')
+
+
+class IngestStats:
+    """
+    Compteurs de débit d'une exécution d'ingestion.
+
+    Seules les erreurs sont comptées depuis les threads du pool (record_error) ;
+    les autres compteurs ne sont modifiés que par le thread appelant.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.pages = 0
+        self.fetched = 0
+        self.upserted = 0
+        self.skipped = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def to_dict(self):
+        elapsed = max(self.elapsed, 1e-9)
+        return {
+            'pages': self.pages,
+            'fetched': self.fetched,
+            'upserted': self.upserted,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'elapsed_seconds': round(self.elapsed, 2),
+            'pages_per_second': round(self.pages / elapsed, 2),
+            'movies_per_second': round(self.upserted / elapsed, 2)
+        }
+
+
+class CatalogIngestor:
+    """
+    Import en masse du catalogue TMDB dans la table movies.
+
+    Les pages TMDB sont récupérées en parallèle par un pool de threads borné
+    (le client partagé applique déjà la limite de débit), normalisées puis
+    écrites par lots avec INSERT ... ON CONFLICT DO UPDATE depuis le thread
+    appelant, seul à utiliser la session SQLAlchemy. Un point de reprise JSON
+    est enregistré après chaque fenêtre de pages écrite.
+    """
+
+    def __init__(self, client=None, workers=4, batch_size=500, checkpoint_path=None):
+        self.client = (client or tmdb_client).for_batch_jobs()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = self._load_checkpoint()
+        self.stats = IngestStats()
+        self._genre_names = None
+
+    def ingest_list(self, source, max_pages=20):
+        """Importe les pages 1..max_pages d'une liste TMDB ('popular' ou 'discover')."""
+        if source not in LIST_SOURCES:
+            raise ValueError(f"Source inconnue: {source}")
+
+        last_page = min(max_pages, TMDB_MAX_PAGE)
+        next_page = self.checkpoint.get(source, 0) + 1
+        window_size = self.workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while next_page <= last_page:
+                pages = list(range(next_page, min(next_page + window_size, last_page + 1)))
+                responses = list(executor.map(lambda page: self._fetch_page(source, page), pages))
+
+                records = []
+                completed_page = next_page - 1  # dernière page importée sans trou avant elle
+                for page, response in zip(pages, responses):
+                    if response is None:
+                        continue
+                    if completed_page == page - 1:
+                        completed_page = page
+                    self.stats.pages += 1
+                    records.extend(self._normalize_results(response.get('results', [])))
+                    last_page = min(last_page, response.get('total_pages', last_page))
+                self._write(records)
+
+                # Le point de reprise n'avance pas au-delà d'une page en échec : la reprise la refera
+                if completed_page >= next_page:
+                    self._save_checkpoint(source, completed_page)
+                if completed_page < pages[-1]:
+                    logger.warning("⚠️ %s: page %s en échec, reprise à partir de celle-ci", source, completed_page + 1)
+                    break
+                next_page = pages[-1] + 1
+                logger.info("📥 %s: pages %s-%s importées (%s films)", source, pages[0], pages[-1], self.stats.upserted)
+
+        return self.stats
+
+    def ingest_changes(self, days=1):
+        """
+        Rafraîchit les films déjà en base modifiés sur TMDB depuis le dernier passage.
+
+        La période démarre au point de reprise 'changes' (ou il y a `days` jours).
+        """
+        end = datetime.date.today()
+        since = self.checkpoint.get('changes')
+        start = datetime.date.fromisoformat(since) if since else end - datetime.timedelta(days=days)
+        start = max(start, end - datetime.timedelta(days=TMDB_CHANGES_MAX_DAYS))
+
+        errors_before = self.stats.errors
+        changed_ids = set()
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            response = self._call(self.client.movie_changes, start.isoformat(), end.isoformat(), page)
+            if response is None:
+                break
+            self.stats.pages += 1
+            total_pages = response.get('total_pages', 1)
+            changed_ids.update(item['id'] for item in response.get('results', []) if not item.get('adult'))
+            page += 1
+
+        known_ids = sorted(get_existing_movie_ids(changed_ids))
+        for offset in range(0, len(known_ids), self.batch_size):
+            chunk = known_ids[offset:offset + self.batch_size]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                details = list(executor.map(lambda movie_id: self._call(self.client.get_movie, movie_id), chunk))
+            self._write(self._normalize_results([movie for movie in details if movie]))
+
+        if self.stats.errors > errors_before:
+            # Changements incomplets : la prochaine exécution repart du même point de reprise
+            logger.warning("⚠️ Changements TMDB incomplets, point de reprise conservé (%s)", since or start.isoformat())
+            return self.stats
+
+        self._save_checkpoint('changes', end.isoformat())
+        logger.info("🔄 Changements TMDB: %s films connus rafraîchis sur %s modifiés", len(known_ids), len(changed_ids))
+        return self.stats
+
+    def _fetch_page(self, source, page):
+        if source == 'popular':
+            return self._call(self.client.popular_movies, page)
+        return self._call(self.client.discover_movies, page)
+
+    def _call(self, method, *args):
+        try:
+            return method(*args)
+        except requests.exceptions.RequestException as e:
+            self.stats.record_error()
+            logger.warning("⚠️ Appel TMDB en échec %s%s: %s", method.__name__, args, e)
+            return None
+
+    def _normalize_results(self, results):
+        if self._genre_names is None:
+            self._genre_names = self._call(self.client.genre_names) or {}
+
+        fetched_at = datetime.datetime.utcnow()
+        records = {}
+        for movie_data in results:
+            self.stats.fetched += 1
+            if movie_data.get('adult') or not movie_data.get('title') or not movie_data.get('id'):
+                self.stats.skipped += 1
+                continue
+            record = normalize_movie(movie_data, self._genre_names)
+            record['id'] = movie_data['id']
+            record['fetched_at'] = fetched_at
+            # Un même film peut apparaître sur deux pages : ON CONFLICT refuse les doublons dans un lot
+            records[record['id']] = record
+        return list(records.values())
+
+    def _write(self, records):
+        for offset in range(0, len(records), self.batch_size):
+            self.stats.upserted += bulk_upsert_movies(records[offset:offset + self.batch_size])
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def _save_checkpoint(self, key, value):
+        self.checkpoint[key] = value
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+def ingest_catalog(sources=LIST_SOURCES, max_pages=20, changes_days=None, workers=4,
+                   batch_size=500, checkpoint_path=None):
+    """
+    Point d'entrée de l'ingestion (à appeler dans un contexte d'application Flask).
+
+    Returns:
+        Dictionnaire de métriques de l'exécution
+    """
+    from services.search_service import movie_search_service
+
+    ingestor = CatalogIngestor(workers=workers, batch_size=batch_size, checkpoint_path=checkpoint_path)
+    for source in sources:
+        ingestor.ingest_list(source, max_pages=max_pages)
+    if changes_days:
+        ingestor.ingest_changes(days=changes_days)
+
+    # Les écritures en masse contournent les événements ORM de l'index de recherche
+    movie_search_service.invalidate()
+
+    stats = ingestor.stats.to_dict()
+    logger.info("✅ Ingestion terminée: %s", stats)
+    return stats
@@ -0,0 +1,192 @@
+import os
+import atexit
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from database.db import db
+from repositories.click_repository import bulk_insert_clicks
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Un lot est écrit dès CLICK_FLUSH_SIZE clics en attente, ou au plus tard après CLICK_FLUSH_INTERVAL_MS
+CLICK_FLUSH_SIZE = int(os.getenv('CLICK_FLUSH_SIZE', 500))
+CLICK_FLUSH_INTERVAL_MS = int(os.getenv('CLICK_FLUSH_INTERVAL_MS', 1000))
+# Au-delà, les nouveaux clics sont refusés (429) plutôt que de faire grossir la mémoire
+CLICK_BUFFER_MAX = int(os.getenv('CLICK_BUFFER_MAX', 50000))
+# Taille maximale d'un envoi groupé côté client
+CLICK_BATCH_MAX_EVENTS = 500
+# Plus grand ID accepté (colonnes INTEGER) : une valeur hors bornes ferait échouer tout le lot en base
+MAX_ID = 2 ** 31 - 1
+
+
+class ClickBufferFull(Exception):
+    """Le tampon de clics est plein : le client doit réessayer plus tard."""
+
+
+class ClickIngestor:
+    """
+    Ingestion des clics par lots.
+
+    Les requêtes ne font qu'ajouter des tuples (user_id, movie_id, clicked_at)
+    à un tampon borné en mémoire. Un thread dédié vide le tampon toutes les
+    CLICK_FLUSH_INTERVAL_MS millisecondes, ou dès que CLICK_FLUSH_SIZE clics
+    attendent, avec un INSERT multi-lignes par lot et un seul commit. Quand
+    la base ne suit pas et que le tampon est plein, `submit` lève
+    ClickBufferFull (contre-pression). Le reliquat est écrit à l'arrêt du
+    processus.
+    """
+
+    def __init__(self, flush_size=CLICK_FLUSH_SIZE, flush_interval_ms=CLICK_FLUSH_INTERVAL_MS,
+                 max_buffer=CLICK_BUFFER_MAX):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_buffer = max_buffer
+        self._buffer = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._app = None
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+        # Compteurs exposés pour le suivi
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.ignored = 0  # utilisateur ou film inconnu
+        self.dropped = 0
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    def submit(self, events):
+        """
+        Ajoute des clics au tampon, tout ou rien.
+
+        Args:
+            events: Liste de tuples (user_id, movie_id, clicked_at)
+
+        Raises:
+            ClickBufferFull: si le tampon ne peut pas accueillir tout le lot
+        """
+        with self._condition:
+            if len(self._buffer) + len(events) > self.max_buffer:
+                self.rejected += len(events)
+                raise ClickBufferFull()
+            self._buffer.extend(events)
+            self.accepted += len(events)
+            if len(self._buffer) >= self.flush_size:
+                self._condition.notify()
+
+    def start(self, app):
+        """Démarre le thread d'écriture (un par processus, au démarrage de l'application)."""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._app = app
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='click-flusher', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self):
+        """Arrête le thread et écrit les clics restants."""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        if self._app is not None and self._buffer:
+            with self._app.app_context():
+                self.flush()
+
+    def flush(self):
+        """
+        Écrit tout le contenu du tampon par lots (à appeler dans un contexte d'application).
+
+        Returns:
+            Nombre de clics écrits
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take(self.flush_size)
+                if not batch:
+                    break
+                try:
+                    count = bulk_insert_clicks(batch)
+                    written += count
+                    self.ignored += len(batch) - count
+                except Exception as e:
+                    db.session.rollback()
+                    self.dropped += len(batch)
+                    logger.error("❌ Écriture de %s clics en échec, lot abandonné: %s", len(batch), e)
+        self.written += written
+        return written
+
+    def _take(self, limit):
+        with self._condition:
+            count = min(limit, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _loop(self):
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            with self._condition:
+                while len(self._buffer) < self.flush_size and not self._stop.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            if not self._buffer:
+                continue
+            with self._app.app_context():
+                self.flush()
+                db.session.remove()
+
+
+def parse_click_events(items, default_user_id=None):
+    """
+    Valide un lot de clics envoyé par un client.
+
+    Args:
+        items: Liste de dictionnaires {'movie_id', 'user_id'?, 'clicked_at'?}
+        default_user_id: Utilisateur appliqué aux éléments qui n'en précisent pas
+
+    Returns:
+        Liste de tuples (user_id, movie_id, clicked_at)
+
+    Raises:
+        ValueError: si un élément est invalide
+    """
+    now = datetime.utcnow()
+    events = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("Chaque clic doit être un objet")
+        user_id = item.get('user_id', default_user_id)
+        movie_id = item.get('movie_id')
+        if not user_id or not movie_id:
+            raise ValueError("user_id et movie_id sont requis pour chaque clic")
+        user_id, movie_id = int(user_id), int(movie_id)
+        if not (1 <= user_id <= MAX_ID and 1 <= movie_id <= MAX_ID):
+            raise ValueError("user_id et movie_id doivent être des entiers entre 1 et %d" % MAX_ID)
+        clicked_at = now
+        if item.get('clicked_at'):
+            clicked_at = datetime.fromisoformat(str(item['clicked_at']).replace('Z', '+00:00'))
+            if clicked_at.tzinfo is not None:
+                # Les colonnes DateTime de l'application sont naïves en UTC
+                clicked_at = (clicked_at - clicked_at.utcoffset()).replace(tzinfo=None)
+            # Horodatage client borné : pas de clic dans le futur
+            clicked_at = min(clicked_at, now)
+        events.append((user_id, movie_id, clicked_at))
+    return events
+
+
+# Créer une instance du service
+click_ingestor = ClickIngestor()
@@ -0,0 +1,126 @@
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from database.db import db
+from repositories.click_repository import (
+    get_pending_clicks, mark_clicks_rolled_up, get_click_rollups,
+    upsert_click_rollups, try_lock_click_rollup
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Demi-vie du signal de clic : un clic vieux de 14 jours compte pour moitié
+CLICK_HALF_LIFE_DAYS = float(os.getenv('CLICK_HALF_LIFE_DAYS', 14))
+CLICK_ROLLUP_INTERVAL = float(os.getenv('CLICK_ROLLUP_INTERVAL', 60))
+CLICK_ROLLUP_BATCH_SIZE = int(os.getenv('CLICK_ROLLUP_BATCH_SIZE', 5000))
+
+
+def decay_factor(age_seconds):
+    """Facteur de décroissance exponentielle pour un âge donné (1.0 pour un âge nul ou négatif)."""
+    return 0.5 ** (max(age_seconds, 0.0) / (CLICK_HALF_LIFE_DAYS * 86400.0))
+
+
+class ClickRollupJob:
+    """
+    Cumul incrémental des clics dans click_rollups.
+
+    Chaque passage lit les clics pas encore cumulés (rolled_up faux), les
+    regroupe par (utilisateur, film) et ajoute leur contribution
+    décroissante au score existant, lui-même ramené à l'instant présent ;
+    les clics sont marqués cumulés dans la même transaction que l'agrégat. Le modèle collaboratif ne lit ensuite que
+    ces agrégats, jamais la table clicks brute.
+    """
+
+    def __init__(self, batch_size=CLICK_ROLLUP_BATCH_SIZE, interval=CLICK_ROLLUP_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """
+        Agrège tous les clics en attente, lot par lot (à appeler dans un contexte d'application).
+
+        Returns:
+            Nombre de clics agrégés
+        """
+        processed = 0
+        try:
+            while True:
+                count = self._rollup_batch()
+                processed += count
+                if count < self.batch_size:
+                    break
+        except Exception as e:
+            db.session.rollback()
+            logger.error("❌ Erreur lors du cumul des clics: %s", e)
+        if processed:
+            logger.info("🖱️ %s clics agrégés dans click_rollups", processed)
+        return processed
+
+    def start(self, app):
+        """Démarre le cumul périodique en arrière-plan (un thread par processus)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(app,), name='click-rollup', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _rollup_batch(self):
+        if not try_lock_click_rollup():
+            db.session.rollback()
+            return 0
+
+        clicks = get_pending_clicks(self.batch_size)
+        if not clicks:
+            db.session.commit()
+            return 0
+
+        now = datetime.utcnow()
+        deltas = defaultdict(float)
+        counts = defaultdict(int)
+        last_clicked = {}
+        for _, user_id, movie_id, clicked_at in clicks:
+            key = (user_id, movie_id)
+            deltas[key] += decay_factor((now - clicked_at).total_seconds())
+            counts[key] += 1
+            if key not in last_clicked or clicked_at > last_clicked[key]:
+                last_clicked[key] = clicked_at
+
+        last_click_id = max(click[0] for click in clicks)
+        existing = get_click_rollups(deltas.keys())
+        rows = []
+        for key, delta in deltas.items():
+            previous = existing.get(key)
+            score, click_count, previous_clicked = 0.0, 0, None
+            if previous is not None:
+                score = previous.score * decay_factor((now - previous.updated_at).total_seconds())
+                click_count = previous.click_count
+                previous_clicked = previous.last_clicked_at
+            rows.append({
+                'user_id': key[0],
+                'movie_id': key[1],
+                'score': score + delta,
+                'click_count': click_count + counts[key],
+                'last_clicked_at': max(filter(None, (previous_clicked, last_clicked[key]))),
+                'last_click_id': last_click_id,
+                'updated_at': now
+            })
+        mark_clicks_rolled_up([click[0] for click in clicks])
+        upsert_click_rollups(rows)  # commit, ce qui libère aussi le verrou consultatif
+        return len(clicks)
+
+    def _loop(self, app):
+        while not self._stop.wait(self.interval):
+            with app.app_context():
+                self.run_once()
+                db.session.remove()
+
+
+# Créer une instance du service
+click_rollup_job = ClickRollupJob()
@@ -0,0 +1,176 @@
+import os
+import math
+import threading
+import time
+from datetime import datetime, date, timedelta
+from collections import defaultdict
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, desc
+from sqlalchemy.orm import Session
+from database.db import db
+from models.movie import Movie
+from models.like import Like
+from models.watchlist import Watchlist
+from models.click import Click
+import logging
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_REFRESH_INTERVAL = float(os.getenv('LEADERBOARD_REFRESH_INTERVAL', 300))
+# Nombre de films classés conservés en mémoire
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', 500))
+# Fenêtre et demi-vie de la décroissance temporelle des interactions
+LEADERBOARD_WINDOW_DAYS = 30
+LEADERBOARD_HALF_LIFE_DAYS = 7.0
+
+# Poids du score combiné : popularité TMDB (échelle log) + interactions internes
+TMDB_POPULARITY_WEIGHT = 1.0
+INTERACTION_WEIGHTS = {
+    'like': 3.0,
+    'watchlist': 2.0,
+    'click': 0.25
+}
+# Taille des lots IN (...) pour lire la popularité des films ayant des interactions
+POPULARITY_LOOKUP_CHUNK = 500
+
+
+class PopularityLeaderboard:
+    """
+    Classement de popularité précalculé, servi depuis la mémoire.
+
+    Le score mélange la popularité TMDB et les likes, ajouts à la watchlist et
+    clics des 30 derniers jours, avec une décroissance exponentielle. Un thread
+    d'arrière-plan recalcule le tableau trié dans sa propre session ; les
+    lectures ne font aucune requête tant qu'un classement est disponible.
+    Avant le premier calcul, elles se replient sur la popularité TMDB seule.
+    """
+
+    def __init__(self, size=LEADERBOARD_SIZE, refresh_interval=LEADERBOARD_REFRESH_INTERVAL):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        # (ids triés, dictionnaires de films alignés, instant du calcul), remplacés d'un bloc
+        self._snapshot = ([], [], None)
+        self._refresh_lock = threading.RLock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def built_at(self):
+        return self._snapshot[2]
+
+    def top(self, limit=10):
+        """Les `limit` films les plus populaires, sous forme de dictionnaires (copies, modifiables par l'appelant)."""
+        if not self._ensure_built():
+            return [movie.to_dict() for movie in self._fallback_query(limit)]
+        return [dict(movie) for movie in self._snapshot[1][:max(limit, 0)]]
+
+    def top_ids(self, limit=10):
+        if not self._ensure_built():
+            return [movie.id for movie in self._fallback_query(limit)]
+        return self._snapshot[0][:max(limit, 0)]
+
+    def refresh(self):
+        """Recalcule le classement (contexte d'application requis, session dédiée)."""
+        with self._refresh_lock, Session(db.engine) as session:
+            started = time.perf_counter()
+            scores = defaultdict(float)
+
+            # Interactions récentes, avec décroissance temporelle
+            today = date.today()
+            since = datetime.utcnow() - timedelta(days=LEADERBOARD_WINDOW_DAYS)
+            for kind, column, movie_column in (
+                ('like', Like.created_at, Like.movie_id),
+                ('watchlist', Watchlist.added_at, Watchlist.movie_id),
+                ('click', Click.clicked_at, Click.movie_id)
+            ):
+                day = func.date(column)
+                rows = session.query(movie_column, day, func.count()).filter(
+                    column >= since
+                ).group_by(movie_column, day).all()
+                for movie_id, bucket, count in rows:
+                    age_days = (today - _as_date(bucket)).days
+                    decay = 0.5 ** (max(age_days, 0) / LEADERBOARD_HALF_LIFE_DAYS)
+                    scores[movie_id] += INTERACTION_WEIGHTS[kind] * count * decay
+
+            # Terme TMDB sur l'union des plus populaires (index sur movies.popularity) et des films
+            # ayant des interactions, pour que tous les candidats soient notés de la même façon
+            popularity = dict(session.query(Movie.id, Movie.popularity).filter(
+                Movie.popularity.isnot(None)
+            ).order_by(desc(Movie.popularity)).limit(self.size).all())
+            interacted_ids = [movie_id for movie_id in scores if movie_id not in popularity]
+            for offset in range(0, len(interacted_ids), POPULARITY_LOOKUP_CHUNK):
+                chunk = interacted_ids[offset:offset + POPULARITY_LOOKUP_CHUNK]
+                popularity.update(session.query(Movie.id, Movie.popularity).filter(
+                    Movie.id.in_(chunk), Movie.popularity.isnot(None)
+                ).all())
+            for movie_id, value in popularity.items():
+                scores[movie_id] += TMDB_POPULARITY_WEIGHT * math.log1p(max(value, 0))
+
+            if scores:
+                ids = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+                values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+                order = np.argsort(-values, kind='stable')[:self.size]
+                ranked_ids = ids[order].tolist()
+            else:
+                ranked_ids = []
+
+            movies_by_id = {
+                movie.id: movie.to_dict()
+                for movie in session.query(Movie).filter(Movie.id.in_(ranked_ids)).all()
+            } if ranked_ids else {}
+            movies = [movies_by_id[movie_id] for movie_id in ranked_ids if movie_id in movies_by_id]
+            self._snapshot = ([movie['id'] for movie in movies], movies, time.monotonic())
+
+            logger.info("🏆 Classement de popularité recalculé: %s films en %.2fs", len(movies), time.perf_counter() - started)
+            return len(movies)
+
+    def start(self, app):
+        """Démarre le recalcul périodique en arrière-plan (un thread par processus)."""
+        # Appelé par les requêtes froides concurrentes : un seul thread démarré
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, args=(app,), name='popularity-leaderboard', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _ensure_built(self):
+        """True si un classement est disponible ; sinon lance le premier calcul en arrière-plan."""
+        if self._snapshot[2] is not None:
+            return True
+        self.start(current_app._get_current_object())
+        return False
+
+    @staticmethod
+    def _fallback_query(limit):
+        # En attendant le premier calcul : popularité TMDB seule, en lecture
+        return Movie.query.filter(Movie.popularity.isnot(None)).order_by(desc(Movie.popularity)).limit(limit).all()
+
+    def _loop(self, app):
+        # Premier calcul immédiat, puis toutes les refresh_interval secondes
+        while not self._stop.is_set():
+            with app.app_context():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error("❌ Erreur lors du recalcul du classement de popularité: %s", e)
+            if self._stop.wait(self.refresh_interval):
+                break
+
+
+def _as_date(value):
+    """func.date renvoie une date sur PostgreSQL et une chaîne 'YYYY-MM-DD' sur SQLite."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+# Créer une instance du service
+popularity_leaderboard = PopularityLeaderboard()
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from database.db import db
+from repositories.movie_repository import (
+    get_stale_movie_ids, mark_movies_fetched, bulk_upsert_movies, try_lock_movie_refresh
+)
+from services.tmdb_client import tmdb_client, TokenBucket
+from services.tmdb_service import normalize_movie
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Âge au-delà duquel un film est resynchronisé avec TMDB
+MOVIE_REFRESH_TTL = timedelta(hours=float(os.getenv('MOVIE_REFRESH_TTL_HOURS', 24)))
+MOVIE_REFRESH_INTERVAL = float(os.getenv('MOVIE_REFRESH_INTERVAL', 60))
+MOVIE_REFRESH_BATCH_SIZE = int(os.getenv('MOVIE_REFRESH_BATCH_SIZE', 50))
+# Part du débit TMDB réservée au rafraîchissement, pour ne pas affamer les requêtes utilisateur
+MOVIE_REFRESH_RATE_PER_SECOND = float(os.getenv('MOVIE_REFRESH_RATE_PER_SECOND', 4))
+# Durée pendant laquelle un lot réservé n'est pas repris par un autre worker
+MOVIE_REFRESH_LEASE = timedelta(minutes=float(os.getenv('MOVIE_REFRESH_LEASE_MINUTES', 10)))
+
+# Nombre maximum d'IDs signalés en attente (les plus anciens signalements sont abandonnés)
+MAX_PENDING_HINTS = 10000
+
+
+class MovieRefresher:
+    """
+    Rafraîchissement stale-while-revalidate des métadonnées de films.
+
+    Les lectures servent toujours la ligne en base immédiatement ; un film
+    périmé lu par un utilisateur est seulement signalé (`hint`). Un thread
+    d'arrière-plan traite ensuite des lots prioritaires — films signalés,
+    puis jamais synchronisés, puis les plus populaires — à débit limité.
+    Sur PostgreSQL, un verrou consultatif sérialise la réservation des lots
+    entre workers gunicorn ; les appels TMDB se font ensuite sans verrou ni
+    transaction ouverte.
+    """
+
+    def __init__(self, client=None, ttl=MOVIE_REFRESH_TTL, batch_size=MOVIE_REFRESH_BATCH_SIZE,
+                 interval=MOVIE_REFRESH_INTERVAL, rate_per_second=MOVIE_REFRESH_RATE_PER_SECOND, workers=4,
+                 lease=MOVIE_REFRESH_LEASE):
+        self.client = (client or tmdb_client).for_batch_jobs()
+        self.ttl = ttl
+        self.lease = lease
+        self.batch_size = batch_size
+        self.interval = interval
+        self.workers = workers
+        self.bucket = TokenBucket(rate_per_second, max(1, rate_per_second))
+        self._hints = {}  # movie_id -> instant du signalement (ordre d'insertion = priorité)
+        self._hints_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._enabled = False  # Les signalements ne sont conservés que si le thread tourne
+
+    def is_stale(self, movie):
+        return movie.fetched_at is None or movie.fetched_at < datetime.utcnow() - self.ttl
+
+    def hint(self, movie_id):
+        """Signale un film à rafraîchir en priorité (appelable depuis un thread de requête)."""
+        if not self._enabled:
+            return
+        with self._hints_lock:
+            if movie_id in self._hints:
+                return
+            if len(self._hints) >= MAX_PENDING_HINTS:
+                self._hints.pop(next(iter(self._hints)))
+            self._hints[movie_id] = time.monotonic()
+
+    def hint_if_stale(self, movie):
+        """Signale le film s'il est périmé ; ne fait aucune requête."""
+        if movie is not None and self.is_stale(movie):
+            self.hint(movie.id)
+
+    def run_once(self):
+        """
+        Traite un lot de films périmés (à appeler dans un contexte d'application).
+
+        Trois phases : réservation du lot sous verrou consultatif (transaction
+        courte), appels TMDB sans transaction ouverte, puis écriture des
+        résultats dans une nouvelle transaction courte.
+
+        Returns:
+            Nombre de films rafraîchis
+        """
+        try:
+            movie_ids = self._claim_batch()
+            if not movie_ids:
+                return 0
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(self._fetch, movie_ids))
+
+            fetched_at = datetime.utcnow()
+            records = []
+            missing_ids = []
+            for movie_id, movie_data in zip(movie_ids, results):
+                if movie_data is False:
+                    continue  # Erreur transitoire : le film sera repris à l'expiration de la réservation
+                if movie_data is None or not movie_data.get('title'):
+                    missing_ids.append(movie_id)
+                    continue
+                record = normalize_movie(movie_data)
+                record['id'] = movie_id
+                record['fetched_at'] = fetched_at
+                records.append(record)
+
+            # Films supprimés de TMDB : on note la tentative pour ne pas boucler dessus
+            mark_movies_fetched(missing_ids, fetched_at)
+            bulk_upsert_movies(records)
+            # bulk_upsert_movies ne commit pas un lot vide (que des 404)
+            db.session.commit()
+
+            logger.info("🔄 %s films rafraîchis depuis TMDB (%s introuvables)", len(records), len(missing_ids))
+            return len(records)
+        except Exception as e:
+            db.session.rollback()
+            logger.error("❌ Erreur lors du rafraîchissement des films: %s", e)
+            return 0
+
+    def _claim_batch(self):
+        """
+        Choisit le prochain lot et le réserve, puis commit (ce qui libère le verrou).
+
+        La réservation avance fetched_at juste assez pour que les autres workers
+        ne reprennent pas ces films avant `lease` ; un film dont l'appel TMDB
+        échoue redevient donc éligible à l'expiration de la réservation.
+        """
+        try:
+            if not try_lock_movie_refresh():
+                return []
+            movie_ids = self._take_hints(self.batch_size)
+            remaining = self.batch_size - len(movie_ids)
+            if remaining > 0:
+                stale_before = datetime.utcnow() - self.ttl
+                movie_ids += get_stale_movie_ids(stale_before, remaining, exclude_ids=movie_ids)
+            mark_movies_fetched(movie_ids, datetime.utcnow() - self.ttl + self.lease)
+            db.session.commit()
+            return movie_ids
+        finally:
+            # Aucune transaction ne doit rester ouverte pendant les appels HTTP
+            db.session.rollback()
+
+    def start(self, app):
+        """Démarre le thread de rafraîchissement (un par processus)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._enabled = True
+        self._thread = threading.Thread(target=self._loop, args=(app,), name='movie-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._enabled = False
+        self._stop.set()
+
+    def _loop(self, app):
+        while not self._stop.is_set():
+            with app.app_context():
+                refreshed = self.run_once()
+                db.session.remove()
+            # Enchaîne les lots tant qu'il reste du travail, sinon attend l'intervalle
+            if refreshed < self.batch_size:
+                self._stop.wait(self.interval)
+
+    def _take_hints(self, limit):
+        with self._hints_lock:
+            movie_ids = list(self._hints)[:limit]
+            for movie_id in movie_ids:
+                del self._hints[movie_id]
+        return movie_ids
+
+    def _fetch(self, movie_id):
+        """Retourne le JSON TMDB, None si le film n'existe plus, False en cas d'erreur."""
+        self.bucket.acquire()
+        try:
+            return self.client.get(f"/movie/{int(movie_id)}", use_cache=False)
+        except requests.exceptions.RequestException as e:
+            logger.warning("⚠️ Rafraîchissement du film %s en échec: %s", movie_id, e)
+            return False
+
+
+# Créer une instance du service
+movie_refresher = MovieRefresher()
@@ -1,5 +1,15 @@
-from repositories.movie_repository import get_all_movies, get_movie_by_id, create_movie, update_movie, delete_movie
-from services.tmdb_service import get_movie_from_tmdb, get_or_create_movie as tmdb_get_or_create
+from repositories.movie_repository import (
+    get_all_movies, get_movie_by_id, create_movie, update_movie, delete_movie,
+    insert_movie_if_absent, lock_movie_id
+)
+from services.tmdb_service import get_movie_from_tmdb
+from services.movie_refresh_service import movie_refresher
+from utils.single_flight import SingleFlight
+from database.db import db
+from datetime import datetime
+
+# Déduplique les créations concurrentes d'un même film dans ce processus
+movie_creation_flight = SingleFlight()
 
 def get_movies():
     try:
@@ -10,7 +20,10 @@ def get_movies():
 
 def get_movie(movie_id):
     try:
-        return get_movie_by_id(movie_id)
+        movie = get_movie_by_id(movie_id)
+        # Sert la ligne en base tout de suite ; le rafraîchissement TMDB se fait en arrière-plan
+        movie_refresher.hint_if_stale(movie)
+        return movie
     except Exception as e:
         print(f"Erreur lors de la récupération du film {movie_id} : {e}")
         return None
@@ -24,32 +37,62 @@ def add_movie(title, overview, poster_path, genres, popularity, release_date):
         print(f"Erreur lors de l'ajout du film : {e}")
         return None
 
-# services/movie_service.py (version corrigée)
 def get_or_create_movie(movie_id):
+    """
+    Retourne (film, créé), en créant le film depuis TMDB s'il est absent.
+    
+    Les appels simultanés pour un même ID inconnu partagent un seul appel
+    TMDB et une seule insertion : par processus via SingleFlight, entre
+    workers via un verrou consultatif et INSERT ... ON CONFLICT. L'appel
+    TMDB se fait sans transaction ouverte ; seul l'INSERT est verrouillé.
+    """
     try:
+        # "550" et 550 désignent le même film : une seule clé SingleFlight
+        movie_id = int(movie_id)
+        
         # Vérifie si le film existe déjà en base
         movie = get_movie(movie_id)
         if movie:
             return movie, False
-       
-        tmdb_data = get_movie_from_tmdb(movie_id)
-        if not tmdb_data:
-            return None, False
         
-        # Crée le film en base
-        new_movie= create_movie(
+        # Termine la transaction de lecture : aucune connexion tenue pendant l'appel TMDB
+        db.session.commit()
+        created, shared = movie_creation_flight.do(movie_id, _fetch_and_insert_movie, movie_id)
+        
+        # Chaque thread relit la ligne dans sa propre session
+        movie = get_movie(movie_id)
+        if not movie:
+            return None, False
+        return movie, created and not shared
+    except Exception as e:
+        print(f"Erreur get_or_create_movie: {str(e)}")
+        return None, False
+
+def _fetch_and_insert_movie(movie_id):
+    """Récupère un film sur TMDB et l'insère ; retourne True si cette transaction l'a créé."""
+    # Hors transaction : les relances et l'attente du limiteur TMDB ne tiennent ni connexion ni verrou
+    tmdb_data = get_movie_from_tmdb(movie_id)
+    if not tmdb_data or not tmdb_data.get('title'):
+        return False
+    
+    try:
+        # Verrou et ON CONFLICT autour de la seule insertion : un autre worker a pu créer le film entre-temps
+        lock_movie_id(movie_id)
+        inserted = insert_movie_if_absent(
             id=movie_id,
             title=tmdb_data['title'],
             overview=tmdb_data['overview'],
             poster_path=tmdb_data['poster_path'],
             genres=tmdb_data['genres'],
             popularity=tmdb_data['popularity'],
-            release_date=tmdb_data['release_date']
+            release_date=tmdb_data['release_date'],
+            fetched_at=datetime.utcnow()
         )
-        return new_movie ,True
-    except Exception as e:
-        print(f"Erreur get_or_create_movie: {str(e)}")
-        return None, False
+        db.session.commit()
+        return inserted
+    except Exception:
+        db.session.rollback()
+        raise
 
 def edit_movie(movie_id, title, overview, poster_path, genres, popularity, release_date):
     try:
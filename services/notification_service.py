@@ -16,7 +16,7 @@ class NotificationService:
         try:
             # Éviter les auto-notifications
             if comment.user_id == liker_user.id:
-                logger.info(f"🚫 Auto-notification évitée: {liker_user.fullname} a liké son propre commentaire")
+                logger.info("🚫 Auto-notification évitée: %s a liké son propre commentaire", liker_user.fullname)
                 return None
             
             # Vérifier si une notification similaire existe déjà (éviter le spam)
@@ -31,7 +31,7 @@ class NotificationService:
             ).first()
             
             if existing:
-                logger.info(f"🔄 Notification de like déjà existante, mise à jour de la date")
+                logger.info("🔄 Notification de like déjà existante, mise à jour de la date")
                 existing.created_at = db.func.now()
                 existing.read_status = False
                 db.session.commit()
@@ -63,7 +63,7 @@ class NotificationService:
             )
             
             if notification:
-                logger.info(f"✅ Notification de like créée: {liker_user.fullname} -> {comment.user.fullname}")
+                logger.info("✅ Notification de like créée: %s -> %s", liker_user.fullname, comment.user.fullname)
                 return notification
             else:
                 logger.error(f"❌ Échec de création de notification de like")
@@ -79,7 +79,7 @@ class NotificationService:
         try:
             # Éviter les auto-notifications
             if parent_comment.user_id == replier_user.id:
-                logger.info(f"🚫 Auto-notification évitée: {replier_user.fullname} a répondu à son propre commentaire")
+                logger.info("🚫 Auto-notification évitée: %s a répondu à son propre commentaire", replier_user.fullname)
                 return None
             
             # Récupérer le titre du film si possible
@@ -109,7 +109,7 @@ class NotificationService:
             )
             
             if notification:
-                logger.info(f"✅ Notification de réponse créée: {replier_user.fullname} -> {parent_comment.user.fullname}")
+                logger.info("✅ Notification de réponse créée: %s -> %s", replier_user.fullname, parent_comment.user.fullname)
                 return notification
             else:
                 logger.error(f"❌ Échec de création de notification de réponse")
@@ -163,7 +163,7 @@ class NotificationService:
             if notification:
                 notification.read_status = True
                 db.session.commit()
-                logger.info(f"✅ Notification {notification_id} marquée comme lue")
+                logger.info("✅ Notification %s marquée comme lue", notification_id)
                 return True
             return False
         except Exception as e:
@@ -176,7 +176,7 @@ class NotificationService:
         try:
             updated = Notification.query.filter_by(user_id=user_id, read_status=False).update({'read_status': True})
             db.session.commit()
-            logger.info(f"✅ {updated} notifications marquées comme lues pour l'utilisateur {user_id}")
+            logger.info("✅ %s notifications marquées comme lues pour l'utilisateur %s", updated, user_id)
             return updated
         except Exception as e:
             logger.error(f"❌ Erreur lors du marquage des notifications: {str(e)}")
@@ -190,7 +190,7 @@ class NotificationService:
             if notification:
                 db.session.delete(notification)
                 db.session.commit()
-                logger.info(f"🗑️ Notification {notification_id} supprimée")
+                logger.info("🗑️ Notification %s supprimée", notification_id)
                 return True
             return False
         except Exception as e:
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_CACHE_SIZE = int(os.getenv('RECOMMENDATION_CACHE_SIZE', 10000))
+# Âge maximal optionnel d'une entrée (secondes, 0 = aucun) : l'invalidation repose sur les versions
+RECOMMENDATION_CACHE_MAX_AGE = float(os.getenv('RECOMMENDATION_CACHE_MAX_AGE', 0))
+
+
+class RecommendationCache:
+    """
+    Cache LRU des recommandations, une entrée par utilisateur.
+
+    Une entrée n'est valide que pour la version des modèles et la version
+    d'interactions de l'utilisateur (users.interaction_version) avec
+    lesquelles elle a été calculée : un like, un ajout à la watchlist ou un
+    commentaire incrémente la version en base, et l'entrée suivante est
+    recalculée, dans tous les workers, sans deviner de TTL.
+    """
+
+    def __init__(self, max_entries=RECOMMENDATION_CACHE_SIZE, max_age=RECOMMENDATION_CACHE_MAX_AGE):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()  # user_id -> (clé de version, instant, profondeur demandée, résultats)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, model_version, interaction_version, limit):
+        """
+        Les `limit` premières recommandations en cache, ou None.
+
+        Une liste plus courte que `limit` reste un succès si elle a été
+        calculée pour une profondeur au moins égale : elle était complète.
+        """
+        version = (model_version, interaction_version)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if (entry is None or entry[0] != version or entry[2] < limit
+                    or (self.max_age and time.monotonic() - entry[1] > self.max_age)):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[3][:limit]
+
+    def put(self, user_id, model_version, interaction_version, results, depth):
+        """Enregistre les recommandations calculées pour une profondeur `depth` (au plus depth résultats)."""
+        with self._lock:
+            self._entries[user_id] = ((model_version, interaction_version), time.monotonic(), depth, results)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+# Créer une instance du service
+recommendation_cache = RecommendationCache()
@@ -0,0 +1,362 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from flask import current_app, has_app_context
+from utils.metrics import RECOMMENDATION_STAGE_DURATION
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Budget total d'une recommandation : au-delà, les générateurs restants sont sautés
+PIPELINE_BUDGET_MS = float(os.getenv('RECOMMENDATION_BUDGET_MS', 250))
+# Nombre de candidats demandés à chaque générateur
+CANDIDATES_PER_GENERATOR = int(os.getenv('RECOMMENDATION_CANDIDATES', 200))
+# Exécution concurrente des étages indépendants (NumPy et les pilotes SQL relâchent le GIL)
+RECOMMENDATION_CONCURRENT = os.getenv('RECOMMENDATION_CONCURRENT', '1') == '1'
+RECOMMENDATION_WORKERS = int(os.getenv('RECOMMENDATION_WORKERS', 4))
+# Attente maximale de l'historique, au-delà du budget : sans lui, pas de filtrage final possible
+HISTORY_TIMEOUT_MS = float(os.getenv('RECOMMENDATION_HISTORY_TIMEOUT_MS', 1000))
+
+# Pool partagé par toutes les requêtes du processus
+_executor = None
+_executor_lock = threading.Lock()
+# Étages soumis au pool et pas encore terminés (y compris ceux abandonnés par leur requête)
+_in_flight = 0
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=RECOMMENDATION_WORKERS, thread_name_prefix='recommendation')
+        return _executor
+
+
+def submit_stage(fn, *args):
+    """Soumet un étage au pool partagé en le comptant jusqu'à sa fin (ou son annulation)."""
+    global _in_flight
+    executor = get_executor()
+    with _executor_lock:
+        _in_flight += 1
+    future = executor.submit(fn, *args)
+    future.add_done_callback(_stage_finished)
+    return future
+
+
+def _stage_finished(future):
+    global _in_flight
+    with _executor_lock:
+        _in_flight -= 1
+
+
+def idle_workers():
+    """Threads du pool disponibles, une fois déduits les étages en cours ou en file."""
+    with _executor_lock:
+        return RECOMMENDATION_WORKERS - _in_flight
+
+
+class CandidateGenerator:
+    """
+    Source de candidats du premier étage.
+
+    `fn(context, limit)` retourne une liste de couples (movie_id, score) ;
+    les scores d'un générateur n'ont pas à être comparables à ceux des autres,
+    le réordonnancement les normalise. `ready()`, si fourni, indique si le
+    modèle du générateur est disponible : sinon le générateur est sauté.
+    """
+
+    def __init__(self, name, fn, budget_ms, limit=CANDIDATES_PER_GENERATOR, requires_history=False, ready=None):
+        self.name = name
+        self.fn = fn
+        self.budget_ms = budget_ms
+        self.limit = limit
+        self.requires_history = requires_history
+        self.ready = ready
+
+
+class RecommendationContext:
+    """État d'une requête de recommandation, partagé par les étages."""
+
+    def __init__(self, user_id, top_n):
+        self.user_id = user_id
+        self.top_n = top_n
+        self.started_at = time.perf_counter()
+        self.history = set()
+        self.candidates = {}  # nom du générateur -> {movie_id: score}
+        self.timings = {}  # nom de l'étage -> millisecondes
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started_at) * 1000
+
+
+class StageStats:
+    """Compteurs de latence cumulés d'un étage."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.over_budget = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'over_budget': self.over_budget,
+            'skipped': self.skipped,
+            'errors': self.errors
+        }
+
+
+class RecommendationPipeline:
+    """
+    Recommandation hybride en deux étages.
+
+    1. Génération : chaque générateur (contenu, collaboratif, popularité,
+       tendances) propose quelques centaines de candidats notés, dans la
+       limite de son budget de latence.
+    2. Réordonnancement : les candidats sont dédupliqués dans un ensemble,
+       l'historique de l'utilisateur est retiré, puis une matrice
+       candidats × caractéristiques est combinée par un produit avec le
+       vecteur de poids. Les caractéristiques sont enfichables (`add_feature`).
+
+    En mode concurrent, l'historique et les générateurs qui n'en dépendent
+    pas démarrent ensemble sur un pool de threads, chacun dans son propre
+    contexte d'application (donc sa propre session SQLAlchemy) ; la latence
+    est celle de l'étage le plus lent et non leur somme. Les générateurs
+    encore en cours à l'épuisement du budget sont abandonnés (annulés s'ils
+    n'ont pas encore démarré) ; l'historique est attendu au plus
+    `history_timeout_ms`, au-delà la recommandation échoue (TimeoutError).
+    Les générateurs dont le modèle n'est pas prêt ne sont pas lancés.
+
+    Les durées de chaque étage sont cumulées dans `stage_stats()`.
+    """
+
+    def __init__(self, service, budget_ms=PIPELINE_BUDGET_MS, concurrent=RECOMMENDATION_CONCURRENT,
+                 history_timeout_ms=HISTORY_TIMEOUT_MS):
+        self.service = service
+        self.budget_ms = budget_ms
+        self.history_timeout_ms = history_timeout_ms
+        self.concurrent = concurrent
+        self.generators = []
+        self.features = []  # (nom, fonction(context, ids) -> np.ndarray, poids)
+        self._stats = defaultdict(StageStats)
+        self._stats_lock = threading.Lock()
+        self._register_defaults()
+
+    def add_generator(self, generator):
+        self.generators.append(generator)
+
+    def add_feature(self, name, fn, weight):
+        """Ajoute une caractéristique : fn(context, ids) retourne un tableau de len(ids) valeurs."""
+        self.features.append((name, fn, weight))
+
+    def recommend(self, user_id, top_n=20):
+        """
+        Returns:
+            Liste d'IDs de films recommandés, du plus pertinent au moins pertinent
+        """
+        context = RecommendationContext(user_id, top_n)
+        # Un étage démarré ne peut pas être interrompu : si des étages abandonnés par
+        # d'autres requêtes occupent le pool, on les contourne en exécutant en série
+        if self.concurrent and has_app_context() and idle_workers() >= 2:
+            self._generate_concurrently(context)
+        else:
+            context.history = self._load_history(context)
+            self._generate(context)
+        movie_ids = self._run_stage(context, 'rerank', lambda: self._rerank(context)) or []
+
+        context.timings['total'] = context.elapsed_ms
+        self._record('total', context.timings['total'], self.budget_ms)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("⏱️ Recommandations utilisateur %s: %s", user_id, self._format_timings(context.timings))
+        return movie_ids
+
+    def stage_stats(self):
+        with self._stats_lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def _generate(self, context):
+        for generator in self.generators:
+            if generator.requires_history and not context.history:
+                continue
+            if not self._is_ready(generator):
+                continue
+            if context.elapsed_ms >= self.budget_ms:
+                # Budget épuisé : on sert avec les candidats déjà obtenus
+                with self._stats_lock:
+                    self._stats[generator.name].skipped += 1
+                continue
+            candidates = self._run_stage(
+                context, generator.name,
+                lambda: generator.fn(context, generator.limit),
+                budget_ms=generator.budget_ms
+            )
+            context.candidates[generator.name] = dict(candidates or [])
+
+    def _generate_concurrently(self, context):
+        app = current_app._get_current_object()
+
+        def submit(name, fn):
+            future = submit_stage(_in_app_context, app, fn)
+            pending[future] = name
+
+        pending = {}
+        submit('history', lambda: self._load_history(context))
+        for generator in self.generators:
+            if not generator.requires_history and self._is_ready(generator):
+                submit(generator.name, self._generator_call(context, generator))
+
+        history_loaded = False
+        while pending:
+            remaining_ms = self.budget_ms - context.elapsed_ms
+            if not history_loaded:
+                # L'historique conditionne le filtrage final : attendu au-delà du budget, dans une limite
+                remaining_ms = max(remaining_ms, self.history_timeout_ms - context.elapsed_ms)
+            done, _ = wait(list(pending), timeout=max(remaining_ms, 0) / 1000, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                name = pending.pop(future)
+                if name == 'history':
+                    context.history = future.result() or set()
+                    history_loaded = True
+                    # Les générateurs qui partent de l'historique démarrent dès qu'il est connu
+                    for generator in self.generators:
+                        if generator.requires_history and context.history and self._is_ready(generator):
+                            submit(generator.name, self._generator_call(context, generator))
+                else:
+                    context.candidates[name] = dict(future.result() or [])
+
+        for future, name in pending.items():
+            # Un étage encore en file ne prendra pas de thread du pool ; un étage démarré va à son terme
+            future.cancel()
+            with self._stats_lock:
+                self._stats[name].skipped += 1
+            logger.warning("⚠️ Étage %s abandonné: budget de %.0fms épuisé", name, self.budget_ms)
+        if not history_loaded:
+            raise TimeoutError(f"Historique non chargé en {self.history_timeout_ms:.0f}ms")
+
+    def _is_ready(self, generator):
+        """Saute (et compte) un générateur dont le modèle n'est pas encore disponible."""
+        if generator.ready is None or generator.ready():
+            return True
+        with self._stats_lock:
+            self._stats[generator.name].skipped += 1
+        return False
+
+    def _generator_call(self, context, generator):
+        return lambda: self._run_stage(
+            context, generator.name,
+            lambda: generator.fn(context, generator.limit),
+            budget_ms=generator.budget_ms
+        )
+
+    def _load_history(self, context):
+        return self._run_stage(context, 'history', lambda: set(self.service.get_user_history(context.user_id))) or set()
+
+    def _rerank(self, context):
+        candidate_ids = set()
+        for candidates in context.candidates.values():
+            candidate_ids.update(candidates)
+        candidate_ids -= context.history
+        if not candidate_ids:
+            return []
+
+        ids = np.fromiter(candidate_ids, dtype=np.int64, count=len(candidate_ids))
+        features = np.column_stack([fn(context, ids) for _, fn, _ in self.features])
+        weights = np.array([weight for _, _, weight in self.features], dtype=np.float64)
+        scores = features @ weights
+
+        top_n = min(context.top_n, len(ids))
+        top = np.argpartition(-scores, top_n - 1)[:top_n]
+        top = top[np.lexsort((ids[top], -scores[top]))]
+        return ids[top].tolist()
+
+    def _run_stage(self, context, name, fn, budget_ms=None):
+        started = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            with self._stats_lock:
+                self._stats[name].errors += 1
+            logger.error("❌ Étage %s de la recommandation en échec: %s", name, e)
+            return None
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            context.timings[name] = elapsed_ms
+            self._record(name, elapsed_ms, budget_ms)
+
+    def _record(self, name, elapsed_ms, budget_ms):
+        RECOMMENDATION_STAGE_DURATION.observe(elapsed_ms / 1000, stage=name)
+        with self._stats_lock:
+            stats = self._stats[name]
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if budget_ms is not None and elapsed_ms > budget_ms:
+                stats.over_budget += 1
+                logger.warning("⚠️ Étage %s hors budget: %.1fms > %.0fms", name, elapsed_ms, budget_ms)
+
+    def _register_defaults(self):
+        service = self.service
+
+        def popular(context, limit):
+            movie_ids = service.get_popularity_recommendations(limit)
+            # Score décroissant avec le rang dans le classement
+            return [(movie_id, 1.0 - rank / max(len(movie_ids), 1)) for rank, movie_id in enumerate(movie_ids)]
+
+        def trending(context, limit):
+            from services.trending_service import trending_tracker
+            return trending_tracker.top_ids('24h', limit)
+
+        # Les modèles s'entraînent en arrière-plan : une requête ne déclenche jamais d'entraînement
+        self.add_generator(CandidateGenerator(
+            'collaborative', lambda context, limit: service.get_collaborative_scores(context.user_id, limit), 100,
+            ready=service.collaborative_model_ready
+        ))
+        self.add_generator(CandidateGenerator(
+            'content', lambda context, limit: service.get_content_based_scores(list(context.history), limit), 50,
+            requires_history=True, ready=service.content_model_ready
+        ))
+        self.add_generator(CandidateGenerator('trending', trending, 20))
+        self.add_generator(CandidateGenerator('popular', popular, 20))
+
+        # Mêmes proportions que l'ancien mélange 0.7 / 0.3 ; popularité et tendances départagent et complètent
+        self.add_feature('collaborative', generator_score_feature('collaborative'), 0.7)
+        self.add_feature('content', generator_score_feature('content'), 0.3)
+        self.add_feature('trending', generator_score_feature('trending'), 0.1)
+        self.add_feature('popular', generator_score_feature('popular'), 0.05)
+
+    @staticmethod
+    def _format_timings(timings):
+        return ', '.join(f"{name}={elapsed:.1f}ms" for name, elapsed in timings.items())
+
+
+def _in_app_context(app, fn):
+    """Exécute fn dans un contexte d'application dédié au thread (session libérée à la sortie)."""
+    with app.app_context():
+        return fn()
+
+
+def generator_score_feature(name):
+    """
+    Caractéristique : score d'un générateur ramené dans [0, 1] (0 si le film n'en vient pas).
+    """
+    def feature(context, ids):
+        candidates = context.candidates.get(name)
+        if not candidates:
+            return np.zeros(len(ids))
+        values = np.fromiter((candidates.get(movie_id, 0.0) for movie_id in ids.tolist()),
+                             dtype=np.float64, count=len(ids))
+        values = np.maximum(values, 0.0)
+        peak = values.max()
+        return values / peak if peak > 0 else values
+    return feature
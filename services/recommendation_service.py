@@ -1,25 +1,132 @@
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.decomposition import TruncatedSVD
 from models.movie import Movie
 from models.like import Like
 from models.watchlist import Watchlist
 from models.comment import Comment
 from database.db import db
-from sqlalchemy import func, desc, text
+from repositories.click_repository import get_all_click_rollups
+from repositories.movie_repository import get_movies_by_ids
+from sqlalchemy import desc, select, union_all
+from datetime import datetime
+from services.ann_index import build_index, load_index
+from services.recommendation_pipeline import RecommendationPipeline
+from services.recommendation_cache import recommendation_cache
+from repositories.user_repository import get_interaction_version
+from utils.single_flight import SingleFlight
+from flask import current_app, has_app_context
+import os
+import threading
+import time
 import logging
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Signal implicite des clics : poids par clic récent, plafonné sous le poids d'un commentaire
+CLICK_WEIGHT = 0.5
+CLICK_MAX_WEIGHT = 1.5
+# Les agrégats dont le score décroissant est devenu négligeable sont ignorés
+CLICK_MIN_SCORE = 0.05
+
+# Dimensions des embeddings indexés pour la recherche de plus proches voisins
+CONTENT_EMBEDDING_DIM = 128
+COLLAB_EMBEDDING_DIM = 64
+# Nombre d'utilisateurs similaires utilisés par le filtrage collaboratif
+COLLAB_NEIGHBORS = 50
+# Profondeur minimale calculée et mise en cache par utilisateur
+RECOMMENDATION_CACHE_DEPTH = 20
+# Répertoire de sauvegarde des index (rechargés en mmap et partagés entre workers)
+ANN_INDEX_DIR = os.getenv('ANN_INDEX_DIR')
+# Délai avant de relancer un entraînement d'arrière-plan qui n'a pas abouti
+MODEL_WARMUP_RETRY_SECONDS = float(os.getenv('MODEL_WARMUP_RETRY_SECONDS', 60))
+
 class RecommendationService:
-    def __init__(self):
-        self.content_based_model = None
+    def __init__(self, index_dir=ANN_INDEX_DIR):
+        self.index_dir = index_dir
+        self.content_based_model = None  # Index ANN des embeddings de contenu des films
         self.collaborative_model = None
         self.movie_features = None
         self.movie_ids = None
+        # Incrémentée à chaque (ré)entraînement : invalide le cache de recommandations
+        self.model_version = 0
+        # Un seul entraînement par modèle à la fois dans le processus
+        self._training = SingleFlight()
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread = None
+        self._warmup_retry_at = 0.0
+        self.pipeline = RecommendationPipeline(self)
+    
+    def ensure_content_model(self):
+        """Modèle de contenu disponible ? Ne l'entraîne jamais dans l'appelant (voir content_model_ready)"""
+        return self.content_model_ready()
+    
+    def ensure_collaborative_model(self):
+        """Modèle collaboratif disponible ? Ne l'entraîne jamais dans l'appelant (voir collaborative_model_ready)"""
+        return self.collaborative_model_ready()
+    
+    def _load_or_train_content_model(self):
+        """Recharge l'index sauvegardé ou entraîne le modèle de contenu, une seule fois pour les appels simultanés"""
+        if self.content_based_model is not None:
+            return True
+        ready, _ = self._training.do('content', lambda: (
+            self.content_based_model is not None or self._load_content_index() or self.train_content_based_model()
+        ))
+        return ready
+    
+    def _load_or_train_collaborative_model(self):
+        """Entraîne le modèle collaboratif s'il est absent, une seule fois pour les appels simultanés"""
+        if self.collaborative_model is not None:
+            return True
+        ready, _ = self._training.do('collaborative', lambda: (
+            self.collaborative_model is not None or self.train_collaborative_model()
+        ))
+        return ready
+    
+    def content_model_ready(self):
+        """Modèle de contenu disponible ; sinon lance son chargement en arrière-plan, sans attendre"""
+        if self.content_based_model is None:
+            self.warm_up()
+            return False
+        return True
+    
+    def collaborative_model_ready(self):
+        """Modèle collaboratif disponible ; sinon lance son entraînement en arrière-plan, sans attendre"""
+        if self.collaborative_model is None:
+            self.warm_up()
+            return False
+        return True
+    
+    def warm_up(self, app=None):
+        """
+        Charge ou entraîne les modèles absents dans un thread d'arrière-plan
+        (un seul à la fois par processus). Un échec n'est retenté qu'après
+        MODEL_WARMUP_RETRY_SECONDS.
+        """
+        if app is None:
+            if not has_app_context():
+                return
+            app = current_app._get_current_object()
+        with self._warmup_lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return
+            if time.monotonic() < self._warmup_retry_at:
+                return
+            self._warmup_thread = threading.Thread(
+                target=self._warm_up, args=(app,), name='recommendation-warmup', daemon=True
+            )
+            self._warmup_thread.start()
+    
+    def _warm_up(self, app):
+        with app.app_context():
+            try:
+                content_ready = self._load_or_train_content_model()
+                collaborative_ready = self._load_or_train_collaborative_model()
+            finally:
+                db.session.remove()
+        if not (content_ready and collaborative_ready):
+            self._warmup_retry_at = time.monotonic() + MODEL_WARMUP_RETRY_SECONDS
     
     def train_content_based_model(self):
         """Entraîne le modèle de recommandation basé sur le contenu"""
@@ -48,18 +155,21 @@ class RecommendationService:
             tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
             tfidf_matrix = tfidf.fit_transform(df['content'].fillna(''))
             
-            # Calculer la similarité cosinus entre les films
-            cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
+            # Indexer des embeddings denses plutôt que la matrice de similarité n × n
+            embeddings = _embed(tfidf_matrix, CONTENT_EMBEDDING_DIM)
             
             # Stocker les résultats pour une utilisation ultérieure
-            self.content_based_model = cosine_sim
+            self.content_based_model = build_index(df['id'].tolist(), embeddings, metric='cosine')
             self.movie_ids = df['id'].tolist()
+            if self.index_dir:
+                self.content_based_model.save(os.path.join(self.index_dir, 'content'))
+            self.model_version += 1
             
-            logger.info(f"Modèle basé sur le contenu entraîné avec succès sur {len(movies)} films")
+            logger.info("Modèle basé sur le contenu entraîné avec succès sur %s films", len(movies))
             return True
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'entraînement du modèle basé sur le contenu: {str(e)}")
+            logger.error("Erreur lors de l'entraînement du modèle basé sur le contenu: %s", e)
             return False
     
     def train_collaborative_model(self):
@@ -69,8 +179,9 @@ class RecommendationService:
             likes = Like.query.all()
             watchlist_items = Watchlist.query.all()
             comments = Comment.query.all()
+            click_matrix = self._build_click_matrix()
             
-            if not (likes or watchlist_items or comments):
+            if not (likes or watchlist_items or comments) and click_matrix is None:
                 logger.warning("Aucune interaction utilisateur-film trouvée pour l'entraînement du modèle collaboratif")
                 return False
             
@@ -101,12 +212,12 @@ class RecommendationService:
                     'weight': 2.0  # Poids moyen-faible pour les commentaires
                 })
             
-            if not interactions:
+            if not interactions and click_matrix is None:
                 logger.warning("Aucune interaction à traiter")
                 return False
             
             # Créer un DataFrame
-            df_interactions = pd.DataFrame(interactions)
+            df_interactions = pd.DataFrame(interactions, columns=['user_id', 'movie_id', 'weight'])
             
             # Créer une matrice utilisateur-film
             user_movie_matrix = df_interactions.pivot_table(
@@ -117,194 +228,219 @@ class RecommendationService:
                 fill_value=0
             )
             
-            # Calculer la similarité entre les utilisateurs
-            user_similarity = cosine_similarity(user_movie_matrix)
+            # Ajouter le signal des clics (agrégé par click_rollup_service) aux interactions explicites
+            if click_matrix is not None:
+                user_movie_matrix = user_movie_matrix.add(click_matrix, fill_value=0).fillna(0)
+            
+            # Indexer les utilisateurs pour retrouver leurs plus proches voisins (cosinus)
+            user_index = build_index(
+                user_movie_matrix.index.tolist(),
+                _embed(user_movie_matrix.values, COLLAB_EMBEDDING_DIM),
+                metric='cosine'
+            )
             
             # Stocker les résultats
             self.collaborative_model = {
-                'user_similarity': user_similarity,
+                'user_index': user_index,
                 'user_movie_matrix': user_movie_matrix
             }
+            self.model_version += 1
             
-            logger.info(f"Modèle collaboratif entraîné avec succès sur {len(df_interactions)} interactions")
+            logger.info("Modèle collaboratif entraîné avec succès sur %s interactions", len(df_interactions))
             return True
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'entraînement du modèle collaboratif: {str(e)}")
+            logger.error("Erreur lors de l'entraînement du modèle collaboratif: %s", e)
             return False
     
+    def _load_content_index(self):
+        """Recharge en mmap l'index de contenu sauvegardé par un autre processus, s'il existe."""
+        path = os.path.join(self.index_dir, 'content') if self.index_dir else None
+        if not path or not os.path.exists(os.path.join(path, 'meta.json')):
+            return False
+        try:
+            self.content_based_model = load_index(path, mmap=True)
+            self.model_version += 1
+            logger.info("Index de contenu rechargé depuis %s (%s films)", path, len(self.content_based_model))
+            return True
+        except Exception as e:
+            logger.warning("Impossible de recharger l'index de contenu: %s", e)
+            return False
+    
+    def _build_click_matrix(self):
+        """
+        Matrice utilisateur-film du signal de clic, à partir des agrégats click_rollups.
+        
+        Chaque score est ramené à l'instant présent (décroissance exponentielle)
+        puis converti en poids plafonné à CLICK_MAX_WEIGHT.
+        
+        Returns:
+            DataFrame utilisateurs × films, ou None sans clic exploitable
+        """
+        from services.click_rollup_service import CLICK_HALF_LIFE_DAYS
+        
+        rollups = get_all_click_rollups()
+        if not rollups:
+            return None
+        
+        df_clicks = pd.DataFrame(rollups, columns=['user_id', 'movie_id', 'score', 'updated_at'])
+        now = datetime.utcnow()
+        ages = (now - pd.to_datetime(df_clicks['updated_at'])).dt.total_seconds().to_numpy()
+        decayed = df_clicks['score'].to_numpy() * 0.5 ** (np.maximum(ages, 0) / (CLICK_HALF_LIFE_DAYS * 86400.0))
+        df_clicks['weight'] = np.minimum(CLICK_WEIGHT * decayed, CLICK_MAX_WEIGHT)
+        df_clicks = df_clicks[decayed >= CLICK_MIN_SCORE]
+        if df_clicks.empty:
+            return None
+        
+        return df_clicks.pivot_table(
+            index='user_id',
+            columns='movie_id',
+            values='weight',
+            aggfunc='sum',
+            fill_value=0
+        )
+    
     def get_content_based_recommendations(self, movie_ids, top_n=10):
         """
         Obtient des recommandations basées sur le contenu pour une liste de films
         """
-        if self.content_based_model is None:
-            success = self.train_content_based_model()
-            if not success:
-                return []
-        
-        # Initialiser un score pour chaque film
-        sim_scores = np.zeros(len(self.movie_ids))
+        return [movie_id for movie_id, _ in self.get_content_based_scores(movie_ids, top_n)]
+    
+    def get_content_based_scores(self, movie_ids, top_n=10):
+        """
+        Candidats basés sur le contenu avec leur score de similarité
         
-        # Pour chaque film d'entrée, ajouter sa similarité avec tous les autres films
-        for movie_id in movie_ids:
-            try:
-                idx = self.movie_ids.index(movie_id)
-                sim_scores += self.content_based_model[idx]
-            except (ValueError, IndexError):
-                # Ignorer les films qui ne sont pas dans notre modèle
-                continue
+        Returns:
+            Liste de tuples (movie_id, score) par score décroissant
+        """
+        if not self.ensure_content_model():
+            return []
         
-        # Créer une liste de tuples (id du film, score de similarité)
-        movie_scores = list(zip(self.movie_ids, sim_scores))
+        index = self.content_based_model
         
-        # Trier par score de similarité
-        movie_scores = sorted(movie_scores, key=lambda x: x[1], reverse=True)
+        # La somme des similarités cosinus aux films d'entrée est le produit scalaire
+        # avec la somme de leurs vecteurs normalisés : une seule requête à l'index
+        known_movies = [movie_id for movie_id in movie_ids if movie_id in index]
+        if not known_movies:
+            return []
+        query = np.sum([index.vector(movie_id) for movie_id in known_movies], axis=0)
         
-        # Filtrer les films d'entrée
-        movie_scores = [(movie_id, score) for movie_id, score in movie_scores if movie_id not in movie_ids]
+        # Demander assez de voisins pour compenser le filtrage des films d'entrée
+        input_movies = set(movie_ids)
+        candidate_ids, candidate_scores = index.search(query, k=top_n + len(known_movies))
         
         # Retourner les top_n films
-        top_movies = [movie_id for movie_id, _ in movie_scores[:top_n]]
-        
-        return top_movies
+        return [
+            (movie_id, score) for movie_id, score in zip(candidate_ids, candidate_scores)
+            if movie_id not in input_movies
+        ][:top_n]
     
     def get_collaborative_recommendations(self, user_id, top_n=10):
         """
         Obtient des recommandations basées sur le filtrage collaboratif pour un utilisateur
         """
-        if self.collaborative_model is None:
-            success = self.train_collaborative_model()
-            if not success:
-                return []
+        return [movie_id for movie_id, _ in self.get_collaborative_scores(user_id, top_n)]
+    
+    def get_collaborative_scores(self, user_id, top_n=10):
+        """
+        Candidats collaboratifs avec leur score (moyenne pondérée des voisins)
         
-        user_similarity = self.collaborative_model['user_similarity']
+        Returns:
+            Liste de tuples (movie_id, score) par score décroissant
+        """
+        if not self.ensure_collaborative_model():
+            return []
+        
+        user_index = self.collaborative_model['user_index']
         user_movie_matrix = self.collaborative_model['user_movie_matrix']
         
         # Vérifier si l'utilisateur est dans notre modèle
-        if user_id not in user_movie_matrix.index:
+        if user_id not in user_index:
             return []
         
-        # Trouver l'index de l'utilisateur
-        user_idx = list(user_movie_matrix.index).index(user_id)
-        
-        # Calculer les scores de recommandation
-        user_sim = user_similarity[user_idx]
+        # Plus proches voisins de l'utilisateur (lui compris), via l'index ANN
+        neighbor_ids, neighbor_sims = user_index.search(user_index.vector(user_id), k=COLLAB_NEIGHBORS + 1)
+        user_sim = np.asarray(neighbor_sims)
+        neighbor_rows = user_movie_matrix.index.get_indexer(neighbor_ids)
         
         # Pondérer les films par similarité utilisateur
-        weighted_scores = user_sim.reshape(-1, 1) * user_movie_matrix.values
+        weighted_scores = user_sim.reshape(-1, 1) * user_movie_matrix.values[neighbor_rows]
         
         # Calculer le score moyen pour chaque film
         scores = np.sum(weighted_scores, axis=0) / (np.sum(user_sim) + 1e-10)
         
-        # Créer un DataFrame avec les scores
-        movie_scores = pd.DataFrame({
-            'movie_id': user_movie_matrix.columns,
-            'score': scores
-        })
-        
         # Filtrer les films que l'utilisateur a déjà vus
-        user_movies = user_movie_matrix.loc[user_id]
-        user_movies = user_movies[user_movies > 0].index.tolist()
-        movie_scores = movie_scores[~movie_scores['movie_id'].isin(user_movies)]
-        
-        # Trier par score
-        movie_scores = movie_scores.sort_values('score', ascending=False)
+        own_row = user_movie_matrix.values[user_movie_matrix.index.get_loc(user_id)]
+        scores = np.where(own_row > 0, -np.inf, scores)
         
-        # Retourner les top_n films
-        top_movies = movie_scores['movie_id'].tolist()[:top_n]
+        # Trier par score (sélection partielle des top_n)
+        top_n = min(top_n, int(np.isfinite(scores).sum()))
+        if top_n <= 0:
+            return []
+        top = np.argpartition(-scores, top_n - 1)[:top_n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        movie_ids = user_movie_matrix.columns.to_numpy()[top]
         
-        return top_movies
+        return [(int(movie_id), float(score)) for movie_id, score in zip(movie_ids, scores[top])]
     
     def get_popularity_recommendations(self, top_n=10):
         """
         Obtient des recommandations basées sur la popularité des films
         """
         try:
-            # Récupérer les films les plus populaires
-            popular_movies = Movie.query.order_by(desc(Movie.popularity)).limit(top_n).all()
-            return [movie.id for movie in popular_movies]
+            # Classement précalculé (popularité TMDB + interactions récentes)
+            from services.leaderboard_service import popularity_leaderboard
+            popular_ids = popularity_leaderboard.top_ids(top_n)
+            if popular_ids:
+                return popular_ids
+            
+            # Repli sur la base (index sur movies.popularity)
+            popular_movies = db.session.query(Movie.id).order_by(desc(Movie.popularity)).limit(top_n).all()
+            return [movie_id for (movie_id,) in popular_movies]
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération des films populaires: {str(e)}")
+            logger.error("Erreur lors de la récupération des films populaires: %s", e)
             return []
     
+    def get_user_history(self, user_id):
+        """
+        Films avec lesquels l'utilisateur a interagi (likes, watchlist, commentaires)
+        
+        Returns:
+            Ensemble d'IDs de films
+        """
+        # Une seule requête UNION ALL au lieu de trois allers-retours
+        history = union_all(
+            select(Like.movie_id).where(Like.user_id == user_id),
+            select(Watchlist.movie_id).where(Watchlist.user_id == user_id),
+            select(Comment.movie_id).where(Comment.user_id == user_id)
+        )
+        return {movie_id for (movie_id,) in db.session.execute(history)}
+    
     def get_hybrid_recommendations(self, user_id, top_n=20):
         """
         Combine les recommandations basées sur le contenu et le filtrage collaboratif
+        
+        Génération de candidats (contenu, collaboratif, popularité, tendances)
+        puis réordonnancement vectorisé : voir services/recommendation_pipeline.py
         """
         try:
-            # Récupérer les films aimés et dans la watchlist de l'utilisateur
-            liked_movies = db.session.query(Like.movie_id).filter(Like.user_id == user_id).all()
-            liked_movie_ids = [movie_id for (movie_id,) in liked_movies]
-            
-            watchlist_movies = db.session.query(Watchlist.movie_id).filter(Watchlist.user_id == user_id).all()
-            watchlist_movie_ids = [movie_id for (movie_id,) in watchlist_movies]
-            
-            # Récupérer les films commentés par l'utilisateur
-            commented_movies = db.session.query(Comment.movie_id).filter(Comment.user_id == user_id).all()
-            commented_movie_ids = [movie_id for (movie_id,) in commented_movies]
-            
-            # Combiner les listes
-            user_movies = list(set(liked_movie_ids + watchlist_movie_ids + commented_movie_ids))
-            
-            # Si l'utilisateur n'a pas d'historique, retourner des recommandations basées sur la popularité
-            if not user_movies:
-                logger.info(f"Aucun historique pour l'utilisateur {user_id}, utilisation des recommandations par popularité")
-                return self.get_popularity_recommendations(top_n)
-            
-            # Obtenir des recommandations basées sur le contenu
-            content_recs = self.get_content_based_recommendations(user_movies, top_n=top_n)
-            
-            # Obtenir des recommandations collaboratives
-            collab_recs = self.get_collaborative_recommendations(user_id, top_n=top_n)
-            
-            # Combiner les recommandations avec une pondération
-            # Donner plus de poids aux recommandations collaboratives si disponibles
-            all_recs = []
-            
-            if collab_recs:
-                all_recs.extend([(movie_id, 0.7) for movie_id in collab_recs])
-            
-            if content_recs:
-                all_recs.extend([(movie_id, 0.3) for movie_id in content_recs])
-            
-            # Si aucune recommandation n'est disponible, utiliser la popularité
-            if not all_recs:
-                return self.get_popularity_recommendations(top_n)
-            
-            # Agréger les scores pour les films qui apparaissent dans les deux listes
-            movie_scores = {}
-            for movie_id, weight in all_recs:
-                if movie_id in movie_scores:
-                    movie_scores[movie_id] += weight
-                else:
-                    movie_scores[movie_id] = weight
-            
-            # Trier par score
-            sorted_movies = sorted(movie_scores.items(), key=lambda x: x[1], reverse=True)
-            
-            # Retourner les top_n films uniques
-            unique_movies = []
-            for movie_id, _ in sorted_movies:
-                if movie_id not in unique_movies and movie_id not in user_movies:
-                    unique_movies.append(movie_id)
-                if len(unique_movies) >= top_n:
-                    break
-            
-            # Si nous n'avons pas assez de recommandations, compléter avec des films populaires
-            if len(unique_movies) < top_n:
-                popular_recs = self.get_popularity_recommendations(top_n)
-                for movie_id in popular_recs:
-                    if movie_id not in unique_movies and movie_id not in user_movies:
-                        unique_movies.append(movie_id)
-                    if len(unique_movies) >= top_n:
-                        break
-            
-            return unique_movies[:top_n]
+            return self.pipeline.recommend(user_id, top_n)
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération des recommandations hybrides: {str(e)}")
+            logger.error("Erreur lors de la génération des recommandations hybrides: %s", e)
             return self.get_popularity_recommendations(top_n)
 
+def _embed(matrix, dim):
+    """
+    Réduit une matrice (creuse ou dense) à au plus `dim` dimensions par SVD tronquée.
+    
+    Les petites matrices sont gardées telles quelles pour conserver une similarité exacte.
+    """
+    n_features = matrix.shape[1]
+    if n_features <= dim:
+        return matrix.toarray() if hasattr(matrix, 'toarray') else np.asarray(matrix, dtype=np.float32)
+    return TruncatedSVD(n_components=dim, random_state=42).fit_transform(matrix)
+
 # Créer une instance du service
 recommendation_service = RecommendationService()
 
@@ -316,54 +452,58 @@ def get_recommendations_for_user(user_id, limit=10):
         # Obtenir les IDs des films recommandés
         movie_ids = recommendation_service.get_hybrid_recommendations(user_id, top_n=limit)
         
-        # Récupérer les détails complets des films
-        # Utiliser une requête SQL brute pour éviter les problèmes de transaction
-        movies = []
-        if movie_ids:
-            # Utiliser une nouvelle session pour éviter les problèmes de transaction
-            with db.engine.connect() as conn:
-                for movie_id in movie_ids:
-                    result = conn.execute(text(f"SELECT * FROM movies WHERE id = {movie_id}"))
-                    movie_data = result.fetchone()
-                    if movie_data:
-                        # Créer un objet Movie à partir des données
-                        movie = Movie(
-                            id=movie_data[0],
-                            title=movie_data[1],
-                            overview=movie_data[2],
-                            poster_path=movie_data[3],
-                            genres=movie_data[4],
-                            popularity=movie_data[5],
-                            release_date=movie_data[6]
-                        )
-                        movies.append(movie)
+        # Récupérer les détails des films en une seule requête, dans l'ordre du classement
+        movies = get_movies_by_ids(movie_ids)
         
         if not movies:
-            # En cas d'erreur ou si aucun film n'est trouvé, retourner les films populaires
-            with db.engine.connect() as conn:
-                result = conn.execute(text(f"SELECT * FROM movies ORDER BY popularity DESC LIMIT {limit}"))
-                for row in result:
-                    movie = Movie(
-                        id=row[0],
-                        title=row[1],
-                        overview=row[2],
-                        poster_path=row[3],
-                        genres=row[4],
-                        popularity=row[5],
-                        release_date=row[6]
-                    )
-                    movies.append(movie)
+            # Si aucun film n'est trouvé, retourner les films populaires
+            movies = Movie.query.order_by(Movie.popularity.desc()).limit(limit).all()
         
         return movies
     except Exception as e:
-        logger.error(f"Erreur lors de la récupération des recommandations: {str(e)}")
+        logger.error("Erreur lors de la récupération des recommandations: %s", e)
         # En cas d'erreur, retourner une liste vide
         return []
 
+def get_recommendation_dicts_for_user(user_id, limit=10):
+    """
+    Recommandations sérialisables d'un utilisateur, servies depuis le cache tant que
+    ni les modèles ni les interactions de l'utilisateur n'ont changé
+    """
+    model_version = recommendation_service.model_version
+    interaction_version = get_interaction_version(user_id)
+    cached = recommendation_cache.get(user_id, model_version, interaction_version, limit)
+    if cached is not None:
+        return cached
+    
+    # Calculer un peu plus que demandé pour servir les limites usuelles depuis la même entrée
+    depth = max(limit, RECOMMENDATION_CACHE_DEPTH)
+    movies = get_recommendations_for_user(user_id, depth)
+    recommendations_data = [
+        {
+            'id': movie.id,
+            'title': movie.title,
+            'overview': movie.overview,
+            'poster_path': movie.poster_path,
+            'genres': movie.genres,
+            'popularity': movie.popularity,
+            'release_date': movie.release_date
+        }
+        for movie in movies
+    ]
+    if recommendations_data:
+        recommendation_cache.put(user_id, model_version, interaction_version, recommendations_data, depth)
+    return recommendations_data[:limit]
+
 def train_recommendation_models():
     """
     Fonction pour entraîner les modèles de recommandation
     """
-    content_success = recommendation_service.train_content_based_model()
-    collab_success = recommendation_service.train_collaborative_model()
+    # Intégrer les derniers clics avant de reconstruire la matrice collaborative
+    from services.click_rollup_service import click_rollup_job
+    click_rollup_job.run_once()
+    
+    # Réentraînement explicite, sans doublon avec un entraînement d'arrière-plan en cours
+    content_success, _ = recommendation_service._training.do('content', recommendation_service.train_content_based_model)
+    collab_success, _ = recommendation_service._training.do('collaborative', recommendation_service.train_collaborative_model)
     return content_success and collab_success
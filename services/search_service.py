@@ -0,0 +1,323 @@
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models.movie import Movie
+from database.db import db
+from repositories.movie_repository import (
+    search_movies_fulltext, suggest_movie_titles, get_movies_by_ids
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Poids alignés sur ts_rank (A = titre, B = résumé) pour que l'index en mémoire
+# classe les résultats comme PostgreSQL
+TITLE_WEIGHT = 1.0
+OVERVIEW_WEIGHT = 0.4
+
+# Nombre maximum de termes du vocabulaire développés pour un préfixe
+MAX_PREFIX_EXPANSIONS = 50
+
+MAX_PER_PAGE = 50
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text):
+    """Découpe un texte en termes minuscules (équivalent de la configuration 'simple')."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InMemorySearchIndex:
+    """
+    Index inversé en mémoire sur le titre et le résumé des films.
+
+    Utilisé à la place de tsvector/GIN quand la base n'est pas PostgreSQL
+    (SQLite en développement et pour les tests). Les modifications de films
+    sont appliquées de façon incrémentale via les événements SQLAlchemy.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # terme -> {movie_id: poids}
+        self._title_terms = defaultdict(set)  # terme du titre -> {movie_id}
+        self._documents = {}  # movie_id -> (termes, titre, popularité)
+        self._vocabulary = []
+        self._title_vocabulary = []
+        self._vocabulary_dirty = False
+        self._built = False
+        self._pending = set()  # films écrits hors ORM, à relire avant la prochaine recherche
+
+    @property
+    def built(self):
+        return self._built
+
+    def build(self, rows):
+        """Construit l'index à partir d'un itérable de (id, title, overview, popularity)."""
+        with self._lock:
+            self._postings.clear()
+            self._title_terms.clear()
+            self._documents.clear()
+            for movie_id, title, overview, popularity in rows:
+                self._add(movie_id, title, overview, popularity)
+            self._vocabulary_dirty = True
+            self._built = True
+        logger.info("🔎 Index de recherche en mémoire construit: %s films", len(self._documents))
+
+    def upsert(self, movie_id, title, overview, popularity):
+        with self._lock:
+            self._remove(movie_id)
+            self._add(movie_id, title, overview, popularity)
+            self._vocabulary_dirty = True
+
+    def remove(self, movie_id):
+        with self._lock:
+            self._remove(movie_id)
+            self._vocabulary_dirty = True
+
+    def reset(self):
+        with self._lock:
+            self._built = False
+            self._pending.clear()
+
+    def mark_pending(self, movie_ids):
+        with self._lock:
+            if self._built:
+                self._pending.update(movie_ids)
+
+    def take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            return pending
+
+    def search(self, terms, limit=20, offset=0):
+        """
+        Recherche ET classée par pertinence ; le dernier terme est un préfixe.
+
+        Returns:
+            Tuple (liste de (movie_id, score), nombre total de résultats)
+        """
+        with self._lock:
+            self._refresh_vocabulary()
+
+            scores = None
+            for position, term in enumerate(terms):
+                is_prefix = position == len(terms) - 1
+                expansions = self._expand(term, self._vocabulary) if is_prefix else [term]
+                term_scores = defaultdict(float)
+                for expanded in expansions:
+                    postings = self._postings.get(expanded)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + len(self._documents) / len(postings))
+                    for movie_id, weight in postings.items():
+                        term_scores[movie_id] += weight * idf
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {movie_id: score + term_scores[movie_id]
+                              for movie_id, score in scores.items() if movie_id in term_scores}
+                if not scores:
+                    return [], 0
+
+            ranked = sorted(
+                scores.items(),
+                key=lambda item: (-item[1], -(self._documents[item[0]][2] or 0), item[0])
+            )
+            return ranked[offset:offset + limit], len(ranked)
+
+    def suggest(self, terms, limit=8):
+        """Films dont le titre contient tous les termes en préfixe, par popularité."""
+        with self._lock:
+            self._refresh_vocabulary()
+
+            candidates = None
+            for term in terms:
+                matching = set()
+                for expanded in self._expand(term, self._title_vocabulary):
+                    matching |= self._title_terms[expanded]
+                candidates = matching if candidates is None else candidates & matching
+                if not candidates:
+                    return []
+
+            ranked = sorted(candidates, key=lambda movie_id: (-(self._documents[movie_id][2] or 0), movie_id))
+            return [(movie_id, self._documents[movie_id][1]) for movie_id in ranked[:limit]]
+
+    def _add(self, movie_id, title, overview, popularity):
+        weights = defaultdict(float)
+        title_tokens = tokenize(title)
+        for token in title_tokens:
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(overview):
+            weights[token] += OVERVIEW_WEIGHT
+
+        # Normalisation par la longueur du document (comme le flag 1 de ts_rank)
+        norm = 1.0 / (1.0 + math.log(1 + sum(weights.values())))
+        for term, weight in weights.items():
+            self._postings[term][movie_id] = weight * norm
+        for token in title_tokens:
+            self._title_terms[token].add(movie_id)
+        self._documents[movie_id] = (tuple(weights), title, popularity)
+
+    def _remove(self, movie_id):
+        document = self._documents.pop(movie_id, None)
+        if not document:
+            return
+        for term in document[0]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(movie_id, None)
+                if not postings:
+                    del self._postings[term]
+            title_ids = self._title_terms.get(term)
+            if title_ids is not None:
+                title_ids.discard(movie_id)
+                if not title_ids:
+                    del self._title_terms[term]
+
+    def _refresh_vocabulary(self):
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._title_vocabulary = sorted(self._title_terms)
+            self._vocabulary_dirty = False
+
+    @staticmethod
+    def _expand(prefix, vocabulary):
+        """Termes du vocabulaire trié commençant par le préfixe (recherche dichotomique)."""
+        expansions = []
+        index = bisect_left(vocabulary, prefix)
+        while index < len(vocabulary) and len(expansions) < MAX_PREFIX_EXPANSIONS:
+            term = vocabulary[index]
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+            index += 1
+        return expansions
+
+
+class MovieSearchService:
+    """
+    Recherche de films : tsvector + GIN sur PostgreSQL, index inversé en mémoire ailleurs.
+    """
+
+    def __init__(self):
+        self.memory_index = InMemorySearchIndex()
+
+    def uses_postgres(self):
+        return db.engine.dialect.name == 'postgresql'
+
+    def search(self, query, page=1, per_page=20):
+        """
+        Recherche paginée sur le titre et le résumé.
+
+        Returns:
+            Dictionnaire paginé au même format que les notifications
+        """
+        page = max(page, 1)
+        per_page = min(max(per_page, 1), MAX_PER_PAGE)
+        offset = (page - 1) * per_page
+
+        terms = tokenize(query)
+        if not terms:
+            ranked, total = [], 0
+        elif self.uses_postgres():
+            ranked, total = search_movies_fulltext(terms, limit=per_page, offset=offset)
+        else:
+            self._ensure_memory_index()
+            ranked, total = self.memory_index.search(terms, limit=per_page, offset=offset)
+
+        scores = dict(ranked)
+        movies = get_movies_by_ids([movie_id for movie_id, _ in ranked])
+        results = []
+        for movie in movies:
+            movie_dict = movie.to_dict()
+            movie_dict['score'] = round(scores[movie.id], 6)
+            results.append(movie_dict)
+
+        pages = math.ceil(total / per_page) if total else 0
+        return {
+            'movies': results,
+            'total': total,
+            'pages': pages,
+            'current_page': page,
+            'has_next': page < pages,
+            'has_prev': page > 1
+        }
+
+    def suggest(self, query, limit=8):
+        """Autocomplétion sur les titres : liste de {'id', 'title'}."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        limit = min(max(limit, 1), MAX_PER_PAGE)
+        if self.uses_postgres():
+            suggestions = suggest_movie_titles(terms, limit=limit)
+        else:
+            self._ensure_memory_index()
+            suggestions = self.memory_index.suggest(terms, limit=limit)
+        return [{'id': movie_id, 'title': title} for movie_id, title in suggestions]
+
+    def invalidate(self):
+        """Force la reconstruction de l'index en mémoire (après un chargement en masse)."""
+        self.memory_index.reset()
+
+    def _ensure_memory_index(self):
+        if not self.memory_index.built:
+            rows = db.session.query(Movie.id, Movie.title, Movie.overview, Movie.popularity).all()
+            self.memory_index.build(rows)
+            return
+        self.reindex(self.memory_index.take_pending())
+
+    def reindex(self, movie_ids):
+        """Relit des films en base et met l'index en mémoire à jour (écritures Core, hors ORM)."""
+        if not movie_ids or not self.memory_index.built:
+            return
+        movie_ids = list(movie_ids)
+        rows = db.session.query(Movie.id, Movie.title, Movie.overview, Movie.popularity).filter(
+            Movie.id.in_(movie_ids)
+        ).all()
+        for movie_id, title, overview, popularity in rows:
+            self.memory_index.upsert(movie_id, title, overview, popularity)
+        found = {row[0] for row in rows}
+        for movie_id in movie_ids:
+            if movie_id not in found:
+                self.memory_index.remove(movie_id)
+
+
+# Créer une instance du service
+movie_search_service = MovieSearchService()
+
+@event.listens_for(Movie, 'after_insert')
+@event.listens_for(Movie, 'after_update')
+def _index_movie(mapper, connection, movie):
+    if movie_search_service.memory_index.built:
+        movie_search_service.memory_index.upsert(movie.id, movie.title, movie.overview, movie.popularity)
+
+@event.listens_for(Movie, 'after_delete')
+def _unindex_movie(mapper, connection, movie):
+    if movie_search_service.memory_index.built:
+        movie_search_service.memory_index.remove(movie.id)
+
+# Écritures Core (insert_movie_if_absent, bulk_upsert_movies) :
+# notées dans la session par movie_repository.track_written_movies, réindexées une fois commitées
+@event.listens_for(Session, 'after_commit')
+def _reindex_written_movies(session):
+    movie_ids = session.info.pop('written_movie_ids', None)
+    if movie_ids:
+        movie_search_service.memory_index.mark_pending(movie_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_written_movies(session):
+    session.info.pop('written_movie_ids', None)
+
+def search_movies(query, page=1, per_page=20):
+    return movie_search_service.search(query, page=page, per_page=per_page)
+
+def suggest_movies(query, limit=8):
+    return movie_search_service.suggest(query, limit=limit)
@@ -0,0 +1,315 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.util.retry import Retry
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Configuration TMDB (surchargeable par variables d'environnement)
+TMDB_API_KEY = os.getenv('TMDB_API_KEY', "2dca580c2a14b55200e784d157207b4d")
+TMDB_BASE_URL = os.getenv('TMDB_BASE_URL', "https://api.themoviedb.org/3")
+TMDB_LANGUAGE = os.getenv('TMDB_LANGUAGE', "fr-FR")
+
+# Délais (connexion, lecture) en secondes
+TMDB_TIMEOUT = (3.05, float(os.getenv('TMDB_READ_TIMEOUT', 10)))
+TMDB_MAX_RETRIES = int(os.getenv('TMDB_MAX_RETRIES', 3))
+TMDB_BACKOFF_FACTOR = 0.5
+# Statuts retentés par le client (chaque tentative repasse par le seau à jetons)
+TMDB_RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Limite côté client : TMDB tolère environ 40 requêtes/s par IP, on reste en dessous
+TMDB_RATE_PER_SECOND = float(os.getenv('TMDB_RATE_PER_SECOND', 20))
+TMDB_BURST = int(os.getenv('TMDB_BURST', 40))
+# Attente maximale d'un jeton : courte dans un thread de requête, longue pour les traitements de fond
+TMDB_RATE_LIMIT_TIMEOUT = float(os.getenv('TMDB_RATE_LIMIT_TIMEOUT', 1))
+TMDB_BATCH_RATE_LIMIT_TIMEOUT = float(os.getenv('TMDB_BATCH_RATE_LIMIT_TIMEOUT', 30))
+
+# Cache des réponses
+TMDB_CACHE_TTL = int(os.getenv('TMDB_CACHE_TTL', 3600))
+TMDB_NEGATIVE_CACHE_TTL = int(os.getenv('TMDB_NEGATIVE_CACHE_TTL', 300))
+TMDB_CACHE_SIZE = int(os.getenv('TMDB_CACHE_SIZE', 4096))
+
+# Connexions keep-alive conservées par le pool
+TMDB_POOL_SIZE = int(os.getenv('TMDB_POOL_SIZE', 10))
+
+
+class TMDBRateLimitError(requests.exceptions.RequestException):
+    """Levée quand aucun jeton n'est disponible dans le délai imparti."""
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe : `rate` jetons par seconde, au plus `capacity` en réserve."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Consomme un jeton en attendant si nécessaire. Retourne False si le délai expire."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """
+    Cache LRU borné avec TTL, qui mémorise aussi les 404 (cache négatif).
+
+    TMDBClient y stocke le corps brut (bytes, immuable) : chaque lecture décode
+    une copie, un appelant ne peut donc pas modifier l'entrée partagée.
+    """
+
+    NOT_FOUND = object()
+
+    def __init__(self, ttl, negative_ttl, max_size):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Retourne la valeur en cache, ResponseCache.NOT_FOUND, ou None si absente/expirée."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        ttl = self.negative_ttl if value is self.NOT_FOUND else self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FixtureAdapter(BaseAdapter):
+    """
+    Transport requests local qui sert des réponses TMDB enregistrées.
+
+    À monter sur la session du client pour travailler sans réseau :
+        adapter = FixtureAdapter({'/movie/550': {...}})
+        client = TMDBClient(session=adapter.session())
+    Les chemins absents répondent 404 ; chaque appel est journalisé dans `calls`.
+    Une route peut aussi valoir (statut, payload) ou (statut, payload, en-têtes).
+    """
+
+    def __init__(self, routes=None, base_path='/3'):
+        super().__init__()
+        self.routes = dict(routes or {})
+        self.base_path = base_path
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def session(self):
+        session = requests.Session()
+        session.mount('http://', self)
+        session.mount('https://', self)
+        return session
+
+    def send(self, request, **kwargs):
+        route = requests.utils.urlparse(request.url).path
+        if self.base_path and route.startswith(self.base_path):
+            route = route[len(self.base_path):]
+
+        with self._lock:
+            self.calls.append(route)
+
+        payload = self.routes.get(route)
+        status = 200
+        headers = {}
+        if isinstance(payload, tuple):
+            status, payload, *extra = payload
+            headers = extra[0] if extra else {}
+        elif payload is None:
+            status, payload = 404, {'status_code': 34, 'status_message': 'The resource you requested could not be found.'}
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode('utf-8')
+        response.headers['Content-Type'] = 'application/json;charset=utf-8'
+        response.headers.update(headers)
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        return response
+
+    def close(self):
+        pass
+
+
+class TMDBClient:
+    """
+    Client TMDB partagé : session keep-alive poolée, délais, tentatives bornées
+    avec backoff exponentiel, limitation de débit et cache de réponses.
+
+    Les tentatives sur statut HTTP sont faites ici plutôt que par urllib3 : chacune
+    reprend un jeton, et un Retry-After plus long que l'attente tolérée
+    (`rate_limit_timeout`) fait échouer l'appel au lieu de bloquer le thread.
+    """
+
+    def __init__(self, api_key=TMDB_API_KEY, base_url=TMDB_BASE_URL, language=TMDB_LANGUAGE,
+                 timeout=TMDB_TIMEOUT, max_retries=TMDB_MAX_RETRIES, backoff_factor=TMDB_BACKOFF_FACTOR,
+                 rate_per_second=TMDB_RATE_PER_SECOND, burst=TMDB_BURST, rate_limit_timeout=TMDB_RATE_LIMIT_TIMEOUT,
+                 cache_ttl=TMDB_CACHE_TTL, negative_cache_ttl=TMDB_NEGATIVE_CACHE_TTL,
+                 cache_size=TMDB_CACHE_SIZE, pool_size=TMDB_POOL_SIZE, session=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.language = language
+        self.timeout = timeout
+        self.rate_limit_timeout = rate_limit_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.cache = ResponseCache(cache_ttl, negative_cache_ttl, cache_size)
+        self.session = session or self._build_session(max_retries, backoff_factor, pool_size)
+
+    def for_batch_jobs(self, rate_limit_timeout=TMDB_BATCH_RATE_LIMIT_TIMEOUT):
+        """
+        Vue du client pour l'ingestion et le rafraîchissement de fond : même
+        session, même seau et même cache, mais attente plus longue d'un jeton.
+        """
+        batch_client = copy.copy(self)
+        batch_client.rate_limit_timeout = rate_limit_timeout
+        return batch_client
+
+    @staticmethod
+    def _build_session(max_retries, backoff_factor, pool_size):
+        # urllib3 ne retente que les erreurs de connexion ; les statuts sont gérés par get()
+        retry = Retry(
+            total=max_retries,
+            read=0,
+            status=0,
+            backoff_factor=backoff_factor,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def get(self, path, params=None, use_cache=True):
+        """
+        GET sur l'API TMDB.
+
+        Returns:
+            Le JSON décodé, ou None si la ressource n'existe pas (404)
+
+        Raises:
+            requests.exceptions.RequestException pour les autres échecs
+        """
+        query = {'language': self.language}
+        query.update(params or {})
+        cache_key = (path, tuple(sorted(query.items())))
+
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is ResponseCache.NOT_FOUND:
+                return None
+            if cached is not None:
+                return json.loads(cached)
+
+        query['api_key'] = self.api_key
+        for attempt in range(self.max_retries + 1):
+            if not self.bucket.acquire(timeout=self.rate_limit_timeout):
+                raise TMDBRateLimitError(f"Limite de débit TMDB atteinte pour {path}")
+            response = self.session.get(f"{self.base_url}{path}", params=query, timeout=self.timeout)
+            if response.status_code not in TMDB_RETRY_STATUSES or attempt == self.max_retries:
+                break
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+
+        if response.status_code == 404:
+            self.cache.set(cache_key, ResponseCache.NOT_FOUND)
+            return None
+        response.raise_for_status()
+
+        data = response.json()
+        if use_cache:
+            self.cache.set(cache_key, response.content)
+        return data
+
+    def _retry_delay(self, response, attempt):
+        """Attente avant la tentative suivante, ou None si le Retry-After dépasse l'attente tolérée."""
+        delay = self.backoff_factor * (2 ** attempt)
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass  # Date HTTP : on garde le backoff
+        if delay > self.rate_limit_timeout:
+            return None
+        return delay
+
+    def get_movie(self, movie_id):
+        """Détails bruts d'un film, ou None s'il n'existe pas."""
+        return self.get(f"/movie/{int(movie_id)}")
+
+    def popular_movies(self, page=1):
+        """Page de /movie/popular : dictionnaire avec 'results' et 'total_pages'."""
+        return self.get('/movie/popular', {'page': page})
+
+    def discover_movies(self, page=1, **filters):
+        """Page de /discover/movie (tri par popularité par défaut)."""
+        params = {'page': page, 'sort_by': 'popularity.desc', 'include_adult': 'false'}
+        params.update(filters)
+        return self.get('/discover/movie', params)
+
+    def movie_changes(self, start_date, end_date, page=1):
+        """Page de /movie/changes : IDs des films modifiés sur la période (14 jours max)."""
+        return self.get('/movie/changes', {'start_date': start_date, 'end_date': end_date, 'page': page}, use_cache=False)
+
+    def genre_names(self):
+        """Correspondance {id de genre: nom} pour la langue configurée."""
+        data = self.get('/genre/movie/list') or {}
+        return {genre['id']: genre['name'] for genre in data.get('genres', [])}
+
+    def close(self):
+        self.session.close()
+
+
+# Client partagé par le processus (une session poolée par worker gunicorn)
+tmdb_client = TMDBClient()
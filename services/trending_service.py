@@ -0,0 +1,269 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app
+from database.db import db
+from models.like import Like
+from models.watchlist import Watchlist
+from models.comment import Comment
+from repositories.movie_repository import get_movies_by_ids
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Un seau par heure sur 7 jours
+BUCKET_SECONDS = 3600
+BUCKET_COUNT = 7 * 24
+
+WINDOWS = {
+    '1h': 1,
+    '24h': 24,
+    '7d': BUCKET_COUNT
+}
+
+# Poids des interactions dans le score de tendance
+INTERACTION_WEIGHTS = {
+    'like': 3.0,
+    'watchlist': 2.0,
+    'comment': 1.0
+}
+
+# Durée de validité d'un classement calculé, par fenêtre
+TRENDING_RANKING_TTL = float(os.getenv('TRENDING_RANKING_TTL', 30))
+# Taille maximale des classements conservés
+TRENDING_MAX_RESULTS = 100
+
+
+class TrendingTracker:
+    """
+    Compteurs glissants (1h / 24h / 7j) des interactions par film.
+
+    Les compteurs sont une matrice films × 168 seaux horaires utilisée en
+    anneau : l'enregistrement d'une interaction est O(1), et la rotation
+    d'heure remet à zéro une colonne pour tous les films d'un coup. Les
+    classements sont recalculés au plus toutes les TRENDING_RANKING_TTL
+    secondes (argpartition vectorisé) ; une requête ne fait que découper un
+    classement déjà trié.
+
+    Les compteurs sont propres à chaque processus : le chargement initial
+    depuis la base donne à chaque worker la même base, puis chacun suit ses
+    propres écritures (ajouts et suppressions). Ce chargement se fait dans
+    un thread d'arrière-plan lancé par la première requête ; d'ici là les
+    classements sont vides.
+    """
+
+    def __init__(self, initial_capacity=1024):
+        self._lock = threading.RLock()
+        self._counts = np.zeros((initial_capacity, BUCKET_COUNT), dtype=np.float32)
+        self._rows = {}  # movie_id -> ligne de la matrice
+        self._movie_ids = np.full(initial_capacity, -1, dtype=np.int64)
+        self._free_rows = list(range(initial_capacity - 1, -1, -1))
+        self._current_hour = self._hour(time.time())
+        self._rankings = {}  # fenêtre -> (instant, liste de dictionnaires)
+        self._warmed = False
+        self._warm_started = False
+        self._warm_cutoff = None
+        self._warm_done = threading.Event()
+
+    def record(self, movie_id, kind):
+        """Enregistre une interaction ('like', 'watchlist' ou 'comment') qui vient d'être écrite."""
+        # Avant le début du chargement initial, l'interaction (déjà commitée) sera lue depuis la base
+        if self._warm_started:
+            self._add(movie_id, kind, time.time())
+
+    def forget(self, movie_id, kind, created_at):
+        """Retire une interaction supprimée (unlike, retrait de la watchlist, commentaire supprimé)."""
+        # Une ligne supprimée avant d'être chargée n'a jamais été comptée
+        if created_at is None or not self._warm_started:
+            return
+        if not self._warmed and created_at < self._warm_cutoff:
+            return
+        self._add(movie_id, kind, _timestamp(created_at), sign=-1)
+
+    def _add(self, movie_id, kind, timestamp, sign=1):
+        weight = INTERACTION_WEIGHTS.get(kind)
+        if weight is None or movie_id is None:
+            return
+        hour = self._hour(timestamp)
+        with self._lock:
+            self._rotate(self._hour(time.time()))
+            if hour <= self._current_hour - BUCKET_COUNT or hour > self._current_hour:
+                return
+            if sign < 0:
+                row = self._rows.get(int(movie_id))
+                if row is not None:
+                    column = hour % BUCKET_COUNT
+                    self._counts[row, column] = max(0.0, self._counts[row, column] - weight)
+                return
+            row = self._row_for(int(movie_id))
+            self._counts[row, hour % BUCKET_COUNT] += weight
+
+    def trending(self, window='24h', limit=10):
+        """
+        Films en tendance sur la fenêtre, avec leur score.
+
+        Returns:
+            Liste de dictionnaires de films triés par score décroissant
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"Fenêtre inconnue: {window}")
+        if not self._warmed:
+            self.warm_up(current_app._get_current_object())
+            return []
+
+        ranking = self._rankings.get(window)
+        if ranking is None or time.monotonic() - ranking[0] > TRENDING_RANKING_TTL:
+            ranking = (time.monotonic(), self._rank(window))
+            self._rankings[window] = ranking
+        return [dict(movie) for movie in ranking[1][:limit]]
+
+    def top_ids(self, window='24h', limit=10):
+        """Couples (movie_id, score) des films en tendance, depuis le classement en cache."""
+        return [(movie['id'], movie['trending_score']) for movie in self.trending(window, limit)]
+
+    def scores(self, window='24h'):
+        """Scores bruts {movie_id: score} de tous les films actifs sur la fenêtre."""
+        with self._lock:
+            self._rotate(self._hour(time.time()))
+            sums = self._window_sums(WINDOWS[window])
+            active = np.nonzero(sums > 0)[0]
+            return dict(zip(self._movie_ids[active].tolist(), sums[active].tolist()))
+
+    def warm_up(self, app):
+        """Lance le chargement initial dans un thread d'arrière-plan (une seule fois)."""
+        with self._lock:
+            if self._warm_started:
+                return
+            # Les interactions écrites à partir d'ici sont suivies en direct, les précédentes lues en base
+            self._warm_started = True
+            self._warm_cutoff = datetime.utcnow()
+
+        def run():
+            with app.app_context():
+                try:
+                    self.warm_from_db()
+                except Exception as e:
+                    logger.error("❌ Chargement initial des tendances en échec: %s", e)
+                    # Repart de zéro à la prochaine requête, sans garder un chargement partiel
+                    with self._lock:
+                        self._counts[:] = 0
+                        self._evict_idle_rows()
+                        self._warm_started = False
+                finally:
+                    db.session.remove()
+                    self._warm_done.set()
+
+        threading.Thread(target=run, name='trending-warmup', daemon=True).start()
+
+    def warm_from_db(self):
+        """Charge les interactions des 7 derniers jours (à appeler dans un contexte d'application)."""
+        since = datetime.utcnow() - timedelta(seconds=BUCKET_SECONDS * BUCKET_COUNT)
+        cutoff = self._warm_cutoff or datetime.utcnow()
+        loaded = 0
+        for kind, model, column in (
+            ('like', Like, Like.created_at),
+            ('watchlist', Watchlist, Watchlist.added_at),
+            ('comment', Comment, Comment.created_at)
+        ):
+            rows = db.session.query(model.movie_id, column).filter(column >= since, column < cutoff).yield_per(5000)
+            for movie_id, created_at in rows:
+                self._add(movie_id, kind, _timestamp(created_at))
+                loaded += 1
+        self._warmed = True
+        logger.info("📈 Tendances initialisées avec %s interactions", loaded)
+        return loaded
+
+    def _rank(self, window):
+        with self._lock:
+            self._rotate(self._hour(time.time()))
+            sums = self._window_sums(WINDOWS[window])
+            active = np.nonzero(sums > 0)[0]
+            if len(active) > TRENDING_MAX_RESULTS:
+                top = np.argpartition(-sums[active], TRENDING_MAX_RESULTS)[:TRENDING_MAX_RESULTS]
+                active = active[top]
+            active = active[np.argsort(-sums[active], kind='stable')]
+            ranked_ids = self._movie_ids[active].tolist()
+            scores = dict(zip(ranked_ids, sums[active].tolist()))
+
+        movies = []
+        for movie in get_movies_by_ids(ranked_ids):
+            movie_dict = movie.to_dict()
+            movie_dict['trending_score'] = round(scores[movie.id], 3)
+            movies.append(movie_dict)
+        return movies
+
+    def _window_sums(self, hours):
+        """
+        Somme glissante sur `hours` heures : le seau le plus ancien est pondéré par la
+        fraction de l'heure pas encore écoulée, pour éviter les sauts à chaque rotation.
+        """
+        if hours >= BUCKET_COUNT:
+            return self._counts.sum(axis=1)
+        columns = [(self._current_hour - offset) % BUCKET_COUNT for offset in range(hours + 1)]
+        elapsed = (time.time() % BUCKET_SECONDS) / BUCKET_SECONDS
+        weights = np.ones(len(columns), dtype=np.float32)
+        weights[-1] = 1.0 - elapsed
+        return self._counts[:, columns] @ weights
+
+    def _rotate(self, hour):
+        """Avance l'anneau jusqu'à `hour` en vidant les seaux expirés."""
+        if hour <= self._current_hour:
+            return
+        steps = min(hour - self._current_hour, BUCKET_COUNT)
+        for offset in range(1, steps + 1):
+            self._counts[:, (self._current_hour + offset) % BUCKET_COUNT] = 0
+        self._current_hour = hour
+        self._evict_idle_rows()
+
+    def _evict_idle_rows(self):
+        idle = np.nonzero((self._movie_ids >= 0) & (self._counts.sum(axis=1) == 0))[0]
+        for row in idle.tolist():
+            del self._rows[int(self._movie_ids[row])]
+            self._movie_ids[row] = -1
+            self._free_rows.append(row)
+
+    def _row_for(self, movie_id):
+        row = self._rows.get(movie_id)
+        if row is not None:
+            return row
+        if not self._free_rows:
+            self._grow()
+        row = self._free_rows.pop()
+        self._rows[movie_id] = row
+        self._movie_ids[row] = movie_id
+        return row
+
+    def _grow(self):
+        capacity = len(self._movie_ids)
+        self._counts = np.vstack([self._counts, np.zeros((capacity, BUCKET_COUNT), dtype=np.float32)])
+        self._movie_ids = np.concatenate([self._movie_ids, np.full(capacity, -1, dtype=np.int64)])
+        self._free_rows.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    @staticmethod
+    def _hour(timestamp):
+        return int(timestamp // BUCKET_SECONDS)
+
+
+def _timestamp(created_at):
+    """Horodatage POSIX d'une date UTC naïve (colonnes created_at / added_at)."""
+    return (created_at - datetime(1970, 1, 1)).total_seconds()
+
+
+# Créer une instance du service
+trending_tracker = TrendingTracker()
+
+def record_interaction(movie_id, kind):
+    """Alimente les tendances depuis les chemins d'écriture (like, watchlist, commentaire)."""
+    try:
+        trending_tracker.record(movie_id, kind)
+    except Exception as e:
+        logger.warning("⚠️ Impossible d'enregistrer l'interaction %s pour le film %s: %s", kind, movie_id, e)
+
+def forget_interaction(movie_id, kind, created_at):
+    """Retire des tendances une interaction supprimée (unlike, retrait de watchlist, commentaire)."""
+    try:
+        trending_tracker.forget(movie_id, kind, created_at)
+    except Exception as e:
+        logger.warning("⚠️ Impossible de retirer l'interaction %s pour le film %s: %s", kind, movie_id, e)
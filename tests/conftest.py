@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from flask import g
+from flask.testing import FlaskClient
+
+# Base SQLite jetable et protections désactivées, avant l'import de l'application
+_database_dir = tempfile.mkdtemp(prefix='movies-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'tests.db')}"
+os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+os.environ.setdefault('LOOP_DETECTION_ENABLED', '0')
+os.environ.setdefault('METRICS_ENABLED', '0')
+os.environ.setdefault('LOG_FORMAT', 'text')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app  # noqa: E402
+from database.db import db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """Application avec un schéma vide à chaque test."""
+    from services.search_service import movie_search_service
+    from utils.auth_middleware import principal_cache
+
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        movie_search_service.invalidate()
+        principal_cache.clear()
+        yield flask_app
+        db.session.remove()
+
+
+class IsolatedClient(FlaskClient):
+    """
+    Client de test dont chaque requête repart d'un g vide, comme en production :
+    sans cela, les requêtes réutilisent le contexte d'application de la fixture.
+    """
+
+    def open(self, *args, **kwargs):
+        vars(g).clear()
+        return super().open(*args, **kwargs)
+
+
+@pytest.fixture
+def client(app):
+    app.test_client_class = IsolatedClient
+    return app.test_client()
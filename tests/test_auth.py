@@ -0,0 +1,48 @@
+from database.db import db
+from models.user import User
+from utils.auth_middleware import generate_token
+from utils.query_profiler import assert_max_queries
+
+
+def auth_headers(user_id):
+    return {'Authorization': f'Bearer {generate_token(user_id)}'}
+
+
+def add_users():
+    db.session.add_all([User(id=1, fullname="Alice", email="alice@example.com"),
+                        User(id=2, fullname="Bob", email="bob@example.com")])
+    db.session.commit()
+    db.session.remove()
+
+
+def test_me_is_served_from_the_cached_principal(app, client):
+    add_users()
+    with assert_max_queries(1, 'GET /api/users/me (cache froid)'):
+        assert client.get('/api/users/me', headers=auth_headers(1)).status_code == 200
+
+    with assert_max_queries(0, 'GET /api/users/me (cache chaud)'):
+        response = client.get('/api/users/me', headers=auth_headers(1))
+    assert response.status_code == 200
+    assert response.get_json()['user'] == db.session.get(User, 1).to_dict()
+
+    with assert_max_queries(0, 'GET /api/users/<id> (son profil)'):
+        response = client.get('/api/users/1', headers=auth_headers(1))
+    assert response.get_json()['fullname'] == "Alice"
+
+
+def test_principal_is_only_loaded_when_a_route_asks_for_it(app, client):
+    add_users()
+    # Profil d'un autre utilisateur : seule sa ligne est lue, pas celle de l'utilisateur authentifié
+    with assert_max_queries(1, 'GET /api/users/<id> (autre profil)') as stats:
+        response = client.get('/api/users/2', headers=auth_headers(1))
+    assert response.get_json()['fullname'] == "Bob"
+    assert stats.count == 1
+
+
+def test_me_requires_authentication(app, client):
+    add_users()
+    assert client.get('/api/users/me').status_code == 401
+    assert client.get('/api/users/me', headers={'Authorization': 'Bearer invalide'}).get_json() == {
+        'error': 'Token invalide'
+    }
+    assert client.get('/api/users/me', headers=auth_headers(3)).status_code == 404
@@ -0,0 +1,89 @@
+import datetime
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from services.catalog_ingest import CatalogIngestor
+from services.tmdb_client import FixtureAdapter, TMDBClient
+
+
+class PagedAdapter(FixtureAdapter):
+    """Transport de test : réponses par (chemin, page) ; une page listée dans `failing` répond 500."""
+
+    def __init__(self, pages, failing=(), total_pages=None):
+        super().__init__()
+        self.pages = pages
+        self.failing = set(failing)
+        self.total_pages = total_pages or len(pages)
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        page = int(parse_qs(url.query).get('page', ['1'])[0])
+        route = url.path[len(self.base_path):]
+        if route == '/genre/movie/list':
+            self.routes[route] = {'genres': []}
+        elif page in self.failing:
+            self.routes[route] = (500, {})
+        else:
+            self.routes[route] = {'page': page, 'total_pages': self.total_pages, 'results': self.pages.get(page, [])}
+        return super().send(request, **kwargs)
+
+
+def movie(movie_id):
+    return {'id': movie_id, 'title': f"Film {movie_id}", 'overview': '', 'genre_ids': []}
+
+
+def ingestor(adapter, checkpoint_path):
+    client = TMDBClient(session=adapter.session(), max_retries=0)
+    return CatalogIngestor(client=client, workers=1, checkpoint_path=str(checkpoint_path))
+
+
+def test_checkpoint_stops_before_failed_page(app, tmp_path):
+    checkpoint = tmp_path / 'checkpoint.json'
+    pages = {page: [movie(page)] for page in range(1, 5)}
+
+    ingestor(PagedAdapter(pages, failing={2}), checkpoint).ingest_list('popular', max_pages=4)
+    assert json.loads(checkpoint.read_text()) == {'popular': 1}
+
+    adapter = PagedAdapter(pages)
+    ingestor(adapter, checkpoint).ingest_list('popular', max_pages=4)
+    assert json.loads(checkpoint.read_text()) == {'popular': 4}
+    assert adapter.calls[0] == '/movie/popular'
+
+
+def test_failed_changes_page_keeps_checkpoint(app, tmp_path):
+    checkpoint = tmp_path / 'checkpoint.json'
+    since = (datetime.date.today() - datetime.timedelta(days=3)).isoformat()
+    checkpoint.write_text(json.dumps({'changes': since}))
+
+    ingestor(PagedAdapter({1: []}, failing={2}, total_pages=2), checkpoint).ingest_changes()
+    assert json.loads(checkpoint.read_text()) == {'changes': since}
+
+    ingestor(PagedAdapter({1: [], 2: []}), checkpoint).ingest_changes()
+    assert json.loads(checkpoint.read_text()) == {'changes': datetime.date.today().isoformat()}
+
+
+def test_errors_from_pool_threads_are_all_counted(app, tmp_path):
+    pages = {page: [movie(page)] for page in range(1, 65)}
+    adapter = PagedAdapter(pages, failing=set(range(1, 65)))
+    client = TMDBClient(session=adapter.session(), max_retries=0, rate_per_second=1000, burst=1000)
+    catalog_ingestor = CatalogIngestor(client=client, workers=32, checkpoint_path=str(tmp_path / 'checkpoint.json'))
+
+    stats = catalog_ingestor.ingest_list('popular', max_pages=64)
+    assert stats.errors == len(adapter.calls) == 64
+
+
+def test_cli_does_not_start_the_web_app(tmp_path):
+    script = Path(__file__).resolve().parent.parent / 'scripts' / 'ingest_tmdb_catalog.py'
+    code = (
+        "import runpy, sys; "
+        f"sys.argv = [{str(script)!r}, '--pages', '0']; "
+        f"runpy.run_path({str(script)!r}, run_name='__main__'); "
+        "assert 'app' not in sys.modules, 'app importé'"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'cli.db'}")
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+from database.db import db
+from models.click import Click
+from models.movie import Movie
+from models.user import User
+from services.click_ingest_service import ClickIngestor, parse_click_events
+
+
+def test_clicks_for_unknown_movies_are_ignored(app):
+    db.session.add_all([User(id=1, fullname="Alice", email="alice@example.com"), Movie(id=10, title="Connu")])
+    db.session.commit()
+    ingestor = ClickIngestor()
+    now = datetime.utcnow()
+    ingestor.submit([(1, 10, now), (1, 999, now), (2, 10, now)])
+
+    assert ingestor.flush() == 1
+    assert ingestor.ignored == 2
+    # Aucun film n'est créé à partir d'un clic
+    assert db.session.get(Movie, 999) is None
+    assert [(click.user_id, click.movie_id) for click in Click.query.all()] == [(1, 10)]
+
+
+def test_start_is_idempotent(app):
+    ingestor = ClickIngestor()
+    ingestor.start(app)
+    thread = ingestor._thread
+    ingestor.start(app)
+    assert ingestor._thread is thread
+    ingestor.stop()
+
+
+def test_out_of_range_ids_are_rejected_at_parse_time():
+    assert parse_click_events([{'movie_id': 10, 'user_id': '1'}])[0][:2] == (1, 10)
+    for item in ({'movie_id': 2 ** 31, 'user_id': 1}, {'movie_id': 10, 'user_id': -1}):
+        with pytest.raises(ValueError):
+            parse_click_events([item])
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from database.db import db
+from models.click import Click
+from models.click_rollup import ClickRollup
+from models.movie import Movie
+from models.user import User
+from services.click_rollup_service import ClickRollupJob
+
+
+def test_late_committed_click_with_lower_id_is_rolled_up(app):
+    db.session.add_all([User(id=1, fullname="Alice", email="alice@example.com"), Movie(id=10, title="Connu")])
+    now = datetime.utcnow()
+    db.session.add(Click(id=2, user_id=1, movie_id=10, clicked_at=now))
+    db.session.commit()
+    job = ClickRollupJob()
+    assert job.run_once() == 1
+
+    # Clic validé en retard par un autre worker, avec un ID inférieur
+    db.session.add(Click(id=1, user_id=1, movie_id=10, clicked_at=now))
+    db.session.commit()
+    assert job.run_once() == 1
+    assert job.run_once() == 0
+
+    rollup = db.session.get(ClickRollup, (1, 10))
+    assert rollup.click_count == 2
+    assert all(click.rolled_up for click in Click.query.all())
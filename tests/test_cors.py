@@ -0,0 +1,60 @@
+from flask import Flask
+
+from utils.cors import init_cors
+
+ORIGIN = 'https://client.example.com'
+
+
+def make_app():
+    app = Flask(__name__)
+    app.hooks = []
+
+    @app.before_request
+    def record():
+        app.hooks.append('before_request')
+
+    @app.route('/api/movies/', methods=['GET', 'POST'])
+    def movies():
+        return {'movies': []}
+
+    init_cors(app, origins=ORIGIN, max_age=600)
+    return app
+
+
+def preflight(client, origin=ORIGIN):
+    return client.options('/api/movies/', headers={
+        'Origin': origin, 'Access-Control-Request-Method': 'POST'
+    })
+
+
+def test_preflight_is_answered_with_204():
+    response = preflight(make_app().test_client())
+
+    assert response.status_code == 204
+    assert response.headers['Access-Control-Allow-Origin'] == ORIGIN
+    assert response.headers['Access-Control-Max-Age'] == '600'
+    assert 'POST' in response.headers['Access-Control-Allow-Methods']
+
+
+def test_disallowed_origin_gets_no_cors_headers():
+    client = make_app().test_client()
+
+    response = preflight(client, 'https://evil.example.com')
+    assert response.status_code == 204
+    assert 'Access-Control-Allow-Origin' not in response.headers
+
+    response = client.get('/api/movies/', headers={'Origin': 'https://evil.example.com'})
+    assert response.status_code == 200
+    assert 'Access-Control-Allow-Origin' not in response.headers
+
+
+def test_preflight_does_not_reach_before_request():
+    app = make_app()
+    client = app.test_client()
+
+    preflight(client)
+    assert app.hooks == []
+
+    response = client.get('/api/movies/', headers={'Origin': ORIGIN})
+    assert response.headers['Access-Control-Allow-Origin'] == ORIGIN
+    assert app.hooks == ['before_request']
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from database.db import db
+from models.like import Like
+from models.movie import Movie
+from models.user import User
+from services.leaderboard_service import PopularityLeaderboard
+
+
+def test_interacted_movies_get_the_tmdb_term(app):
+    db.session.add_all([
+        Movie(id=1, title="Très populaire", popularity=1000.0),
+        Movie(id=2, title="Assez populaire", popularity=100.0),
+        Movie(id=3, title="Hors du top TMDB", popularity=90.0),
+        User(id=1, fullname="Alice", email="alice@example.com")
+    ])
+    db.session.add(Like(user_id=1, movie_id=3, created_at=datetime.utcnow()))
+    db.session.commit()
+
+    leaderboard = PopularityLeaderboard(size=2)
+    leaderboard.refresh()
+
+    # 3 est hors des deux plus populaires, mais garde son terme TMDB en plus de son like :
+    # il passe devant 1 (log1p(90) + 3 > log1p(1000))
+    assert leaderboard.top_ids(2) == [3, 1]
+
+
+def test_refresh_does_not_commit_the_request_session(app):
+    db.session.add(Movie(id=1, title="Film", popularity=10.0))
+    db.session.commit()
+    db.session.add(Movie(id=2, title="Non commité", popularity=5.0))
+
+    PopularityLeaderboard().refresh()
+    db.session.rollback()
+
+    assert db.session.get(Movie, 2) is None
+
+
+def test_cold_reads_fall_back_without_building_inline(app, monkeypatch):
+    db.session.add_all([Movie(id=1, title="A", popularity=1.0), Movie(id=2, title="B", popularity=2.0)])
+    db.session.commit()
+    leaderboard = PopularityLeaderboard()
+    started = []
+    monkeypatch.setattr(leaderboard, 'start', lambda app: started.append(app))
+
+    assert leaderboard.top_ids(2) == [2, 1]
+    assert leaderboard.built_at is None
+    assert len(started) == 1
+
+
+def test_top_returns_copies_and_negative_limits_are_clamped(app, client):
+    db.session.add_all([Movie(id=movie_id, title=f"Film {movie_id}", popularity=float(movie_id))
+                        for movie_id in range(1, 6)])
+    db.session.commit()
+    leaderboard = PopularityLeaderboard()
+    leaderboard.refresh()
+
+    leaderboard.top(1)[0]['title'] = "Modifié"
+    assert leaderboard.top(1)[0]['title'] == "Film 5"
+    assert leaderboard.top(-2) == []
+
+    from services.leaderboard_service import popularity_leaderboard
+    popularity_leaderboard.refresh()
+    assert len(client.get('/api/recommendations/popular?limit=-5').get_json()) == 1
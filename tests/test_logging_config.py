@@ -0,0 +1,23 @@
+import logging
+
+from utils.logging_config import SamplingFilter
+
+
+def record(name, level=logging.INFO):
+    return logging.LogRecord(name, level, __file__, 1, "message", None, None)
+
+
+def test_sampling_rule_covers_child_loggers():
+    sampling = SamplingFilter({'services': 0.0, 'services.search_service': 1.0})
+
+    assert not sampling.filter(record('services.tmdb_client'))
+    assert not sampling.filter(record('services'))
+    assert sampling.filter(record('services.search_service'))
+    assert sampling.filter(record('servicesx.module'))
+    assert sampling.filter(record('controllers.movie_controller'))
+
+
+def test_warnings_are_never_sampled():
+    sampling = SamplingFilter({'services': 0.0})
+
+    assert sampling.filter(record('services.tmdb_client', logging.WARNING))
@@ -0,0 +1,115 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from flask import Flask
+
+from utils import metrics
+from utils.metrics import MetricsRegistry, _add_metrics_route
+
+
+def run_in_threads(count, fn):
+    threads = [threading.Thread(target=fn) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def sample(snapshot, name, key='[]'):
+    return snapshot[name]['samples'].get(key)
+
+
+def test_thread_shards_are_summed_on_read():
+    registry = MetricsRegistry(multiproc_dir=None)
+    counter = registry.counter('hits_total', "Test", ('route',))
+    histogram = registry.histogram('latency_seconds', "Test", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(100):
+            counter.inc(route='/a')
+        histogram.observe(0.05)
+        histogram.observe(2.0)
+
+    run_in_threads(8, work)
+    counter.inc(route='/b')
+
+    snapshot = registry.snapshot()
+    assert sample(snapshot, 'hits_total', '["/a"]') == 800
+    assert sample(snapshot, 'hits_total', '["/b"]') == 1
+    # Une case par borne, +Inf, puis la somme
+    assert sample(snapshot, 'latency_seconds') == [8, 0, 8, pytest.approx(8 * 2.05)]
+
+
+def test_dead_thread_shards_are_retired_without_losing_counts(monkeypatch):
+    monkeypatch.setattr(metrics, 'MAX_LIVE_SHARDS', 4)
+    registry = MetricsRegistry(multiproc_dir=None)
+    counter = registry.counter('hits_total', "Test")
+
+    for _ in range(10):
+        run_in_threads(1, counter.inc)
+
+    assert len(registry._shards) <= 5
+    assert sample(registry.snapshot(), 'hits_total') == 10
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def write_worker_file(directory, pid, hits, in_flight):
+    with open(os.path.join(directory, f"metrics_{pid}.json"), 'w') as f:
+        json.dump({'pid': pid, 'metrics': {
+            'hits_total': {'type': 'counter', 'help': "Test", 'labelnames': [], 'buckets': [], 'samples': {'[]': hits}},
+            'in_flight': {'type': 'gauge', 'help': "Test", 'labelnames': [], 'buckets': [], 'samples': {'[]': in_flight}}
+        }}, f)
+
+
+def test_dead_worker_files_are_compacted(tmp_path):
+    directory = str(tmp_path)
+    registry = MetricsRegistry(multiproc_dir=directory)
+    registry.counter('hits_total', "Test").inc(2)
+    registry.gauge('in_flight', "Test").inc()
+    write_worker_file(directory, dead_pid(), hits=5, in_flight=3)
+    write_worker_file(directory, dead_pid(), hits=7, in_flight=1)
+
+    merged = registry.collect()
+    # Compteurs des workers morts conservés, jauges ignorées
+    assert sample(merged, 'hits_total') == 14
+    assert sample(merged, 'in_flight') == 1
+    assert sorted(os.listdir(directory)) == sorted([
+        '.metrics_archive.lock', metrics.ARCHIVE_FILENAME, f"metrics_{os.getpid()}.json"
+    ])
+
+    # L'archive n'est pas recomptée aux lectures suivantes
+    assert sample(registry.collect(), 'hits_total') == 14
+
+
+def metrics_client(registry=None):
+    app = Flask(__name__)
+    _add_metrics_route(app, registry or MetricsRegistry(multiproc_dir=None))
+    return app.test_client()
+
+
+def test_metrics_endpoint_is_limited_to_allowed_addresses(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', None)
+    client = metrics_client()
+
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '127.0.0.1'}).status_code == 200
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 403
+
+
+def test_metrics_endpoint_requires_token_when_configured(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', 'jeton-de-test')
+    client = metrics_client()
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer autre'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer jeton-de-test'},
+                          environ_base={'REMOTE_ADDR': '203.0.113.7'})
+    assert response.status_code == 200
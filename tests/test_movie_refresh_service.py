@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from database.db import db
+from models.movie import Movie
+from services.movie_refresh_service import MovieRefresher
+from services.tmdb_client import FixtureAdapter, TMDBClient
+
+
+def refresher(routes=None):
+    adapter = FixtureAdapter(routes)
+    return MovieRefresher(client=TMDBClient(session=adapter.session(), max_retries=0), batch_size=10), adapter
+
+
+def test_batch_of_missing_movies_is_marked_fetched(app):
+    db.session.add_all([Movie(id=1, title="Film inconnu"), Movie(id=2, title="Film inconnu")])
+    db.session.commit()
+    movie_refresher, adapter = refresher()
+
+    assert movie_refresher.run_once() == 0
+    db.session.remove()
+
+    assert all(movie.fetched_at is not None for movie in Movie.query.all())
+    # Le lot suivant ne reprend pas les mêmes films
+    movie_refresher.run_once()
+    assert sorted(adapter.calls) == ['/movie/1', '/movie/2']
+
+
+def test_found_movies_are_updated(app):
+    db.session.add(Movie(id=550, title="Film inconnu"))
+    db.session.commit()
+    movie_refresher, _ = refresher({'/movie/550': {'id': 550, 'title': "Fight Club", 'genres': []}})
+
+    assert movie_refresher.run_once() == 1
+    db.session.remove()
+
+    movie = db.session.get(Movie, 550)
+    assert movie.title == "Fight Club"
+    assert movie.fetched_at is not None
+
+
+def test_tmdb_calls_run_without_open_transaction(app):
+    db.session.add(Movie(id=550, title="Film inconnu"))
+    db.session.commit()
+    movie_refresher, _ = refresher({'/movie/550': {'id': 550, 'title': "Fight Club", 'genres': []}})
+    session = db.session()
+    fetch = movie_refresher._fetch
+    in_transaction = []
+
+    def spy(movie_id):
+        in_transaction.append(session.in_transaction())
+        return fetch(movie_id)
+
+    movie_refresher._fetch = spy
+    assert movie_refresher.run_once() == 1
+    assert in_transaction == [False]
+
+
+def test_failed_fetch_stays_claimed_until_lease_expires(app):
+    db.session.add(Movie(id=550, title="Film inconnu"))
+    db.session.commit()
+    movie_refresher, adapter = refresher({'/movie/550': (500, {'status_message': "Erreur"})})
+
+    assert movie_refresher.run_once() == 0
+    movie_refresher.run_once()
+    assert adapter.calls == ['/movie/550']
+
+    # Réservation expirée
+    db.session.get(Movie, 550).fetched_at = datetime.utcnow() - movie_refresher.ttl - timedelta(seconds=1)
+    db.session.commit()
+    movie_refresher.run_once()
+    assert adapter.calls == ['/movie/550', '/movie/550']
+
+
+def test_hints_are_ignored_while_refresher_is_stopped(app):
+    movie_refresher, _ = refresher()
+    movie_refresher.hint(550)
+    assert movie_refresher._take_hints(10) == []
+
+    movie_refresher._enabled = True
+    movie_refresher.hint(550)
+    assert movie_refresher._take_hints(10) == [550]
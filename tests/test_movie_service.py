@@ -0,0 +1,45 @@
+import threading
+import time
+
+from database.db import db
+from models.movie import Movie
+from services import movie_service
+
+
+def test_concurrent_get_or_create_fetches_and_inserts_once(app, monkeypatch):
+    fetches = []
+    inserts = []
+
+    def slow_fetch(movie_id):
+        fetches.append(movie_id)
+        time.sleep(0.2)
+        return {'title': "Fight Club", 'overview': None, 'poster_path': None, 'genres': None,
+                'popularity': 1.0, 'release_date': None}
+
+    real_insert = movie_service.insert_movie_if_absent
+
+    def counting_insert(**values):
+        inserts.append(values['id'])
+        return real_insert(**values)
+
+    monkeypatch.setattr(movie_service, 'get_movie_from_tmdb', slow_fetch)
+    monkeypatch.setattr(movie_service, 'insert_movie_if_absent', counting_insert)
+    results = []
+
+    def request(movie_id):
+        with app.app_context():
+            movie, created = movie_service.get_or_create_movie(movie_id)
+            results.append((movie.id, created))
+            db.session.remove()
+
+    # Même film demandé en entier et en chaîne
+    threads = [threading.Thread(target=request, args=(550 if i % 2 else "550",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetches == [550]
+    assert inserts == [550]
+    assert sorted(results) == [(550, False)] * 7 + [(550, True)]
+    assert Movie.query.count() == 1
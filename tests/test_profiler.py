@@ -0,0 +1,83 @@
+import os
+import time
+
+from flask import Flask
+
+from utils import profiler
+from utils.profiler import init_profiler, sign_profile_request, verify_profile_header
+
+SECRET = 'secret-de-test'
+
+
+def test_valid_header_is_accepted():
+    header = sign_profile_request('GET', '/api/movies', secret=SECRET)
+
+    assert verify_profile_header(header, 'get', '/api/movies', secret=SECRET)
+
+
+def test_expired_header_is_rejected():
+    header = sign_profile_request('GET', '/api/movies', ttl=-10, secret=SECRET)
+
+    assert not verify_profile_header(header, 'GET', '/api/movies', secret=SECRET)
+
+
+def test_header_is_bound_to_method_and_path():
+    header = sign_profile_request('GET', '/api/movies', secret=SECRET)
+
+    assert not verify_profile_header(header, 'GET', '/api/users/1/stats', secret=SECRET)
+    assert not verify_profile_header(header, 'POST', '/api/movies', secret=SECRET)
+
+
+def test_tampered_header_is_rejected():
+    expires, signature = sign_profile_request('GET', '/api/movies', secret=SECRET).split('.')
+
+    assert not verify_profile_header(f"{int(expires) + 3600}.{signature}", 'GET', '/api/movies', secret=SECRET)
+    assert not verify_profile_header(f"{expires}.{signature[:-1]}{'1' if signature[-1] == '0' else '0'}", 'GET', '/api/movies', secret=SECRET)
+    assert not verify_profile_header(sign_profile_request('GET', '/api/movies', secret='autre'),
+                                     'GET', '/api/movies', secret=SECRET)
+
+
+def profiled_app(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, 'PROFILE_SECRET', SECRET)
+    monkeypatch.setattr(profiler, 'PROFILE_DIR', str(tmp_path))
+    app = Flask(__name__)
+
+    @app.route('/api/movies')
+    def movies():
+        return {'movies': []}
+
+    init_profiler(app)
+    return app.test_client()
+
+
+def test_signed_request_writes_profile_file(monkeypatch, tmp_path):
+    client = profiled_app(monkeypatch, tmp_path)
+
+    response = client.get('/api/movies', headers={'X-Profile': sign_profile_request('GET', '/api/movies')})
+
+    assert response.status_code == 200
+    filename = response.headers['X-Profile-File']
+    assert filename.endswith('.prof')
+    assert os.listdir(tmp_path) == [filename]
+
+
+def test_invalid_header_is_not_profiled(monkeypatch, tmp_path):
+    client = profiled_app(monkeypatch, tmp_path)
+
+    response = client.get('/api/movies', headers={'X-Profile': sign_profile_request('GET', '/api/other')})
+
+    assert response.status_code == 200
+    assert 'X-Profile-File' not in response.headers
+    assert os.listdir(tmp_path) == []
+
+
+def test_oldest_profiles_are_pruned(monkeypatch, tmp_path):
+    client = profiled_app(monkeypatch, tmp_path)
+    monkeypatch.setattr(profiler, 'PROFILE_MAX_FILES', 2)
+    for age, name in enumerate(['c.prof', 'b.prof', 'a.prof']):
+        (tmp_path / name).write_text('')
+        os.utime(tmp_path / name, (time.time() - 100 + age, time.time() - 100 + age))
+
+    response = client.get('/api/movies', headers={'X-Profile': sign_profile_request('GET', '/api/movies')})
+
+    assert sorted(os.listdir(tmp_path)) == sorted(['a.prof', response.headers['X-Profile-File']])
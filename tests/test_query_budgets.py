@@ -0,0 +1,57 @@
+from database.db import db
+from models.comment import Comment
+from models.comment_like import CommentLike
+from models.like import Like
+from models.movie import Movie
+from models.user import User
+from utils import query_profiler
+from utils.query_profiler import QueryStats, assert_max_queries
+
+
+def add_comments(count):
+    db.session.add_all([User(id=user_id, fullname=f"User {user_id}", email=f"{user_id}@example.com")
+                        for user_id in (1, 2)])
+    db.session.add(Movie(id=10, title="Film"))
+    for index in range(count):
+        comment = Comment(movie_id=10, user_id=1, content=f"Commentaire {index}")
+        reply = Comment(movie_id=10, user_id=2, content="Réponse", parent=comment)
+        db.session.add_all([comment, reply])
+        db.session.flush()
+        db.session.add_all([CommentLike(comment_id=comment.id, user_id=2), CommentLike(comment_id=reply.id, user_id=1)])
+    db.session.commit()
+    db.session.remove()
+
+
+def test_comment_list_query_budget_does_not_grow_with_comments(app, client):
+    add_comments(10)
+    with assert_max_queries(9, 'GET /api/movies/<id>/comments/'):
+        response = client.get('/api/movies/10/comments/?user_id=2')
+
+    assert response.status_code == 200
+    comments = response.get_json()
+    assert len(comments) == 10
+    assert all(comment['likes_count'] == 1 and comment['is_liked_by_user'] for comment in comments)
+    assert all(len(comment['replies']) == 1 and not comment['replies'][0]['is_liked_by_user'] for comment in comments)
+
+
+def test_user_stats_query_budget(app, client):
+    add_comments(3)
+    db.session.add(Like(user_id=1, movie_id=10))
+    db.session.commit()
+    with assert_max_queries(9, 'GET /api/users/<id>/stats'):
+        response = client.get('/api/users/1/stats')
+
+    assert response.status_code == 200
+    assert response.get_json()['commentsCount'] == 3
+
+
+def test_statements_are_normalized_only_when_read(monkeypatch):
+    calls = []
+    monkeypatch.setattr(query_profiler, 'normalize_statement', lambda statement: calls.append(statement) or statement)
+    stats = QueryStats()
+    for _ in range(3):
+        stats.add("SELECT * FROM movies WHERE id = ?", 1.0)
+    assert calls == []
+
+    assert stats.top_statements() == [("SELECT * FROM movies WHERE id = ?", 3)]
+    assert len(calls) == 1
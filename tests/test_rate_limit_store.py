@@ -0,0 +1,129 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import rate_limit_store
+from utils.rate_limit_store import MemoryStore, RedisStore, SQLiteStore
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit_store, 'time', SimpleNamespace(time=fake))
+    return fake
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryStore(stripes=4)
+    return SQLiteStore(path=str(tmp_path / 'rate_limits.db'))
+
+
+def test_burst_then_refusal(store, clock):
+    results = [store.hit('client', limit=3, window=60) for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    assert results[3].retry_after == pytest.approx(20)
+
+
+def test_steady_state_refill(store, clock):
+    for _ in range(3):
+        store.hit('client', limit=3, window=60)
+
+    clock.now += 19
+    assert not store.hit('client', limit=3, window=60).allowed
+
+    # Un intervalle window / limit rend exactement une requête
+    clock.now += 1
+    result = store.hit('client', limit=3, window=60)
+    assert result.allowed and result.remaining == 0
+    assert not store.hit('client', limit=3, window=60).allowed
+
+    # Une fenêtre complète d'inactivité rend toute la rafale
+    clock.now += 60
+    assert store.hit('client', limit=3, window=60).remaining == 2
+
+
+def test_keys_are_independent(store, clock):
+    for _ in range(3):
+        store.hit('a', limit=3, window=60)
+
+    assert not store.hit('a', limit=3, window=60).allowed
+    assert store.hit('b', limit=3, window=60).allowed
+
+
+def test_memory_sweep_drops_idle_keys(clock):
+    store = MemoryStore(stripes=1, sweep_every=3)
+    store.hit('a', limit=3, window=60)
+    store.hit('b', limit=3, window=60)
+    assert len(store) == 2
+
+    clock.now += 60
+    store.hit('c', limit=3, window=60)
+    assert len(store) == 1
+
+
+def test_sqlite_limit_is_shared_between_threads_and_connections(tmp_path):
+    path = str(tmp_path / 'rate_limits.db')
+    # Deux instances sur le même fichier simulent deux workers gunicorn
+    stores = [SQLiteStore(path=path), SQLiteStore(path=path)]
+    allowed = []
+    allowed_lock = threading.Lock()
+
+    def worker(store):
+        for _ in range(10):
+            result = store.hit('client', limit=20, window=3600)
+            with allowed_lock:
+                allowed.append(result.allowed)
+
+    threads = [threading.Thread(target=worker, args=(stores[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(allowed) == 80
+    assert sum(allowed) == 20
+
+
+@pytest.fixture
+def redis_store():
+    if rate_limit_store.redis is None:
+        pytest.skip("paquet redis non installé")
+    store = RedisStore(prefix='ratelimit-test:')
+    try:
+        store.client.ping()
+    except rate_limit_store.redis.exceptions.ConnectionError:
+        pytest.skip("serveur Redis indisponible")
+    store.clear()
+    yield store
+    store.clear()
+
+
+def test_redis_burst_then_refusal(redis_store):
+    results = [redis_store.hit('client', limit=3, window=60) for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    assert 19 < results[3].retry_after <= 20
+
+
+def test_redis_refill(redis_store):
+    for _ in range(2):
+        redis_store.hit('client', limit=2, window=0.2)
+    assert not redis_store.hit('client', limit=2, window=0.2).allowed
+
+    time.sleep(0.15)
+    assert redis_store.hit('client', limit=2, window=0.2).allowed
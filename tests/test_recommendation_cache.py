@@ -0,0 +1,43 @@
+from database.db import db
+from models.movie import Movie
+from services import recommendation_service as recommendations
+from services.recommendation_cache import RecommendationCache
+from utils.query_profiler import assert_max_queries
+
+
+def test_hit_until_a_version_changes():
+    cache = RecommendationCache()
+    cache.put(1, 3, 7, [{'id': 10}, {'id': 11}, {'id': 12}], 20)
+
+    assert cache.get(1, 3, 7, 2) == [{'id': 10}, {'id': 11}]
+    assert cache.get(1, 3, 8, 2) is None  # nouvelle interaction de l'utilisateur
+    assert cache.get(1, 4, 7, 2) is None  # modèles réentraînés
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_short_but_complete_list_is_a_hit():
+    cache = RecommendationCache()
+    cache.put(1, 0, 0, [{'id': 10}], 20)
+
+    assert cache.get(1, 0, 0, 10) == [{'id': 10}]
+    # Une profondeur supérieure à celle calculée doit être recalculée
+    assert cache.get(1, 0, 0, 30) is None
+
+
+def test_entries_do_not_expire_by_default():
+    cache = RecommendationCache()
+    cache.put(1, 0, 0, [{'id': 10}], 20)
+    assert cache.max_age == 0
+    assert cache.get(1, 0, 0, 1) == [{'id': 10}]
+
+
+def test_recommended_movies_are_loaded_in_one_query(app, monkeypatch):
+    db.session.add_all([Movie(id=movie_id, title=f"Film {movie_id}") for movie_id in range(1, 21)])
+    db.session.commit()
+    ranking = list(range(20, 0, -1))
+    monkeypatch.setattr(recommendations.recommendation_service, 'get_hybrid_recommendations',
+                        lambda user_id, top_n: ranking[:top_n])
+
+    with assert_max_queries(1, 'films recommandés'):
+        movies = recommendations.get_recommendations_for_user(1, 20)
+    assert [movie.id for movie in movies] == ranking
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from services.recommendation_pipeline import CandidateGenerator, RecommendationPipeline, generator_score_feature
+from services.recommendation_service import RecommendationService
+
+
+def test_cold_start_trains_once_in_background(app, monkeypatch):
+    service = RecommendationService()
+    calls = []
+
+    def slow_training():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.3)
+        return False
+
+    monkeypatch.setattr(service, 'train_collaborative_model', slow_training)
+    monkeypatch.setattr(service, 'train_content_based_model', lambda: False)
+    monkeypatch.setattr(service, 'get_collaborative_scores', lambda *args: pytest.fail("modèle pas prêt"))
+
+    def request():
+        with app.app_context():
+            service.pipeline.recommend(1, 10)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Les requêtes n'attendent pas l'entraînement
+    assert time.perf_counter() - started < 0.3
+    service._warmup_thread.join()
+    assert calls == ['recommendation-warmup']
+    assert service.pipeline.stage_stats()['collaborative']['skipped'] == 8
+
+
+def test_history_wait_has_a_deadline(app):
+    class SlowHistoryService(RecommendationService):
+        def get_user_history(self, user_id):
+            time.sleep(0.5)
+            return set()
+
+    pipeline = RecommendationPipeline(SlowHistoryService(), budget_ms=10, history_timeout_ms=50)
+    pipeline.generators = []
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        pipeline.recommend(1, 10)
+    assert time.perf_counter() - started < 0.4
+
+
+def test_score_lookups_never_train_inline(app, monkeypatch):
+    service = RecommendationService()
+    request_thread = threading.current_thread()
+
+    def training():
+        assert threading.current_thread() is not request_thread
+        return False
+
+    monkeypatch.setattr(service, 'train_collaborative_model', training)
+    monkeypatch.setattr(service, 'train_content_based_model', training)
+
+    assert service.get_collaborative_scores(1) == []
+    assert service.get_content_based_scores([550]) == []
+    service._warmup_thread.join()
+
+
+def test_saturated_pool_falls_back_to_serial_generation(app):
+    from services import recommendation_pipeline
+
+    release = threading.Event()
+    for _ in range(recommendation_pipeline.RECOMMENDATION_WORKERS):
+        recommendation_pipeline.submit_stage(release.wait, 5)
+    try:
+        class Service(RecommendationService):
+            def get_user_history(self, user_id):
+                return set()
+
+        pipeline = RecommendationPipeline(Service(), budget_ms=200, history_timeout_ms=200)
+        threads = []
+        pipeline.generators = [CandidateGenerator(
+            'test', lambda context, limit: threads.append(threading.current_thread()) or [(550, 1.0)], 100
+        )]
+        pipeline.features = [('test', generator_score_feature('test'), 1.0)]
+
+        # Le pool est occupé par des étages abandonnés : la requête ne les attend pas
+        assert pipeline.recommend(1, 10) == [550]
+        assert threads == [threading.current_thread()]
+    finally:
+        release.set()
@@ -0,0 +1,54 @@
+from flask import Flask
+
+from utils.proxy import init_proxy_fix
+from utils.rate_limiter import RateLimitPolicies, RateLimitPolicy, get_client_ip
+from utils.request_guard import RequestGuard
+
+
+def client_ip(hops, forwarded_for):
+    app = Flask(__name__)
+    init_proxy_fix(app, hops=hops)
+
+    @app.route('/ip')
+    def ip():
+        return get_client_ip()
+
+    response = app.test_client().get('/ip', headers={'X-Forwarded-For': forwarded_for},
+                                     environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    return response.get_data(as_text=True)
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxy():
+    assert client_ip(0, '1.2.3.4') == '10.0.0.1'
+
+
+def test_client_ip_comes_from_the_trusted_hop():
+    # Seule l'entrée ajoutée par le proxy de confiance compte, pas celle forgée par le client
+    assert client_ip(1, '6.6.6.6, 1.2.3.4') == '1.2.3.4'
+
+
+def test_anonymous_clients_are_not_blocked_without_trusted_ip():
+    guard = RequestGuard(window=60, block_threshold=3, block_seconds=60, block_ips=False)
+    results = [guard.check('ip:10.0.0.1', 'movies', 100.0 + i) for i in range(6)]
+    assert all(blocked_until is None for blocked_until, _ in results)
+    # Une seule alerte au franchissement du seuil
+    assert [count for _, count in results].count(4) == 1
+
+    blocked_until, _ = [guard.check('user:1', 'movies', 100.0 + i) for i in range(4)][-1]
+    assert blocked_until == 163.0
+
+
+def test_policy_resolution_order():
+    default = RateLimitPolicy('default', 100)
+    user_data = RateLimitPolicy('user_data', 15)
+    train = RateLimitPolicy('train', 1, 300)
+    policies = RateLimitPolicies(default, blueprints={'recommendation': user_data},
+                                 endpoints={'recommendation.train_models': train})
+
+    # L'endpoint l'emporte sur son blueprint, le blueprint sur la politique par défaut
+    assert policies.resolve('recommendation.train_models') is train
+    assert policies.resolve('recommendation.get_popular_movies') is user_data
+    assert policies.resolve('movie.get_movies') is default
+    assert policies.resolve(None) is default
+    # Résultat mémorisé : même politique au second appel
+    assert policies.resolve('recommendation.train_models') is train
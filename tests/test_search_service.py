@@ -0,0 +1,34 @@
+from database.db import db
+from models.movie import Movie
+from repositories.movie_repository import bulk_upsert_movies, insert_movie_if_absent
+from services.search_service import search_movies
+
+
+def titles(result):
+    return [movie['title'] for movie in result['movies']]
+
+
+def test_core_writes_are_searchable_after_commit(app):
+    db.session.add(Movie(id=1, title="Blade Runner", overview="Réplicants"))
+    db.session.commit()
+    assert titles(search_movies('blade')) == ["Blade Runner"]
+
+    insert_movie_if_absent(id=2, title="Blade Runner 2049")
+    db.session.commit()
+    bulk_upsert_movies([{'id': 3, 'title': "Blade of the Immortal", 'overview': None, 'popularity': 1.0}])
+
+    assert sorted(titles(search_movies('blade'))) == ["Blade Runner", "Blade Runner 2049", "Blade of the Immortal"]
+
+
+def test_rolled_back_core_writes_are_not_indexed(app):
+    db.session.add(Movie(id=1, title="Alien"))
+    db.session.commit()
+    search_movies('alien')
+
+    insert_movie_if_absent(id=2, title="Film inconnu")
+    db.session.rollback()
+    db.session.add(Movie(id=3, title="Aliens"))
+    db.session.commit()
+
+    assert sorted(titles(search_movies('alien'))) == ["Alien", "Aliens"]
+    assert search_movies('inconnu')['total'] == 0
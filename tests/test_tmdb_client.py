@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from services.tmdb_client import FixtureAdapter, TMDBClient, TMDBRateLimitError, TokenBucket
+
+
+def fixture_client(routes=None, **options):
+    adapter = FixtureAdapter(routes)
+    return TMDBClient(session=adapter.session(), **options), adapter
+
+
+@pytest.fixture
+def flaky_server():
+    """Faux serveur TMDB : répond 503 aux `failures` premiers appels, puis 200."""
+    state = {'failures': 2, 'calls': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state['calls'] += 1
+            if state['calls'] <= state['failures']:
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = json.dumps({'id': 550, 'title': 'Fight Club'}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/3", state
+    server.shutdown()
+
+
+def test_transient_errors_are_retried(flaky_server):
+    base_url, state = flaky_server
+    client = TMDBClient(base_url=base_url, max_retries=3, backoff_factor=0)
+
+    assert client.get_movie(550) == {'id': 550, 'title': 'Fight Club'}
+    assert state['calls'] == 3
+
+
+def test_retries_are_bounded(flaky_server):
+    base_url, state = flaky_server
+    state['failures'] = 10
+    client = TMDBClient(base_url=base_url, max_retries=2, backoff_factor=0)
+
+    with pytest.raises(Exception):
+        client.get_movie(550)
+    assert state['calls'] == 3
+
+
+def test_not_found_is_cached():
+    client, adapter = fixture_client()
+
+    assert client.get_movie(1) is None
+    assert client.get_movie(1) is None
+    assert adapter.calls == ['/movie/1']
+
+
+def test_cached_responses_expire():
+    client, adapter = fixture_client({'/movie/550': {'id': 550}}, cache_ttl=0.05)
+
+    client.get_movie(550)
+    client.get_movie(550)
+    assert len(adapter.calls) == 1
+
+    time.sleep(0.1)
+    client.get_movie(550)
+    assert len(adapter.calls) == 2
+
+
+def test_token_bucket_refuses_after_burst():
+    bucket = TokenBucket(rate=1, capacity=2)
+
+    assert bucket.acquire(timeout=0)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0.01)
+
+
+def test_request_path_does_not_wait_for_a_token():
+    client, _ = fixture_client({'/movie/1': {'id': 1}, '/movie/2': {'id': 2}},
+                               rate_per_second=0.1, burst=1, rate_limit_timeout=0.01)
+
+    client.get_movie(1)
+    started = time.monotonic()
+    with pytest.raises(TMDBRateLimitError):
+        client.get_movie(2)
+    assert time.monotonic() - started < 0.5
+    # Les réponses en cache ne consomment pas de jeton
+    assert client.get_movie(1) == {'id': 1}
+
+
+def test_batch_view_shares_bucket_and_cache():
+    client, adapter = fixture_client({'/movie/1': {'id': 1}}, rate_limit_timeout=0.01)
+    batch_client = client.for_batch_jobs()
+
+    assert batch_client.rate_limit_timeout > client.rate_limit_timeout
+    assert batch_client.bucket is client.bucket
+    client.get_movie(1)
+    batch_client.get_movie(1)
+    assert adapter.calls == ['/movie/1']
+
+
+def test_long_retry_after_fails_fast_on_request_path():
+    client, adapter = fixture_client({'/movie/550': (429, {}, {'Retry-After': '120'})}, rate_limit_timeout=0.01)
+
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_movie(550)
+    assert time.monotonic() - started < 0.5
+    assert adapter.calls == ['/movie/550']
+
+
+def test_retries_take_a_token():
+    client, adapter = fixture_client({'/movie/550': (503, {})}, backoff_factor=0,
+                                     rate_per_second=0.1, burst=2, rate_limit_timeout=0.01)
+
+    with pytest.raises(TMDBRateLimitError):
+        client.get_movie(550)
+    assert adapter.calls == ['/movie/550', '/movie/550']
+
+
+def test_cached_responses_are_copies():
+    client, adapter = fixture_client({'/movie/550': {'id': 550, 'genres': [{'id': 18}]}})
+
+    client.get_movie(550)['genres'].append({'id': 99})
+    client.get_movie(550)['title'] = "Modifié"
+    assert client.get_movie(550) == {'id': 550, 'genres': [{'id': 18}]}
+    assert adapter.calls == ['/movie/550']
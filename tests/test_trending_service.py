@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from database.db import db
+from models.like import Like
+from models.movie import Movie
+from services import trending_service
+from services.trending_service import BUCKET_SECONDS, TrendingTracker
+
+# Milieu d'une heure : le seau le plus ancien de chaque fenêtre compte pour moitié
+NOW = 480_000 * BUCKET_SECONDS + BUCKET_SECONDS / 2
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = SimpleNamespace(now=NOW)
+    monkeypatch.setattr(trending_service, 'time', SimpleNamespace(time=lambda: fake.now, monotonic=time.monotonic))
+    return fake
+
+
+def warm_tracker():
+    tracker = TrendingTracker()
+    tracker._warm_started = tracker._warmed = True
+    return tracker
+
+
+def test_windows_slide_and_oldest_bucket_decays(clock):
+    tracker = warm_tracker()
+    tracker._add(1, 'like', NOW - 2 * BUCKET_SECONDS)
+    tracker._add(2, 'like', NOW - BUCKET_SECONDS)
+    tracker._add(3, 'like', NOW - 24 * BUCKET_SECONDS)
+
+    assert tracker.scores('1h') == {2: pytest.approx(1.5)}
+    assert tracker.scores('24h') == {1: pytest.approx(3.0), 2: pytest.approx(3.0), 3: pytest.approx(1.5)}
+    assert tracker.scores('7d') == {1: 3.0, 2: 3.0, 3: 3.0}
+
+    # Au-delà de 7 jours les seaux sont vidés et les lignes libérées
+    clock.now += 7 * 24 * BUCKET_SECONDS
+    assert tracker.scores('7d') == {}
+    assert tracker._rows == {}
+
+
+def test_removed_interactions_are_subtracted(clock):
+    tracker = warm_tracker()
+    liked_at = datetime.utcfromtimestamp(NOW - BUCKET_SECONDS)
+    tracker._add(1, 'like', NOW - BUCKET_SECONDS)
+    tracker._add(1, 'watchlist', NOW - BUCKET_SECONDS)
+
+    tracker.forget(1, 'like', liked_at)
+    assert tracker.scores('24h') == {1: pytest.approx(2.0)}
+
+    # Jamais de compteur négatif, même si la suppression est rejouée
+    tracker.forget(1, 'watchlist', liked_at)
+    tracker.forget(1, 'watchlist', liked_at)
+    assert tracker.scores('24h') == {}
+
+
+def test_ranking_is_ordered_by_weighted_score_and_returns_copies(app, clock):
+    db.session.add_all([Movie(id=movie_id, title=f"Film {movie_id}") for movie_id in (1, 2, 3)])
+    db.session.commit()
+    tracker = warm_tracker()
+    for movie_id, kind in ((1, 'comment'), (2, 'like'), (2, 'watchlist'), (3, 'like')):
+        tracker._add(movie_id, kind, NOW - BUCKET_SECONDS)
+
+    ranking = tracker.trending('7d', 10)
+    assert [(movie['id'], movie['trending_score']) for movie in ranking] == [(2, 5.0), (3, 3.0), (1, 1.0)]
+
+    ranking[0]['trending_score'] = 0
+    assert tracker.trending('7d', 1)[0]['trending_score'] == 5.0
+
+
+def test_first_request_warms_in_background(app):
+    db.session.add(Movie(id=550, title="Fight Club"))
+    db.session.add(Like(user_id=1, movie_id=550, created_at=datetime.utcnow() - timedelta(hours=2)))
+    db.session.commit()
+    tracker = TrendingTracker()
+
+    # Pas de chargement sur le chemin de la requête : classement vide en attendant
+    assert tracker.trending('24h') == []
+    assert tracker._warm_done.wait(5)
+
+    tracker.record(550, 'comment')
+    assert tracker.top_ids('24h') == [(550, 4.0)]
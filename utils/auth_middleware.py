@@ -0,0 +1,184 @@
+import os
+import time
+import datetime
+import threading
+from collections import OrderedDict
+from functools import wraps
+import jwt
+from flask import g, request, session, jsonify
+from database.db import db
+from models.user import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECRET_KEY = os.environ.get('SECRET_KEY', 'votre_clef_secrete_par_defaut')
+AUTH_TOKEN_TTL = datetime.timedelta(hours=float(os.getenv('AUTH_TOKEN_TTL_HOURS', 24)))
+# Durée de vie d'un utilisateur en cache : borne le retard d'un worker qui n'a pas vu une mise à jour de profil
+AUTH_PRINCIPAL_TTL = float(os.getenv('AUTH_PRINCIPAL_TTL', 60))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv('AUTH_PRINCIPAL_CACHE_SIZE', 10000))
+
+_UNSET = object()
+
+
+class UserPrincipal:
+    """Utilisateur authentifié, réduit à son profil public (mêmes champs que User.to_dict)."""
+
+    __slots__ = ('id', 'fullname', 'email', 'image', 'created_at')
+
+    def __init__(self, id, fullname, email, image, created_at):
+        self.id = id
+        self.fullname = fullname
+        self.email = email
+        self.image = image
+        self.created_at = created_at
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'fullname': self.fullname,
+            'email': self.email,
+            'image': self.image,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class PrincipalCache:
+    """
+    Cache LRU borné avec TTL des utilisateurs authentifiés, par processus.
+    Les mises à jour de profil l'invalident explicitement (invalidate) ; le
+    TTL couvre les autres workers.
+    """
+
+    def __init__(self, ttl=AUTH_PRINCIPAL_TTL, max_size=AUTH_PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, user_id, principal):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def generate_token(user_id):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    payload = {
+        'exp': now + AUTH_TOKEN_TTL,
+        'iat': now,
+        # PyJWT exige un sujet de type chaîne
+        'sub': str(user_id)
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
+
+
+def decode_token(token):
+    """ID utilisateur d'un JWT ; lève jwt.ExpiredSignatureError / jwt.InvalidTokenError."""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+    try:
+        return int(payload['sub'])
+    except (KeyError, TypeError, ValueError):
+        raise jwt.InvalidTokenError('Sujet du token invalide')
+
+
+def current_user_id():
+    """
+    ID de l'utilisateur authentifié (JWT Bearer, sinon session), ou None.
+
+    Le token n'est vérifié qu'une fois par requête : le résultat est gardé
+    dans g, et l'éventuelle erreur dans g.auth_error. Aucun accès à la base.
+    """
+    user_id = g.get('user_id', _UNSET)
+    if user_id is not _UNSET:
+        return user_id
+
+    user_id = None
+    g.auth_error = None
+    header = request.headers.get('Authorization')
+    if header and header.startswith('Bearer '):
+        try:
+            user_id = decode_token(header.split(' ', 1)[1])
+        except jwt.ExpiredSignatureError:
+            g.auth_error = 'Token expiré'
+        except jwt.InvalidTokenError:
+            g.auth_error = 'Token invalide'
+    else:
+        user_id = session.get('id')
+    g.user_id = user_id
+    return user_id
+
+
+def load_principal(user_id):
+    """Utilisateur compact depuis le cache, sinon depuis la base (colonnes utiles seulement)."""
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = db.session.query(
+            User.id, User.fullname, User.email, User.image, User.created_at
+        ).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        principal = UserPrincipal(row.id, row.fullname, row.email, row.image, row.created_at)
+        principal_cache.set(user_id, principal)
+    return principal
+
+
+def current_user():
+    """
+    Utilisateur authentifié (UserPrincipal) ou None.
+
+    Chargé à la première demande seulement, puis gardé dans g.user : les
+    routes qui n'en ont pas besoin ne paient aucune requête, et un
+    utilisateur en cache n'en coûte aucune.
+    """
+    user = g.get('user', _UNSET)
+    if user is _UNSET:
+        user_id = current_user_id()
+        user = load_principal(user_id) if user_id is not None else None
+        g.user = user
+    return user
+
+
+def token_required(f):
+    """Réserve une route aux utilisateurs authentifiés ; passe l'utilisateur (UserPrincipal) en premier argument."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        user = current_user()
+        if user is None:
+            if g.user_id is not None:
+                # Session ou token d'un utilisateur supprimé
+                session.pop('id', None)
+                return jsonify({'error': 'Utilisateur non trouvé'}), 404
+            return jsonify({'error': g.auth_error or 'Token manquant'}), 401
+        return f(user, *args, **kwargs)
+    return decorated
+
+
+# Créer une instance du service
+principal_cache = PrincipalCache()
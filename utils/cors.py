@@ -0,0 +1,66 @@
+import os
+
+# Origines autorisées, séparées par des virgules
+CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'https://client-enqldel1w-louraknouhaila-5950s-projects.vercel.app')
+# Durée de mise en cache des réponses preflight par le navigateur (secondes)
+CORS_MAX_AGE = int(os.getenv('CORS_MAX_AGE', 86400))
+CORS_PATH_PREFIXES = ('/api/', '/static/')
+CORS_ALLOW_METHODS = 'GET, POST, PUT, DELETE, OPTIONS'
+CORS_ALLOW_HEADERS = 'Content-Type, Authorization, X-Requested-With'
+CORS_EXPOSE_HEADERS = 'Content-Type, Authorization'
+
+
+class CorsMiddleware:
+    """
+    Couche CORS unique, au niveau WSGI, devant Flask.
+
+    Les requêtes preflight (OPTIONS avec Origin et
+    Access-Control-Request-Method) reçoivent directement un 204 avec
+    Access-Control-Max-Age : ni routage, ni hooks before_request (limitation
+    de débit, détection de boucles, logs), ni base de données. Les autres
+    réponses des origines autorisées reçoivent les en-têtes CORS au passage.
+    """
+
+    def __init__(self, wsgi_app, origins=CORS_ORIGINS, max_age=CORS_MAX_AGE, path_prefixes=CORS_PATH_PREFIXES):
+        self.wsgi_app = wsgi_app
+        self.origins = frozenset(origin.strip() for origin in origins.split(',') if origin.strip())
+        self.path_prefixes = tuple(path_prefixes)
+        self.preflight_headers = [
+            ('Access-Control-Allow-Methods', CORS_ALLOW_METHODS),
+            ('Access-Control-Allow-Headers', CORS_ALLOW_HEADERS),
+            ('Access-Control-Allow-Credentials', 'true'),
+            ('Access-Control-Max-Age', str(max_age))
+        ]
+        self.response_headers = [
+            ('Access-Control-Allow-Credentials', 'true'),
+            ('Access-Control-Expose-Headers', CORS_EXPOSE_HEADERS)
+        ]
+
+    def __call__(self, environ, start_response):
+        if not environ.get('PATH_INFO', '').startswith(self.path_prefixes):
+            return self.wsgi_app(environ, start_response)
+
+        origin = environ.get('HTTP_ORIGIN')
+        allowed = origin in self.origins
+
+        if environ['REQUEST_METHOD'] == 'OPTIONS' and origin and 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' in environ:
+            headers = [('Vary', 'Origin'), ('Content-Length', '0')]
+            if allowed:
+                headers += [('Access-Control-Allow-Origin', origin)] + self.preflight_headers
+            start_response('204 No Content', headers)
+            return [b'']
+
+        if not allowed:
+            return self.wsgi_app(environ, start_response)
+
+        def cors_start_response(status, headers, exc_info=None):
+            headers = [(name, value) for name, value in headers if not name.lower().startswith('access-control-')]
+            headers += [('Access-Control-Allow-Origin', origin), ('Vary', 'Origin')] + self.response_headers
+            return start_response(status, headers, exc_info)
+
+        return self.wsgi_app(environ, cors_start_response)
+
+
+def init_cors(app, **options):
+    """Place le middleware CORS devant l'application Flask."""
+    app.wsgi_app = CorsMiddleware(app.wsgi_app, **options)
@@ -0,0 +1,158 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from flask import has_request_context, request
+
+# Niveau racine et niveaux par module : "services.recommendation_pipeline=DEBUG,werkzeug=WARNING"
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVELS = os.getenv('LOG_LEVELS', 'werkzeug=WARNING')
+# json (une ligne JSON par événement) ou text (lecture humaine en développement)
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+# Échantillonnage des messages INFO / DEBUG fréquents : "controllers.watchlist_controller=0.1"
+LOG_SAMPLING = os.getenv('LOG_SAMPLING', '')
+
+_listener = None
+
+
+def parse_mapping(value, cast):
+    """Analyse "module=valeur,module=valeur" en dictionnaire."""
+    mapping = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        name, raw = item.split('=', 1)
+        mapping[name.strip()] = cast(raw.strip())
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par événement : horodatage, niveau, logger, message et contexte HTTP."""
+
+    def format(self, record):
+        event = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        for attribute in ('http_method', 'http_path'):
+            value = getattr(record, attribute, None)
+            if value is not None:
+                event[attribute] = value
+        if record.exc_info:
+            event['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            event['exception'] = record.exc_text
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Recopie la méthode et le chemin HTTP sur l'événement dans le thread de
+    la requête : le formatage, fait par le thread d'écriture, n'a plus
+    accès au contexte Flask.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.http_method = request.method
+            record.http_path = request.path
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Ne garde qu'une fraction des messages INFO / DEBUG des loggers bruyants ; jamais les WARNING et plus.
+
+    Comme les niveaux, une règle s'applique aux loggers descendants : "services"
+    couvre "services.tmdb_client", la règle la plus spécifique l'emportant.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self._resolved = {}  # nom de logger -> taux (None sans règle) ; une course ne fait que recalculer
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate is None or random.random() < rate
+
+    def rate_for(self, name):
+        if name not in self._resolved:
+            rate = None
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._resolved[name] = rate
+        return self._resolved[name]
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler qui ne fait dans le thread appelant que le strict
+    nécessaire : interpoler le message (les arguments peuvent changer
+    ensuite) et figer la trace d'exception. Le formatage JSON et l'écriture
+    sont faits par le QueueListener.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level=LOG_LEVEL, levels=LOG_LEVELS, log_format=LOG_FORMAT, sampling=LOG_SAMPLING):
+    """
+    Configure la journalisation du processus (idempotent).
+
+    Les appels de log ne font que pousser l'événement dans une file ; un
+    QueueListener le formate et l'écrit sur la sortie standard dans son
+    propre thread, hors du chemin de la requête. Les niveaux par module
+    (LOG_LEVELS) évitent de construire les messages désactivés, pour peu
+    que les appels utilisent le formatage paresseux (logger.info("%s", x)).
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        JsonFormatter() if log_format == 'json'
+        else logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    )
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    rates = parse_mapping(sampling, float)
+    if rates:
+        queue_handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    for name, module_level in parse_mapping(levels, str.upper).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
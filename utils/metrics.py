@@ -0,0 +1,517 @@
+import os
+import re
+import hmac
+import json
+import time
+import fcntl
+import atexit
+import bisect
+import tempfile
+import threading
+from collections import defaultdict
+from flask import Response, g, jsonify, request
+import logging
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+# Répertoire partagé par les workers gunicorn : chacun y dépose son instantané
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+METRICS_PATH = '/metrics'
+# Accès à /metrics : jeton (Authorization: Bearer ...) si défini, sinon adresses autorisées seulement
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = frozenset(
+    ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()
+)
+# Cumul des compteurs des workers morts, dont les fichiers sont supprimés
+ARCHIVE_FILENAME = 'metrics_archive.json'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Au-delà, les fragments des threads terminés sont fusionnés (serveur werkzeug : un thread par requête)
+MAX_LIVE_SHARDS = 64
+
+_LABEL_ESCAPE = re.compile(r'[\\"\n]')
+_LABEL_REPLACEMENTS = {'\\': '\\\\', '"': '\\"', '\n': '\\n'}
+
+
+class Metric:
+    """Métrique nommée ; les valeurs vivent dans les fragments par thread du registre."""
+
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        values = self.registry.shard()[self.name]
+        key = self._key(labels)
+        values[key] = values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Jauge additive (inc / dec) : les valeurs des fragments et des workers s'additionnent."""
+
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        values = self.registry.shard()[self.name]
+        key = self._key(labels)
+        values[key] = values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        values = self.registry.shard()[self.name]
+        key = self._key(labels)
+        counts = values.get(key)
+        if counts is None:
+            # Un compteur par borne, plus +Inf, plus la somme des observations
+            counts = values[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+
+class MetricsRegistry:
+    """
+    Registre de métriques sans verrou sur le chemin chaud.
+
+    Chaque thread écrit dans son propre fragment (threading.local) : une
+    incrémentation est une simple écriture de dictionnaire, sans contention
+    entre threads. Les fragments ne sont additionnés qu'à la lecture
+    (`snapshot`), et ceux des threads terminés sont fusionnés dans un
+    cumul pour ne pas grossir indéfiniment.
+
+    Les collecteurs (`add_collector`) fournissent à la lecture des valeurs
+    tenues ailleurs (pool de connexions, caches, étages de recommandation).
+
+    En mode multiprocessus (METRICS_MULTIPROC_DIR), chaque worker écrit son
+    instantané dans un fichier du répertoire partagé toutes les
+    METRICS_FLUSH_INTERVAL secondes ; /metrics additionne les fichiers de
+    tous les workers. Les compteurs d'un worker mort sont conservés, ses
+    jauges ignorées : son fichier est fusionné dans un fichier d'archive
+    puis supprimé, au démarrage d'un worker et à chaque lecture.
+    """
+
+    def __init__(self, multiproc_dir=METRICS_MULTIPROC_DIR):
+        self.multiproc_dir = multiproc_dir
+        self._metrics = {}
+        self._collectors = []
+        self._local = threading.local()
+        self._shards = []  # (thread, fragment)
+        self._retired = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._fork_hook_registered = False
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def add_collector(self, fn):
+        """fn() retourne une liste de (nom, type, aide, {labels}, valeur), évaluée à chaque lecture."""
+        self._collectors.append(fn)
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = defaultdict(dict)
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) > MAX_LIVE_SHARDS:
+                    self._retire_dead_shards()
+        return shard
+
+    def _retire_dead_shards(self):
+        """Fusionne les fragments des threads terminés (appelé sous self._lock)."""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for name, values in shard.items():
+                    _merge_values(self._retired[name], values)
+        self._shards = live
+
+    def snapshot(self):
+        """Valeurs de ce processus : {nom: {'type', 'help', 'labelnames', 'buckets', 'samples'}}."""
+        with self._lock:
+            self._retire_dead_shards()
+            totals = defaultdict(dict)
+            for name, values in self._retired.items():
+                _merge_values(totals[name], values)
+            for _, shard in self._shards:
+                # copy() est atomique sous le GIL : pas besoin d'arrêter le thread propriétaire
+                for name, values in list(shard.items()):
+                    _merge_values(totals[name], values.copy())
+            metrics = dict(self._metrics)
+
+        snapshot = {}
+        for name, metric in metrics.items():
+            snapshot[name] = {
+                'type': metric.type,
+                'help': metric.documentation,
+                'labelnames': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'samples': {_encode_key(key): value for key, value in totals.get(name, {}).items()}
+            }
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                logger.warning("⚠️ Collecteur de métriques en échec: %s", e)
+                continue
+            for name, metric_type, documentation, labels, value in samples:
+                entry = snapshot.setdefault(name, {
+                    'type': metric_type, 'help': documentation,
+                    'labelnames': list(labels), 'buckets': [], 'samples': {}
+                })
+                entry['samples'][_encode_key(tuple(str(labels[label]) for label in entry['labelnames']))] = value
+        return snapshot
+
+    def flush(self):
+        """Écrit l'instantané de ce processus dans le répertoire partagé (remplacement atomique)."""
+        if not self.multiproc_dir:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = os.path.join(self.multiproc_dir, f"metrics_{os.getpid()}.json")
+        fd, tmp_path = tempfile.mkstemp(dir=self.multiproc_dir, prefix='.metrics_')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'pid': os.getpid(), 'metrics': self.snapshot()}, f)
+        os.replace(tmp_path, path)
+
+    def start_flusher(self):
+        if not self.multiproc_dir or self._flusher is not None:
+            return
+        try:
+            self.compact_dead_workers()
+        except OSError as e:
+            logger.warning("⚠️ Nettoyage des métriques des workers morts impossible: %s", e)
+
+        def run():
+            while True:
+                time.sleep(METRICS_FLUSH_INTERVAL)
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning("⚠️ Écriture de l'instantané de métriques impossible: %s", e)
+
+        self._flusher = threading.Thread(target=run, name='metrics-flusher', daemon=True)
+        self._flusher.start()
+        if not self._fork_hook_registered:
+            # gunicorn --preload : le thread ne survit pas au fork, chaque worker relance le sien
+            os.register_at_fork(after_in_child=self._after_fork)
+            atexit.register(self.flush)
+            self._fork_hook_registered = True
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._retired = defaultdict(dict)
+        self._flusher = None
+        self.start_flusher()
+
+    def compact_dead_workers(self):
+        """
+        Fusionne les compteurs et histogrammes des workers morts dans le fichier
+        d'archive, puis supprime leurs fichiers. Un verrou fcntl sur l'archive
+        empêche deux workers de fusionner le même fichier.
+
+        Returns:
+            Nombre de fichiers supprimés
+        """
+        if not self.multiproc_dir or not os.path.isdir(self.multiproc_dir):
+            return 0
+        archive_path = os.path.join(self.multiproc_dir, ARCHIVE_FILENAME)
+        with open(os.path.join(self.multiproc_dir, '.metrics_archive.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            dead = []
+            for path, data in self._read_worker_files():
+                if path != archive_path and not _pid_alive(data.get('pid')):
+                    dead.append((path, data))
+            if not dead:
+                return 0
+
+            archive = _read_json(archive_path) or {'pid': None, 'metrics': {}}
+            for _, data in dead:
+                for name, metric in data['metrics'].items():
+                    if metric['type'] == 'gauge':
+                        continue
+                    entry = archive['metrics'].setdefault(name, dict(metric, samples={}))
+                    _merge_values(entry['samples'], metric['samples'])
+            fd, tmp_path = tempfile.mkstemp(dir=self.multiproc_dir, prefix='.metrics_')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(archive, f)
+            os.replace(tmp_path, archive_path)
+            for path, _ in dead:
+                os.remove(path)
+        return len(dead)
+
+    def _read_worker_files(self):
+        for filename in os.listdir(self.multiproc_dir):
+            if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            path = os.path.join(self.multiproc_dir, filename)
+            data = _read_json(path)
+            if data is not None:
+                yield path, data
+
+    def collect(self):
+        """Instantané agrégé : ce processus seul, ou tous les workers en mode multiprocessus."""
+        if not self.multiproc_dir:
+            return self.snapshot()
+        self.flush()
+        try:
+            self.compact_dead_workers()
+        except OSError as e:
+            logger.warning("⚠️ Nettoyage des métriques des workers morts impossible: %s", e)
+        merged = {}
+        for _, data in self._read_worker_files():
+            alive = _pid_alive(data.get('pid'))
+            for name, metric in data['metrics'].items():
+                if metric['type'] == 'gauge' and not alive:
+                    continue
+                entry = merged.setdefault(name, dict(metric, samples={}))
+                _merge_values(entry['samples'], metric['samples'])
+        return merged
+
+    def render(self):
+        """Format d'exposition texte de Prometheus (0.0.4)."""
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labelnames = metric['labelnames']
+            for encoded, value in sorted(metric['samples'].items()):
+                labels = list(zip(labelnames, _decode_key(encoded)))
+                if metric['type'] != 'histogram':
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(metric['buckets']) + ['+Inf'], value[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _format_value(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge_values(target, values):
+    for key, value in values.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(value) if isinstance(value, list) else value
+        elif isinstance(value, list):
+            target[key] = [a + b for a, b in zip(current, value)]
+        else:
+            target[key] = current + value
+
+
+def _encode_key(key):
+    # Clé JSON d'un tuple de valeurs de labels
+    return json.dumps(list(key), ensure_ascii=False)
+
+
+def _decode_key(encoded):
+    return json.loads(encoded)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels) + '}'
+
+
+def _escape_label(value):
+    return _LABEL_ESCAPE.sub(lambda match: _LABEL_REPLACEMENTS[match.group()], str(value))
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return str(value)
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Créer une instance du service
+metrics_registry = MetricsRegistry()
+
+HTTP_REQUESTS = metrics_registry.counter(
+    'http_requests_total', "Requêtes HTTP traitées", ('blueprint', 'route', 'method', 'status')
+)
+HTTP_REQUEST_DURATION = metrics_registry.histogram(
+    'http_request_duration_seconds', "Durée des requêtes HTTP", ('blueprint', 'route', 'method')
+)
+HTTP_IN_FLIGHT = metrics_registry.gauge('http_requests_in_flight', "Requêtes HTTP en cours")
+# Les requêtes refusées par utils/request_guard n'atteignent pas l'instrumentation HTTP
+REQUEST_GUARD_REJECTIONS = metrics_registry.counter(
+    'request_guard_rejections_total', "Requêtes API refusées avant traitement", ('reason',)
+)
+RECOMMENDATION_STAGE_DURATION = metrics_registry.histogram(
+    'recommendation_stage_duration_seconds', "Durée des étages du pipeline de recommandation", ('stage',)
+)
+
+
+def _pool_collector(engine):
+    def collect():
+        pool = engine.pool
+        samples = []
+        for name, attribute, documentation in (
+            ('db_pool_size', 'size', "Taille configurée du pool de connexions"),
+            ('db_pool_checked_out', 'checkedout', "Connexions empruntées au pool"),
+            ('db_pool_checked_in', 'checkedin', "Connexions disponibles dans le pool"),
+            ('db_pool_overflow', 'overflow', "Connexions ouvertes au-delà de la taille du pool")
+        ):
+            method = getattr(pool, attribute, None)
+            if callable(method):
+                samples.append((name, 'gauge', documentation, {}, method()))
+        return samples
+    return collect
+
+
+def _cache_collector():
+    from services.recommendation_cache import recommendation_cache
+    from services.tmdb_client import tmdb_client
+    from utils.auth_middleware import principal_cache
+
+    samples = []
+    for cache_name, hits, misses in (
+        ('recommendations', recommendation_cache.hits, recommendation_cache.misses),
+        ('tmdb', tmdb_client.cache.hits, tmdb_client.cache.misses),
+        ('auth_principals', principal_cache.hits, principal_cache.misses)
+    ):
+        labels = {'cache': cache_name}
+        samples.append(('cache_hits_total', 'counter', "Lectures de cache réussies", labels, hits))
+        samples.append(('cache_misses_total', 'counter', "Lectures de cache manquées", labels, misses))
+    return samples
+
+
+def _recommendation_collector():
+    from services.recommendation_service import recommendation_service
+
+    samples = []
+    for stage, stats in recommendation_service.pipeline.stage_stats().items():
+        labels = {'stage': stage}
+        samples.append(('recommendation_stage_over_budget_total', 'counter',
+                        "Étages de recommandation hors budget", labels, stats['over_budget']))
+        samples.append(('recommendation_stage_skipped_total', 'counter',
+                        "Étages de recommandation sautés faute de budget", labels, stats['skipped']))
+        samples.append(('recommendation_stage_errors_total', 'counter',
+                        "Étages de recommandation en échec", labels, stats['errors']))
+    return samples
+
+
+def init_metrics(app):
+    """
+    Instrumente l'application : latence par blueprint / route, statuts,
+    requêtes en cours, pool de connexions, caches et étages de
+    recommandation, exposés sur /metrics (voir metrics_request_allowed).
+    """
+    if not METRICS_ENABLED:
+        return
+    from database.db import db
+
+    with app.app_context():
+        metrics_registry.add_collector(_pool_collector(db.engine))
+    metrics_registry.add_collector(_cache_collector)
+    metrics_registry.add_collector(_recommendation_collector)
+    metrics_registry.start_flusher()
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started_at = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started_at = g.get('metrics_started_at')
+        if started_at is None:
+            return response
+        # Gabarit de la route plutôt que le chemin : cardinalité bornée
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        blueprint = request.blueprint or 'app'
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - started_at,
+                                      blueprint=blueprint, route=route, method=request.method)
+        HTTP_REQUESTS.inc(blueprint=blueprint, route=route, method=request.method, status=response.status_code)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if g.pop('metrics_started_at', None) is not None:
+            HTTP_IN_FLIGHT.dec()
+
+    _add_metrics_route(app)
+
+
+def metrics_request_allowed():
+    """
+    /metrics expose des noms de routes et l'état interne : avec METRICS_TOKEN,
+    il faut l'en-tête Authorization: Bearer <jeton> ; sans jeton, seules les
+    adresses de METRICS_ALLOWED_IPS (boucle locale par défaut) y ont accès.
+    """
+    if METRICS_TOKEN:
+        header = request.headers.get('Authorization', '')
+        return hmac.compare_digest(header.encode(), f"Bearer {METRICS_TOKEN}".encode())
+    return request.remote_addr in METRICS_ALLOWED_IPS
+
+
+def _add_metrics_route(app, registry=metrics_registry):
+    @app.route(METRICS_PATH)
+    def metrics():
+        if not metrics_request_allowed():
+            return jsonify({'error': 'Accès refusé'}), 403
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
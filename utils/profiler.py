@@ -0,0 +1,224 @@
+import os
+import re
+import sys
+import hmac
+import time
+import random
+import hashlib
+import cProfile
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Secret partagé des en-têtes X-Profile ; sans secret, le profilage à la demande est désactivé
+PROFILE_SECRET = os.getenv('PROFILE_SECRET')
+# Profilage global d'une requête sur N (0 = désactivé), avec l'échantillonneur peu coûteux
+PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'profiles'))
+# Nombre de fichiers conservés dans PROFILE_DIR (les plus anciens sont supprimés)
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 200))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))
+PROFILE_HEADER = 'X-Profile'
+PROFILE_MODE_HEADER = 'X-Profile-Mode'
+PROFILE_MODES = ('cprofile', 'sampler')
+
+_UNSAFE_FILENAME = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def sign_profile_request(method, path, ttl=300, secret=None):
+    """
+    Valeur d'en-tête X-Profile pour une requête : "<expiration>.<hmac>".
+
+    Exemple :
+        python -c "from utils.profiler import sign_profile_request; print(sign_profile_request('GET', '/api/users/1/stats'))"
+        curl -H "X-Profile: <valeur>" -H "X-Profile-Mode: cprofile" http://localhost:5000/api/users/1/stats
+    """
+    expires = int(time.time() + ttl)
+    return f"{expires}.{_signature(secret or PROFILE_SECRET, method, path, expires)}"
+
+
+def verify_profile_header(value, method, path, secret=None):
+    """Vérifie la signature et l'expiration d'un en-tête X-Profile."""
+    secret = secret or PROFILE_SECRET
+    if not secret or not value or '.' not in value:
+        return False
+    expires, signature = value.split('.', 1)
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(secret, method, path, int(expires)))
+
+
+def _signature(secret, method, path, expires):
+    # Lié à la méthode et au chemin : un en-tête intercepté ne profile pas d'autres routes
+    message = f"{method.upper()} {path} {expires}".encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class StackSampler:
+    """
+    Échantillonneur de piles : un thread relève toutes les
+    PROFILE_SAMPLE_INTERVAL_MS la pile du thread observé via
+    sys._current_frames(). Le coût pour la requête est quasi nul, au prix
+    d'une vue statistique ; la sortie est au format « collapsed » des
+    flamegraphs (flamegraph.pl, speedscope).
+    """
+
+    def __init__(self, thread_id=None, interval_ms=PROFILE_SAMPLE_INTERVAL_MS):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfile:
+    """Profil en cours : cProfile (pstats) ou échantillonneur (collapsed)."""
+
+    def __init__(self, label, mode='sampler'):
+        self.label = label
+        self.mode = mode if mode in PROFILE_MODES else 'sampler'
+        self.profiler = cProfile.Profile() if self.mode == 'cprofile' else StackSampler()
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        if self.mode == 'cprofile':
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        """Arrête le profil et l'écrit dans PROFILE_DIR ; retourne le nom du fichier."""
+        if self.mode == 'cprofile':
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+        elapsed_ms = (time.perf_counter() - self.started_at) * 1000
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        extension = 'prof' if self.mode == 'cprofile' else 'collapsed'
+        slug = _UNSAFE_FILENAME.sub('_', self.label).strip('_')[:80]
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{slug}_{os.getpid()}_{os.urandom(3).hex()}.{extension}"
+        path = os.path.join(PROFILE_DIR, filename)
+        if self.mode == 'cprofile':
+            self.profiler.dump_stats(path)
+        else:
+            self.profiler.dump(path)
+        logger.info("🔬 Profil %s de %s (%.0fms) écrit dans %s", self.mode, self.label, elapsed_ms, path)
+        _prune_profiles(PROFILE_DIR, PROFILE_MAX_FILES)
+        return filename
+
+
+def _prune_profiles(directory, max_files):
+    """Supprime les profils les plus anciens au-delà de `max_files`."""
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.is_file() and entry.name.endswith(('.prof', '.collapsed'))]
+    except OSError:
+        return
+    if len(entries) <= max_files:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - max_files]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass  # Déjà supprimé par un autre worker
+
+
+@contextmanager
+def profiled(label, mode='cprofile'):
+    """
+    Profile un bloc en place, hors requête HTTP (entraînement, script...).
+
+    Exemple :
+        with profiled('train_recommendation_models'):
+            train_recommendation_models()
+    """
+    profile = RequestProfile(label, mode)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+
+
+def _requested_profile():
+    """Mode de profilage de la requête courante, ou None."""
+    header = request.headers.get(PROFILE_HEADER)
+    if header:
+        if verify_profile_header(header, request.method, request.path):
+            return request.headers.get(PROFILE_MODE_HEADER, 'cprofile')
+        logger.warning("⚠️ En-tête %s invalide ou expiré pour %s %s", PROFILE_HEADER, request.method, request.path)
+        return None
+    if PROFILE_SAMPLE_RATE and random.randrange(PROFILE_SAMPLE_RATE) == 0:
+        return 'sampler'
+    return None
+
+
+def init_profiler(app):
+    """
+    Profilage à la demande des requêtes.
+
+    - En-tête signé X-Profile (voir sign_profile_request), éventuellement
+      accompagné de X-Profile-Mode: cprofile | sampler ;
+    - mode global : une requête sur PROFILE_SAMPLE_RATE, par échantillonnage.
+
+    Le fichier produit (.prof pour pstats / snakeviz, .collapsed pour les
+    flamegraphs) est écrit dans PROFILE_DIR et son nom renvoyé dans
+    l'en-tête X-Profile-File.
+    """
+    if not PROFILE_SECRET and not PROFILE_SAMPLE_RATE:
+        return
+
+    @app.before_request
+    def start_profiling():
+        mode = _requested_profile()
+        if mode:
+            g.profile = RequestProfile(f"{request.method} {request.path}", mode)
+            g.profile.start()
+
+    @app.after_request
+    def stop_profiling(response):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            response.headers['X-Profile-File'] = profile.stop()
+        return response
+
+    @app.teardown_request
+    def abort_profiling(exc):
+        # Filet de sécurité si after_request n'a pas été appelé
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.stop()
@@ -0,0 +1,16 @@
+import os
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+# Nombre de proxys de confiance devant l'application (répartiteur de l'hébergeur, nginx...).
+# 0 : X-Forwarded-For est ignoré et l'adresse du client est celle de la connexion.
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+
+
+def init_proxy_fix(app, hops=TRUSTED_PROXY_HOPS):
+    """
+    Adresse et schéma du client depuis les en-têtes X-Forwarded-* ajoutés
+    par les `hops` derniers proxys seulement : request.remote_addr ne peut
+    pas être choisi par le client en envoyant son propre X-Forwarded-For.
+    """
+    if hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
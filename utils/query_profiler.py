@@ -0,0 +1,164 @@
+import os
+import re
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUERY_PROFILER_ENABLED = os.getenv('QUERY_PROFILER_ENABLED', '1') == '1'
+# Seuils au-delà desquels une requête HTTP est journalisée avec ses requêtes SQL
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', 20))
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 500))
+# Nombre de requêtes SQL normalisées citées dans le log
+SLOW_REQUEST_TOP_STATEMENTS = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BOUND_PARAMETER = re.compile(r"%\(\w+\)s|:\w+|\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Compteurs actifs des blocs assert_max_queries (tous threads confondus)
+_counters = []
+_counters_lock = threading.Lock()
+
+
+def normalize_statement(statement):
+    """Forme canonique d'une requête : littéraux et paramètres remplacés par ?, listes IN repliées."""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _BOUND_PARAMETER.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _PLACEHOLDER_LIST.sub('(?...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+class QueryStats:
+    """
+    Requêtes SQL d'une unité de travail (requête HTTP ou bloc de test).
+
+    Les requêtes sont comptées telles quelles (paramètres liés, donc
+    souvent déjà identiques) ; la normalisation n'est faite qu'à la
+    lecture, quand un log ou une assertion cite les plus fréquentes.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.raw_statements = Counter()
+
+    def add(self, statement, elapsed_ms):
+        self.count += 1
+        self.db_ms += elapsed_ms
+        self.raw_statements[statement] += 1
+
+    @property
+    def statements(self):
+        """Compteur des requêtes normalisées (calculé à la demande)."""
+        statements = Counter()
+        for statement, count in self.raw_statements.items():
+            statements[normalize_statement(statement)] += count
+        return statements
+
+    def top_statements(self, limit=SLOW_REQUEST_TOP_STATEMENTS):
+        return self.statements.most_common(limit)
+
+    def format_statements(self, limit=SLOW_REQUEST_TOP_STATEMENTS):
+        return '\n'.join(f"   {count}× {statement}" for statement, count in self.top_statements(limit))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info.get('query_started_at')
+    if not started_at:
+        return
+    elapsed_ms = (time.perf_counter() - started_at.pop()) * 1000
+
+    if has_request_context():
+        stats = g.get('query_stats')
+        if stats is not None:
+            stats.add(statement, elapsed_ms)
+    if _counters:
+        with _counters_lock:
+            for counter in _counters:
+                counter.add(statement, elapsed_ms)
+
+
+def _install_engine_listeners():
+    # Écoute au niveau de la classe : couvre le moteur Flask-SQLAlchemy créé paresseusement
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_query_profiler(app):
+    """
+    Compte les requêtes SQL et le temps passé en base pour chaque requête HTTP.
+
+    Les totaux sont renvoyés dans l'en-tête Server-Timing
+    (`db;dur=12.3;desc="7 queries", app;dur=45.6`) ; au-delà de
+    SLOW_REQUEST_QUERIES requêtes ou SLOW_REQUEST_MS millisecondes, la
+    requête est journalisée avec ses requêtes SQL normalisées les plus
+    fréquentes (un N+1 y apparaît comme une même requête répétée).
+
+    Les requêtes des étages de recommandation exécutés sur le pool de
+    threads n'ont pas de contexte de requête et ne sont pas comptées.
+    """
+    if not QUERY_PROFILER_ENABLED:
+        return
+    _install_engine_listeners()
+
+    @app.before_request
+    def start_query_profiling():
+        g.query_stats = QueryStats()
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - g.request_started_at) * 1000
+        timing = f'db;dur={stats.db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f"{existing}, {timing}" if existing else timing
+
+        if stats.count > SLOW_REQUEST_QUERIES or total_ms > SLOW_REQUEST_MS:
+            logger.warning(
+                "🐢 Requête lente %s %s: %.0fms, %s requêtes SQL (%.0fms en base)\n%s",
+                request.method, request.path, total_ms, stats.count, stats.db_ms, stats.format_statements()
+            )
+        return response
+
+
+@contextmanager
+def assert_max_queries(max_queries, label=None):
+    """
+    Budget de requêtes SQL pour les tests : échoue si le bloc en exécute plus de max_queries.
+
+    Exemple :
+        with assert_max_queries(5, 'GET /api/movies/<id>/comments/'):
+            client.get('/api/movies/1/comments/')
+    """
+    _install_engine_listeners()
+    stats = QueryStats()
+    with _counters_lock:
+        _counters.append(stats)
+    try:
+        yield stats
+    finally:
+        with _counters_lock:
+            _counters.remove(stats)
+    if stats.count > max_queries:
+        raise AssertionError(
+            f"{label or 'Bloc'}: {stats.count} requêtes SQL pour un budget de {max_queries}\n"
+            f"{stats.format_statements()}"
+        )
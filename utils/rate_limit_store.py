@@ -0,0 +1,200 @@
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+import zlib
+import logging
+
+try:
+    import redis
+except ImportError:  # dépendance optionnelle, requise seulement pour RATE_LIMIT_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# memory (par processus), sqlite (partagé entre les workers d'une machine) ou redis (partagé entre machines)
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_SQLITE_PATH = os.getenv('RATE_LIMIT_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'rate_limits.db'))
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+RATE_LIMIT_STRIPES = int(os.getenv('RATE_LIMIT_STRIPES', 64))
+# Une purge des clés inactives toutes les N décisions (par segment ou par connexion)
+RATE_LIMIT_SWEEP_EVERY = int(os.getenv('RATE_LIMIT_SWEEP_EVERY', 1000))
+
+
+class RateLimitResult:
+    """Décision du limiteur : autorisée ou non, délai avant la prochaine requête admise, marge restante."""
+
+    __slots__ = ('allowed', 'retry_after', 'remaining')
+
+    def __init__(self, allowed, retry_after, remaining):
+        self.allowed = allowed
+        self.retry_after = retry_after
+        self.remaining = remaining
+
+
+def gcra(tat, now, limit, window):
+    """
+    Generic Cell Rate Algorithm : tout l'état d'une clé tient dans un flottant,
+    la date d'arrivée théorique (TAT) de la prochaine requête.
+
+    Chaque requête avance la TAT d'un intervalle window / limit ; la requête
+    est refusée si la TAT dépasserait maintenant + window. Cela autorise des
+    rafales de `limit` requêtes puis un débit lissé de limit / window, sans
+    garder d'horodatage par requête.
+
+    Returns:
+        (RateLimitResult, nouvelle TAT ou None si refusée)
+    """
+    interval = window / limit
+    tat = max(tat or now, now)
+    new_tat = tat + interval
+    allow_at = new_tat - window
+    if now < allow_at:
+        return RateLimitResult(False, allow_at - now, 0), None
+    remaining = int((window - (new_tat - now)) / interval)
+    return RateLimitResult(True, 0.0, remaining), new_tat
+
+
+class MemoryStore:
+    """
+    État en mémoire du processus, réparti sur RATE_LIMIT_STRIPES segments
+    ayant chacun leur verrou : deux clés de segments différents ne se
+    disputent jamais un verrou. Une clé dont la TAT est passée équivaut à
+    une clé absente ; elle est supprimée lors de la purge périodique de
+    son segment.
+    """
+
+    def __init__(self, stripes=RATE_LIMIT_STRIPES, sweep_every=RATE_LIMIT_SWEEP_EVERY):
+        self._stripes = [({}, threading.Lock()) for _ in range(stripes)]
+        self._operations = [0] * stripes
+        self.sweep_every = sweep_every
+
+    def hit(self, key, limit, window):
+        index = zlib.crc32(key.encode()) % len(self._stripes)
+        entries, lock = self._stripes[index]
+        now = time.time()
+        with lock:
+            result, new_tat = gcra(entries.get(key), now, limit, window)
+            if new_tat is not None:
+                entries[key] = new_tat
+            self._operations[index] += 1
+            if self._operations[index] % self.sweep_every == 0:
+                for stale in [k for k, tat in entries.items() if tat <= now]:
+                    del entries[stale]
+        return result
+
+    def __len__(self):
+        return sum(len(entries) for entries, _ in self._stripes)
+
+    def clear(self):
+        for entries, lock in self._stripes:
+            with lock:
+                entries.clear()
+
+
+class SQLiteStore:
+    """
+    État partagé par les processus d'une même machine via un fichier SQLite
+    (mode WAL). La lecture-écriture d'une clé se fait dans une transaction
+    BEGIN IMMEDIATE : les workers gunicorn appliquent donc une seule limite.
+    """
+
+    def __init__(self, path=RATE_LIMIT_SQLITE_PATH, sweep_every=RATE_LIMIT_SWEEP_EVERY):
+        self.path = path
+        self.sweep_every = sweep_every
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)')
+            self._local.conn = conn
+            self._local.operations = 0
+        return conn
+
+    def hit(self, key, limit, window):
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tat FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            result, new_tat = gcra(row[0] if row else None, now, limit, window)
+            if new_tat is not None:
+                conn.execute(
+                    'INSERT INTO rate_limits (key, tat) VALUES (?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tat = excluded.tat',
+                    (key, new_tat)
+                )
+            self._local.operations += 1
+            if self._local.operations % self.sweep_every == 0:
+                conn.execute('DELETE FROM rate_limits WHERE tat <= ?', (now,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def clear(self):
+        self._connection().execute('DELETE FROM rate_limits')
+
+
+class RedisStore:
+    """
+    État partagé dans Redis (ou tout serveur parlant son protocole). Le GCRA
+    s'exécute dans un script Lua, donc atomiquement côté serveur, avec
+    l'horloge du serveur ; chaque clé expire d'elle-même à sa TAT.
+    """
+
+    SCRIPT = """
+        local now_parts = redis.call('TIME')
+        local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+        local limit = tonumber(ARGV[1])
+        local window = tonumber(ARGV[2])
+        local interval = window / limit
+        local tat = tonumber(redis.call('GET', KEYS[1])) or now
+        if tat < now then tat = now end
+        local new_tat = tat + interval
+        local allow_at = new_tat - window
+        if now < allow_at then
+            return {0, tostring(allow_at - now), 0}
+        end
+        redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+        return {1, '0', math.floor((window - (new_tat - now)) / interval)}
+    """
+
+    def __init__(self, url=RATE_LIMIT_REDIS_URL, prefix='ratelimit:'):
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis nécessite le paquet redis (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(self.SCRIPT)
+
+    def hit(self, key, limit, window):
+        allowed, retry_after, remaining = self._script(keys=[self.prefix + key], args=[limit, window])
+        return RateLimitResult(bool(allowed), float(retry_after), int(remaining))
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+BACKENDS = {
+    'memory': MemoryStore,
+    'sqlite': SQLiteStore,
+    'redis': RedisStore
+}
+
+
+def create_store(backend=RATE_LIMIT_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de limitation inconnu: {backend} (valeurs: {', '.join(BACKENDS)})")
+    logger.info("🚦 Limiteur de débit GCRA, backend %s", backend)
+    return BACKENDS[backend]()
+
+
+# Créer une instance du service
+rate_limit_store = create_store()
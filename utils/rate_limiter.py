@@ -1,91 +1,113 @@
-from functools import wraps
 from flask import request, jsonify
-import time
-from collections import defaultdict, deque
-import threading
+import os
+import logging
+from utils.rate_limit_store import rate_limit_store
+from utils.auth_middleware import current_user_id
 
-# Dictionnaire pour stocker les timestamps des requêtes par IP et endpoint
-request_history = defaultdict(lambda: defaultdict(deque))
-lock = threading.RLock()
+logger = logging.getLogger(__name__)
 
-def rate_limit(max_requests=60, window_seconds=60, per_endpoint=True):
+# Désactivable pour les bancs de charge (scripts/benchmark_api.py)
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+
+def get_client_ip():
+    """Adresse du client ; derrière des proxys, résolue par ProxyFix (voir utils/proxy.py)."""
+    return request.remote_addr or 'unknown'
+
+def check_rate_limit(key, max_requests, window_seconds):
     """
-    Décorateur pour limiter le taux de requêtes
-    max_requests: nombre maximum de requêtes autorisées
-    window_seconds: fenêtre de temps en secondes
-    per_endpoint: si True, limite par endpoint, sinon par IP globalement
+    Applique la limite à une clé ; l'état (une seule date par clé, GCRA) est
+    tenu par le backend configuré (RATE_LIMIT_BACKEND), partagé entre
+    workers pour sqlite et redis.
+    
+    Returns:
+        RateLimitResult, ou None si le backend est indisponible (on laisse passer)
     """
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            # Obtenir l'IP du client
-            client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
-            
-            # Obtenir l'endpoint (route)
-            endpoint = request.path if per_endpoint else 'global'
-            
-            current_time = time.time()
-            
-            with lock:
-                # Nettoyer les anciennes requêtes
-                while (request_history[client_ip][endpoint] and 
-                       request_history[client_ip][endpoint][0] < current_time - window_seconds):
-                    request_history[client_ip][endpoint].popleft()
-                
-                # Vérifier si la limite est dépassée
-                if len(request_history[client_ip][endpoint]) >= max_requests:
-                    # Calculer le temps restant avant de pouvoir faire une nouvelle requête
-                    oldest_request = request_history[client_ip][endpoint][0]
-                    reset_time = oldest_request + window_seconds
-                    seconds_remaining = int(reset_time - current_time) + 1
-                    
-                    return jsonify({
-                        'error': 'Rate limit exceeded',
-                        'message': f'Maximum {max_requests} requests per {window_seconds} seconds',
-                        'retry_after': seconds_remaining
-                    }), 429, {'Retry-After': str(seconds_remaining)}
-                
-                # Ajouter la requête actuelle
-                request_history[client_ip][endpoint].append(current_time)
-            
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
+    try:
+        return rate_limit_store.hit(key, max_requests, window_seconds)
+    except Exception as e:
+        logger.warning("⚠️ Limiteur de débit indisponible, requête autorisée: %s", e)
+        return None
+
+def rate_limit_exceeded(result, message, **extra):
+    seconds_remaining = int(result.retry_after) + 1
+    body = {
+        'error': 'Rate limit exceeded',
+        'message': message,
+        'retry_after': seconds_remaining
+    }
+    body.update(extra)
+    return jsonify(body), 429, {'Retry-After': str(seconds_remaining)}
+
+class RateLimitPolicy:
+    """Limite déclarative : `limit` requêtes par `window` secondes, par endpoint et par utilisateur (ou IP)."""
+    
+    __slots__ = ('name', 'limit', 'window', 'description')
+    
+    def __init__(self, name, limit, window=60, description=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.description = description or name
 
-# Fonction pour appliquer le rate limiting global
-def apply_global_rate_limiting(app, max_requests_per_minute=30):
+# Politiques par endpoint Flask (blueprint.fonction), puis par blueprint ; les autres routes /api/ ont la politique par défaut
+USER_DATA_POLICY = RateLimitPolicy('user_data', 15, 60, "Endpoints données utilisateur")
+BLUEPRINT_POLICIES = {
+    'user': USER_DATA_POLICY,
+    'like': USER_DATA_POLICY,
+    'watchlist': USER_DATA_POLICY
+}
+ENDPOINT_POLICIES = {
+    'recommendation.get_user_recommendations': RateLimitPolicy(
+        'recommendations', 30, 60, "Recommandations (servies depuis le cache)"
+    ),
+    'recommendation.train_models': RateLimitPolicy('train', 1, 300, "Entraînement des modèles"),
+    'recommendation.get_popular_movies': RateLimitPolicy('popular', 20, 60, "Films populaires"),
+    'recommendation.get_trending_movies': RateLimitPolicy('trending', 30, 60, "Tendances")
+}
+
+class RateLimitPolicies:
     """
-    Applique le rate limiting global à toutes les routes API
+    Table des politiques, résolue une fois par endpoint : la recherche par
+    requête est une lecture de dictionnaire, sans parcours de sous-chaînes.
     """
-    @app.before_request
-    def before_request():
-        # Appliquer le rate limiting seulement aux routes API
-        if request.path.startswith('/api/'):
-            client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', 
-                                          request.environ.get('REMOTE_ADDR', 'unknown'))
-            endpoint = request.path
-            current_time = time.time()
-            
-            with lock:
-                # Nettoyer les requêtes anciennes (plus d'1 minute)
-                while (request_history[client_ip][endpoint] and 
-                       request_history[client_ip][endpoint][0] < current_time - 60):
-                    request_history[client_ip][endpoint].popleft()
-                
-                # Limites spéciales pour certains endpoints
-                max_requests = max_requests_per_minute
-                
-                # Plus strict pour les endpoints qui causent des boucles
-                if any(pattern in request.path for pattern in ['/watchlist/', '/likes', '/users/']):
-                    max_requests = 15  # Très strict pour ces endpoints
-                
-                if len(request_history[client_ip][endpoint]) >= max_requests:
-                    return jsonify({
-                        'error': 'Rate limit exceeded',
-                        'message': f'Maximum {max_requests} requests per minute for this endpoint',
-                        'retry_after': 60,
-                        'endpoint': endpoint
-                    }), 429
-                
-                # Ajouter la requête actuelle
-                request_history[client_ip][endpoint].append(current_time)
+    
+    def __init__(self, default, blueprints=None, endpoints=None):
+        self.default = default
+        self.blueprints = dict(blueprints or {})
+        self.endpoints = dict(endpoints or {})
+        # Mémo sans verrou, course acceptée : deux threads peuvent résoudre le même
+        # endpoint en parallèle, mais ils calculent la même politique et
+        # l'affectation d'une clé de dict est atomique ; les endpoints Flask
+        # étant en nombre fini, le mémo reste borné.
+        self._resolved = {}
+    
+    def resolve(self, endpoint):
+        policy = self._resolved.get(endpoint)
+        if policy is None:
+            policy = self.endpoints.get(endpoint)
+            if policy is None and endpoint and '.' in endpoint:
+                policy = self.blueprints.get(endpoint.rsplit('.', 1)[0])
+            policy = policy or self.default
+            self._resolved[endpoint] = policy
+        return policy
+    
+    def describe(self):
+        """Politiques distinctes, pour l'annonce au démarrage."""
+        policies = [self.default] + list(self.blueprints.values()) + list(self.endpoints.values())
+        unique = []
+        for policy in policies:
+            if policy not in unique:
+                unique.append(policy)
+        return unique
+
+def get_rate_limit_identity():
+    """Utilisateur authentifié si connu, sinon adresse IP."""
+    user_id = current_user_id()
+    return f"user:{user_id}" if user_id else f"ip:{get_client_ip()}"
+
+def format_window(seconds):
+    if seconds == 60:
+        return 'minute'
+    if seconds % 60 == 0:
+        return f'{seconds // 60} minutes'
+    return f'{seconds} secondes'
@@ -0,0 +1,178 @@
+import os
+import time
+import zlib
+import threading
+import logging
+from collections import deque
+from flask import request
+from utils.rate_limiter import (
+    RATE_LIMIT_ENABLED, RateLimitPolicy, RateLimitPolicies, BLUEPRINT_POLICIES, ENDPOINT_POLICIES,
+    check_rate_limit, rate_limit_exceeded, get_rate_limit_identity
+)
+from utils.rate_limit_store import RateLimitResult
+from utils.proxy import TRUSTED_PROXY_HOPS
+from utils.metrics import REQUEST_GUARD_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+LOOP_DETECTION_ENABLED = os.getenv('LOOP_DETECTION_ENABLED', '1') == '1'
+# Boucle présumée : plus de LOOP_BLOCK_THRESHOLD requêtes d'un client sur un endpoint en LOOP_WINDOW_SECONDS
+LOOP_WINDOW_SECONDS = int(os.getenv('LOOP_WINDOW_SECONDS', 120))
+LOOP_WARNING_THRESHOLD = int(os.getenv('LOOP_WARNING_THRESHOLD', 50))
+LOOP_BLOCK_THRESHOLD = int(os.getenv('LOOP_BLOCK_THRESHOLD', 100))
+# Durée du blocage temporaire du client (0 = alerte seulement, sans blocage)
+GUARD_BLOCK_SECONDS = int(os.getenv('GUARD_BLOCK_SECONDS', 300))
+# Blocage des clients anonymes (par IP) : par défaut seulement si l'IP vient d'un proxy de
+# confiance, sinon tous les clients derrière un même proxy seraient bloqués ensemble
+GUARD_BLOCK_IPS = os.getenv('GUARD_BLOCK_IPS', '1' if TRUSTED_PROXY_HOPS else '0') == '1'
+GUARD_STRIPES = int(os.getenv('GUARD_STRIPES', 64))
+GUARD_SWEEP_EVERY = int(os.getenv('GUARD_SWEEP_EVERY', 1000))
+
+
+class RequestGuard:
+    """
+    État anti-abus en mémoire : fenêtres de requêtes par (client, endpoint)
+    et blocages temporaires par client, répartis sur GUARD_STRIPES segments
+    selon le client. Toutes les données d'un client sont dans le même
+    segment : une seule prise de verrou par requête. Les clients anonymes
+    (identité `ip:...`) ne sont bloqués que si `block_ips` est vrai.
+    """
+
+    def __init__(self, window=LOOP_WINDOW_SECONDS, warning_threshold=LOOP_WARNING_THRESHOLD,
+                 block_threshold=LOOP_BLOCK_THRESHOLD, block_seconds=GUARD_BLOCK_SECONDS,
+                 stripes=GUARD_STRIPES, sweep_every=GUARD_SWEEP_EVERY, block_ips=GUARD_BLOCK_IPS):
+        self.window = window
+        self.warning_threshold = warning_threshold
+        self.block_threshold = block_threshold
+        self.block_seconds = block_seconds
+        self.block_ips = block_ips
+        self.sweep_every = sweep_every
+        # (fenêtres, blocages, verrou) par segment
+        self._stripes = [({}, {}, threading.Lock()) for _ in range(stripes)]
+        self._operations = [0] * stripes
+
+    def check(self, identity, endpoint, now):
+        """
+        Enregistre une requête du client sur l'endpoint.
+
+        Returns:
+            (date de fin de blocage ou None, nombre de requêtes dans la fenêtre) ;
+            le nombre vaut None si le client était déjà bloqué (requête non comptée)
+        """
+        index = zlib.crc32(identity.encode()) % len(self._stripes)
+        windows, blocks, lock = self._stripes[index]
+        with lock:
+            blocked_until = blocks.get(identity)
+            if blocked_until is not None:
+                if blocked_until > now:
+                    return blocked_until, None
+                del blocks[identity]
+
+            key = (identity, endpoint)
+            timestamps = windows.get(key)
+            if timestamps is None:
+                # Au-delà du seuil de blocage, le compte exact n'apporte plus rien ; la marge
+                # d'un élément distingue le franchissement du seuil (alerte unique) de la suite
+                timestamps = windows[key] = deque(maxlen=self.block_threshold + 2)
+            cutoff = now - self.window
+            while timestamps and timestamps[0] <= cutoff:
+                timestamps.popleft()
+            timestamps.append(now)
+            count = len(timestamps)
+
+            if self.block_seconds and count > self.block_threshold and (self.block_ips or not identity.startswith('ip:')):
+                blocked_until = blocks[identity] = now + self.block_seconds
+                del windows[key]
+
+            self._operations[index] += 1
+            if self._operations[index] % self.sweep_every == 0:
+                self._sweep(windows, blocks, now)
+        return blocked_until, count
+
+    def _sweep(self, windows, blocks, now):
+        cutoff = now - self.window
+        for key in [k for k, timestamps in windows.items() if not timestamps or timestamps[-1] <= cutoff]:
+            del windows[key]
+        for identity in [i for i, until in blocks.items() if until <= now]:
+            del blocks[identity]
+
+    def unblock(self, identity):
+        index = zlib.crc32(identity.encode()) % len(self._stripes)
+        _, blocks, lock = self._stripes[index]
+        with lock:
+            return blocks.pop(identity, None) is not None
+
+    def blocked_clients(self):
+        now = time.time()
+        clients = {}
+        for _, blocks, lock in self._stripes:
+            with lock:
+                clients.update({identity: until for identity, until in blocks.items() if until > now})
+        return clients
+
+    def clear(self):
+        for windows, blocks, lock in self._stripes:
+            with lock:
+                windows.clear()
+                blocks.clear()
+
+
+def init_request_guard(app, max_requests_per_minute=25):
+    """
+    Protection des routes API en un seul before_request : client bloqué,
+    détection de boucles (avec blocage temporaire du client), puis
+    politiques de limitation de débit (voir utils/rate_limiter).
+
+    À enregistrer avant les autres hooks : un client bloqué ou limité
+    reçoit son 429 sans aucun accès à la base.
+    """
+    policies = RateLimitPolicies(
+        RateLimitPolicy('api', max_requests_per_minute, 60, "Endpoints API généraux"),
+        BLUEPRINT_POLICIES,
+        ENDPOINT_POLICIES
+    )
+    app.extensions['rate_limit_policies'] = policies
+    if not RATE_LIMIT_ENABLED and not LOOP_DETECTION_ENABLED:
+        return
+
+    @app.before_request
+    def guard_request():
+        if not request.path.startswith('/api/'):
+            return
+
+        identity = get_rate_limit_identity()
+        endpoint = request.endpoint or 'unmatched'
+
+        if LOOP_DETECTION_ENABLED:
+            now = time.time()
+            blocked_until, count = request_guard.check(identity, endpoint, now)
+            if blocked_until is not None:
+                if count is not None:
+                    logger.error("🚨 Boucle infinie détectée: %s, %s requêtes sur %s en %ss, client bloqué %ss",
+                                 identity, count, endpoint, request_guard.window, request_guard.block_seconds)
+                REQUEST_GUARD_REJECTIONS.inc(reason='blocked')
+                return rate_limit_exceeded(
+                    RateLimitResult(False, blocked_until - now, 0),
+                    'Client temporarily blocked after a request loop', endpoint=endpoint
+                )
+            if count == request_guard.block_threshold + 1:
+                # Client non bloqué (GUARD_BLOCK_SECONDS=0, ou IP sans proxy de confiance) : alerte au franchissement du seuil
+                logger.error("🚨 Boucle infinie détectée: %s, %s requêtes sur %s en %ss",
+                             identity, count, endpoint, request_guard.window)
+            elif count == request_guard.warning_threshold + 1:
+                logger.warning("⚠️ Fréquence élevée: %s, %s requêtes sur %s en %ss",
+                               identity, count, endpoint, request_guard.window)
+
+        if RATE_LIMIT_ENABLED:
+            policy = policies.resolve(request.endpoint)
+            result = check_rate_limit(f"{policy.name}|{endpoint}|{identity}", policy.limit, policy.window)
+            if result is not None and not result.allowed:
+                REQUEST_GUARD_REJECTIONS.inc(reason='rate_limited')
+                return rate_limit_exceeded(
+                    result, f'Maximum {policy.limit} requests per {policy.window} seconds for this endpoint',
+                    endpoint=endpoint
+                )
+
+
+# Créer une instance du service
+request_guard = RequestGuard()
@@ -0,0 +1,64 @@
+import threading
+
+class _Call:
+    """Appel en cours partagé entre le thread leader et les threads en attente."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Déduplication des appels concurrents par clé (équivalent de singleflight en Go).
+
+    Tant qu'un appel pour une clé est en cours dans ce processus, les autres
+    threads qui demandent la même clé attendent son résultat au lieu de
+    relancer le travail. Rien n'est mis en cache une fois l'appel terminé.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Exécute fn(*args, **kwargs) une seule fois pour les appels simultanés sur `key`.
+
+        Returns:
+            Tuple (résultat, shared) où shared est True pour les threads qui ont
+            reçu le résultat d'un autre thread
+
+        Raises:
+            L'exception levée par fn, propagée à tous les threads en attente
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)